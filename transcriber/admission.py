@@ -0,0 +1,207 @@
+"""Admission control for uploads, sized from the media probe before anything is decoded.
+
+``CostModel`` turns a ``media.MediaProbe`` into an estimate of processing
+seconds using a running real-time factor (processing seconds per media second)
+for each pipeline stage. ``AdmissionController`` checks that estimate against the
+budgets below. A request over the hard limit is rejected. One over the
+per-request budget goes to the job queue (or is rejected if
+ADMISSION_ROUTE_ASYNC=0). Anything else runs synchronously once the estimated
+cost of all synchronous requests in flight fits the global budget. Budgets are
+in estimated processing seconds; 0 disables a budget.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, Optional
+
+from media import MediaProbe
+
+ADMISSION_MAX_COST_SECONDS = float(os.environ.get("ADMISSION_MAX_COST_SECONDS", "1800"))
+ADMISSION_REQUEST_BUDGET_SECONDS = float(os.environ.get("ADMISSION_REQUEST_BUDGET_SECONDS", "120"))
+ADMISSION_GLOBAL_BUDGET_SECONDS = float(os.environ.get("ADMISSION_GLOBAL_BUDGET_SECONDS", "300"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30"))
+ADMISSION_ROUTE_ASYNC = os.environ.get("ADMISSION_ROUTE_ASYNC", "1") == "1"
+
+# Starting real-time factors for a CPU int8 "base" model, replaced by observed
+# runs as they complete.
+DEFAULT_RTF = {"decode": 0.02, "transcribe": 0.3, "video": 0.15, "score": 0.002}
+# Weight of each new observation in the running average.
+RTF_SMOOTHING = 0.2
+# Video frames are decoded at full size before being downscaled, so the video
+# stage scales with resolution above this.
+REFERENCE_PIXELS = 640 * 360
+
+SYNC = "sync"
+ASYNC = "async"
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message: str, status_code: int, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+@dataclass
+class CostEstimate:
+    media_seconds: float
+    stages: Dict[str, float]
+    seconds: float
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class CostModel:
+    """Running real-time factor per pipeline stage."""
+
+    def __init__(self, priors: Optional[Dict[str, float]] = None, smoothing: float = RTF_SMOOTHING):
+        self.rtf = dict(priors or DEFAULT_RTF)
+        self.smoothing = smoothing
+        self.observations = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def media_seconds(probe: MediaProbe, fallback_seconds: Optional[float] = None) -> float:
+        if probe.duration_seconds is not None and not probe.duration_estimated:
+            return float(probe.duration_seconds)
+        # No header duration (browser WebM): the span of the packet timestamps is a
+        # floor, so a client can't shrink the cost by reporting a short duration.
+        return max(float(probe.duration_seconds or 0.0), float(fallback_seconds or 0.0))
+
+    @staticmethod
+    def units(stage: str, probe: MediaProbe, media_seconds: float) -> float:
+        if stage == "transcribe" and not probe.has_audio:
+            return 0.0
+        if stage == "video":
+            if not probe.has_video:
+                return 0.0
+            return media_seconds * max(1.0, (probe.width * probe.height) / REFERENCE_PIXELS)
+        return media_seconds
+
+    def estimate(self, probe: MediaProbe, fallback_seconds: Optional[float] = None) -> CostEstimate:
+        media_seconds = self.media_seconds(probe, fallback_seconds)
+        with self._lock:
+            rtf = dict(self.rtf)
+        stages = {stage: round(factor * self.units(stage, probe, media_seconds), 3) for stage, factor in rtf.items()}
+        return CostEstimate(round(media_seconds, 3), stages, round(sum(stages.values()), 3))
+
+    def observe(self, probe: MediaProbe, timings: Dict[str, Any], fallback_seconds: Optional[float] = None) -> None:
+        """Fold one finished run's ``<stage>_seconds`` timings into the running factors."""
+        media_seconds = self.media_seconds(probe, fallback_seconds)
+        if media_seconds <= 0:
+            return
+        with self._lock:
+            for stage in self.rtf:
+                seconds = timings.get(f"{stage}_seconds")
+                units = self.units(stage, probe, media_seconds)
+                if not isinstance(seconds, (int, float)) or units <= 0:
+                    continue
+                self.rtf[stage] += self.smoothing * (seconds / units - self.rtf[stage])
+            self.observations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"rtf": {k: round(v, 4) for k, v in self.rtf.items()}, "observations": self.observations}
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        model: CostModel,
+        max_cost: float = ADMISSION_MAX_COST_SECONDS,
+        request_budget: float = ADMISSION_REQUEST_BUDGET_SECONDS,
+        global_budget: float = ADMISSION_GLOBAL_BUDGET_SECONDS,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        route_async: bool = ADMISSION_ROUTE_ASYNC,
+    ):
+        self.model = model
+        self.max_cost = max_cost
+        self.request_budget = request_budget
+        self.global_budget = global_budget
+        self.queue_timeout = queue_timeout
+        self.route_async = route_async
+        self.in_flight = 0
+        self.in_flight_cost = 0.0
+        self.waiting = 0
+        self.counts = {"sync": 0, "async": 0, "rejected": 0}
+        self._cond = threading.Condition()
+
+    def check_limit(self, estimate: CostEstimate) -> None:
+        """Reject work too costly to accept on any path."""
+        if self.max_cost > 0 and estimate.seconds > self.max_cost:
+            with self._cond:
+                self.counts["rejected"] += 1
+            raise AdmissionRejected(
+                f"Estimated processing time {estimate.seconds:.0f}s exceeds the {self.max_cost:g}s limit",
+                413,
+            )
+
+    def decide(self, estimate: CostEstimate) -> str:
+        """SYNC or ASYNC for a synchronous request; raises AdmissionRejected."""
+        self.check_limit(estimate)
+        if self.request_budget > 0 and estimate.seconds > self.request_budget:
+            if not self.route_async:
+                with self._cond:
+                    self.counts["rejected"] += 1
+                raise AdmissionRejected(
+                    f"Estimated processing time {estimate.seconds:.0f}s exceeds the {self.request_budget:g}s "
+                    "budget for synchronous requests; submit it to /jobs instead",
+                    413,
+                )
+            with self._cond:
+                self.counts["async"] += 1
+            return ASYNC
+        return SYNC
+
+    @contextmanager
+    def reserve(self, estimate: CostEstimate) -> Iterator[None]:
+        """Hold ``estimate`` against the global budget while the block runs.
+
+        Waits up to ``queue_timeout`` for room, then raises AdmissionRejected (503).
+        A request costlier than the whole budget still runs once nothing else is.
+        """
+        cost = estimate.seconds
+        deadline = time.monotonic() + self.queue_timeout
+        with self._cond:
+            self.waiting += 1
+            try:
+                while self.global_budget > 0 and self.in_flight and self.in_flight_cost + cost > self.global_budget:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.counts["rejected"] += 1
+                        raise AdmissionRejected(
+                            "Server is at capacity, retry shortly",
+                            503,
+                            retry_after=max(1, math.ceil(self.in_flight_cost / self.in_flight)),
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self.in_flight_cost += cost
+            self.counts["sync"] += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self.in_flight_cost = max(0.0, self.in_flight_cost - cost)
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = {
+                "in_flight": self.in_flight,
+                "in_flight_cost_seconds": round(self.in_flight_cost, 3),
+                "waiting": self.waiting,
+                "global_budget_seconds": self.global_budget,
+                "request_budget_seconds": self.request_budget,
+                "max_cost_seconds": self.max_cost,
+                **self.counts,
+            }
+        stats.update(self.model.snapshot())
+        return stats
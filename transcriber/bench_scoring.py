@@ -0,0 +1,347 @@
+"""Micro-benchmarks for the scoring engine.
+
+Generates a reproducible synthetic transcript corpus and times every detector in
+``scoring.py`` individually as well as ``score_answer`` end to end.
+
+    python bench_scoring.py --out bench.json
+    python bench_scoring.py --quick --compare bench.json
+
+With ``--compare`` the run is checked against a previous result file using the
+per-benchmark tolerances in ``bench_thresholds.json``; the exit code is 1 when
+any benchmark regressed past its tolerance.
+
+History transcripts are memoised by ``scoring`` across requests, and every
+loop of a benchmark resends the same history. History benchmarks are therefore
+reported twice: cold (the memo cleared before every call, the cost of a
+history the process has not seen) and ``*_warm`` (the memo left in place, a
+client resending a history this process has already seen).
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import scoring
+
+THRESHOLDS_PATH = Path(__file__).with_name("bench_thresholds.json")
+
+WORD_COUNTS = [50, 200, 1000, 5000, 10000]
+QUICK_WORD_COUNTS = [50, 200, 1000]
+HISTORY_LENGTHS = [0, 50]
+
+MODE_QUESTIONS = {
+    "behavioral": "challenge-star",
+    "technical": "technical-caching",
+    "system_design": "system-design-url-shortener",
+}
+
+_FILLER_WORDS = ["the", "team", "service", "project", "we", "then", "our", "with", "it", "was", "a", "new", "for"]
+_MODE_TERMS = {
+    "behavioral": scoring.ACTION_VERBS + ["stakeholder", "deadline", "customer", "manager", "teammate"],
+    "technical": scoring.COMPLEXITY_TERMS + scoring.EDGE_TERMS + scoring.TRADEOFF_TERMS + ["algorithm", "test"],
+    "system_design": scoring.SCALING_TERMS + scoring.DATA_TERMS + scoring.API_TERMS + scoring.RELIABILITY_TERMS,
+}
+_MODE_CUES = {
+    "behavioral": scoring.SITUATION_CUES + scoring.TASK_CUES + scoring.ACTION_CUES + scoring.RESULT_CUES + scoring.REFLECTION_CUES,
+    "technical": scoring.REQUIREMENTS_TERMS + scoring.ACTION_CUES + scoring.RESULT_CUES,
+    "system_design": scoring.REQUIREMENTS_TERMS + scoring.ACTION_CUES + scoring.RESULT_CUES,
+}
+
+
+# ---------- Corpus ----------
+def synthetic_transcript(word_count: int, mode: str, seed: int = 0) -> str:
+    """Build a deterministic transcript of roughly ``word_count`` words for ``mode``."""
+    rng = random.Random(f"{mode}:{word_count}:{seed}")
+    terms = _MODE_TERMS[mode]
+    cues = _MODE_CUES[mode]
+    sentences: List[str] = []
+    produced = 0
+    while produced < word_count:
+        length = rng.randint(8, 22)
+        words: List[str] = []
+        if rng.random() < 0.5:
+            words.extend(rng.choice(cues).split())
+        while len(words) < length:
+            roll = rng.random()
+            if roll < 0.06:
+                words.extend(rng.choice(scoring.FILLERS).split())
+            elif roll < 0.1:
+                words.extend(rng.choice(scoring.HEDGES).split())
+            elif roll < 0.3:
+                words.extend(rng.choice(terms).split())
+            elif roll < 0.34:
+                words.append(f"{rng.randint(2, 95)}%")
+            elif roll < 0.37:
+                words.extend(rng.choice(scoring.VAGUE_PHRASES).split())
+            else:
+                words.append(rng.choice(_FILLER_WORDS))
+        words = words[: max(length, 1)]
+        words[0] = words[0].capitalize()
+        sentences.append(" ".join(words) + rng.choice([".", ".", ".", "?", "!"]))
+        produced += len(words)
+    return " ".join(sentences)
+
+
+def synthetic_history(length: int, mode: str, seed: int = 0) -> List[Dict[str, Any]]:
+    """History entries without explanations so every entry is re-derived from its transcript."""
+    rng = random.Random(f"history:{mode}:{length}:{seed}")
+    history: List[Dict[str, Any]] = []
+    for i in range(length):
+        history.append({
+            "scores": {"total": round(rng.uniform(20, 90), 1)},
+            "transcript": synthetic_transcript(rng.randint(120, 320), mode, seed=seed + i + 1),
+            "duration_seconds": rng.randint(60, 180),
+        })
+    return history
+
+
+@dataclass
+class BenchCase:
+    mode: str
+    words: int
+    history_len: int
+    question_id: str
+    question: str
+    transcript: str
+    history: List[Dict[str, Any]]
+    duration_seconds: int
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return f"{self.mode}-{self.words}w-h{self.history_len}"
+
+
+def build_cases(word_counts: List[int], history_lengths: List[int], seed: int = 0) -> List[BenchCase]:
+    cases: List[BenchCase] = []
+    for mode, qid in MODE_QUESTIONS.items():
+        question = scoring.QUESTION_BY_ID.get(qid, {}).get("prompt", qid)
+        for words in word_counts:
+            transcript = synthetic_transcript(words, mode, seed)
+            for history_len in history_lengths:
+                case = BenchCase(
+                    mode=mode,
+                    words=words,
+                    history_len=history_len,
+                    question_id=qid,
+                    question=question,
+                    transcript=transcript,
+                    history=synthetic_history(history_len, mode, seed),
+                    duration_seconds=max(30, int(words / 2.4)),
+                )
+                case.metrics = _question_metrics(transcript)
+                cases.append(case)
+    return cases
+
+
+def _question_metrics(transcript: str) -> Dict[str, Any]:
+    return {
+        "actions_density": scoring.action_verb_density(transcript)["density"],
+        "result_strength": scoring.result_strength(transcript)["score"],
+        "has_numbers": scoring.quantification(transcript)["has_numbers"],
+        "reflection": scoring.reflection_presence(transcript)["has_reflection"],
+        "star_coverage": scoring.star_segments(transcript)["coverage"],
+        "has_tradeoffs": scoring.keyword_signal(transcript, scoring.TRADEOFF_TERMS),
+        "has_requirements": scoring.keyword_signal(transcript, scoring.REQUIREMENTS_TERMS),
+        "has_reliability": scoring.keyword_signal(transcript, scoring.RELIABILITY_TERMS),
+        "has_edges": scoring.keyword_signal(transcript, scoring.EDGE_TERMS),
+        "has_complexity": scoring.keyword_signal(transcript, scoring.COMPLEXITY_TERMS),
+        "has_scaling": scoring.keyword_signal(transcript, scoring.SCALING_TERMS),
+        "has_data": scoring.keyword_signal(transcript, scoring.DATA_TERMS),
+        "has_api": scoring.keyword_signal(transcript, scoring.API_TERMS),
+    }
+
+
+# ---------- Benchmarks ----------
+# Detectors that only look at the transcript are timed on history-free cases;
+# history-dependent benchmarks only run where there is a history to process.
+TRANSCRIPT_DETECTORS: Dict[str, Callable[[BenchCase], Any]] = {
+    "tokenize_words": lambda c: scoring.tokenize_words(c.transcript),
+    # Shared by every index-aware detector below in score_answer; standalone they each build one.
+    "transcript_index": lambda c: scoring.TranscriptIndex(c.transcript).tokens,
+    "filler_stats": lambda c: scoring.filler_stats(c.transcript),
+    "hedge_stats": lambda c: scoring.hedge_stats(c.transcript),
+    "action_verb_density": lambda c: scoring.action_verb_density(c.transcript),
+    "ownership_ratio": lambda c: scoring.ownership_ratio(c.transcript),
+    "quantification": lambda c: scoring.quantification(c.transcript),
+    "sentence_stats": lambda c: scoring.sentence_stats(c.transcript),
+    "star_segments": lambda c: scoring.star_segments(c.transcript),
+    "result_strength": lambda c: scoring.result_strength(c.transcript),
+    "vagueness_penalty": lambda c: scoring.vagueness_penalty(c.transcript),
+    "reflection_presence": lambda c: scoring.reflection_presence(c.transcript),
+    "star_sequence_signal": lambda c: scoring.star_sequence_signal(c.transcript),
+    "analyze_question_alignment": lambda c: scoring.analyze_question_alignment(
+        c.question_id, c.question, c.transcript, c.metrics
+    ),
+}
+def cold(fn: Callable[[BenchCase], Any]) -> Callable[[BenchCase], Any]:
+    """``fn`` with the history-snapshot memo cleared first, so repeated loops don't just time cache hits."""
+    def run(case: BenchCase) -> Any:
+        scoring._transcript_snapshot_cached.cache_clear()
+        return fn(case)
+    return run
+
+
+def _score_answer(c: BenchCase) -> Any:
+    return scoring.score_answer(c.question, c.transcript, c.duration_seconds, c.history, question_id=c.question_id)
+
+
+HISTORY_DETECTORS: Dict[str, Callable[[BenchCase], Any]] = {
+    "build_history_snapshots": cold(lambda c: scoring.build_history_snapshots(c.history)),
+    "build_history_snapshots_warm": lambda c: scoring.build_history_snapshots(c.history),
+    "score_answer_warm": _score_answer,
+}
+END_TO_END: Dict[str, Callable[[BenchCase], Any]] = {
+    "score_answer": cold(_score_answer),
+}
+
+
+def time_call(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.02) -> Dict[str, Any]:
+    """Time ``fn`` like ``timeit``: calibrate a loop count, then keep per-call stats per repeat."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 16:
+            break
+        loops *= 2
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops)
+    return {
+        "loops": loops,
+        "repeat": repeat,
+        "min_us": round(min(samples) * 1e6, 2),
+        "median_us": round(statistics.median(samples) * 1e6, 2),
+    }
+
+
+def run_benchmarks(
+    cases: List[BenchCase],
+    only: Optional[List[str]] = None,
+    repeat: int = 5,
+    min_time: float = 0.02,
+) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    for case in cases:
+        suites = [END_TO_END]
+        if case.history_len:
+            suites.append(HISTORY_DETECTORS)
+        else:
+            suites.append(TRANSCRIPT_DETECTORS)
+        for suite in suites:
+            for name, fn in suite.items():
+                if only and name not in only:
+                    continue
+                timing = time_call(lambda: fn(case), repeat=repeat, min_time=min_time)
+                results.append({
+                    "id": f"{name}/{case.name}",
+                    "benchmark": name,
+                    "case": case.name,
+                    "mode": case.mode,
+                    "words": case.words,
+                    "history": case.history_len,
+                    **timing,
+                })
+    return results
+
+
+# ---------- Regression checks ----------
+def load_thresholds(path: Path = THRESHOLDS_PATH) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return {"default_tolerance": 0.25, "tolerances": {}}
+
+
+def compare_results(
+    current: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    thresholds: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    """Return one entry per benchmark whose median slowed down past its tolerance."""
+    default_tol = float(thresholds.get("default_tolerance", 0.25))
+    tolerances = thresholds.get("tolerances", {})
+    base_by_id = {r["id"]: r for r in baseline}
+    regressions: List[Dict[str, Any]] = []
+    for result in current:
+        base = base_by_id.get(result["id"])
+        if not base or not base.get("median_us"):
+            continue
+        tolerance = float(tolerances.get(result["benchmark"], default_tol))
+        ratio = result["median_us"] / base["median_us"]
+        if ratio > 1.0 + tolerance:
+            regressions.append({
+                "id": result["id"],
+                "baseline_us": base["median_us"],
+                "current_us": result["median_us"],
+                "ratio": round(ratio, 3),
+                "tolerance": tolerance,
+            })
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scoring engine on a synthetic corpus.")
+    parser.add_argument("--out", help="write results JSON to this path (default: stdout)")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--thresholds", default=str(THRESHOLDS_PATH), help="regression tolerance file")
+    parser.add_argument("--quick", action="store_true", help="only run the small transcript sizes")
+    parser.add_argument("--only", nargs="*", help="restrict to these benchmark names")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.02, help="minimum seconds per timed repeat")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    word_counts = QUICK_WORD_COUNTS if args.quick else WORD_COUNTS
+    cases = build_cases(word_counts, HISTORY_LENGTHS, seed=args.seed)
+    results = run_benchmarks(cases, only=args.only, repeat=args.repeat, min_time=args.min_time)
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "seed": args.seed,
+            "word_counts": word_counts,
+            "history_lengths": HISTORY_LENGTHS,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare_results(results, baseline.get("results", []), load_thresholds(Path(args.thresholds)))
+        report["regressions"] = regressions
+        if regressions:
+            exit_code = 1
+            for reg in regressions:
+                print(
+                    f"REGRESSION {reg['id']}: {reg['baseline_us']}us -> {reg['current_us']}us "
+                    f"(x{reg['ratio']}, tolerance {reg['tolerance']:.0%})",
+                    file=sys.stderr,
+                )
+
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(payload + "\n")
+    else:
+        print(payload)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
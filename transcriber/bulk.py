@@ -0,0 +1,344 @@
+"""Offline bulk transcription of archived recordings.
+
+Walks a directory (or reads a manifest) of media files and fans them out across
+a process pool; every worker process loads its own ``WhisperModel`` and
+``VideoAnalyzer`` once and runs the normal pipeline on each file it is handed:
+
+    python bulk.py /archive/recordings --output results.jsonl --processes 4
+    python bulk.py manifest.jsonl --output results.jsonl --question "Tell me about a time..."
+
+A manifest is a ``.jsonl`` file of ``{"path": ..., "id": ..., "question": ...,
+"question_id": ..., "duration_seconds": ..., "user_id": ...}`` objects (only
+``path`` is required) or a text file with one path per line. Relative paths
+are resolved against the manifest's directory.
+
+Each result is appended to the output JSONL as soon as it finishes, one line
+per item, so an interrupted run loses at most the items in flight. Rerunning
+with the same output skips every item already recorded as ``ok`` (failed items
+are retried unless ``--skip-failed``). Progress lines report items done,
+throughput in audio-seconds per wall-second and an ETA from the media duration
+still pending.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, Executor, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from media import MediaProbe, probe_media
+from responses import dumps
+from whisper_tuning import WHISPER_CPU_AFFINITY, WHISPER_CPU_THREADS, affinity_for, pin_cpus
+
+BULK_PROCESSES = int(os.environ.get("BULK_PROCESSES", "0"))
+# Seconds between progress lines.
+BULK_REPORT_SECONDS = float(os.environ.get("BULK_REPORT_SECONDS", "10"))
+BULK_PROFILE = os.environ.get("BULK_PROFILE", "standard")
+
+MEDIA_EXTENSIONS = (".webm", ".mp4", ".m4a", ".mov", ".mkv", ".wav", ".mp3", ".ogg", ".oga", ".flac", ".aac")
+
+OK = "ok"
+ERROR = "error"
+
+
+# ---------- Inputs ----------
+def discover(root: str, extensions: Iterable[str] = MEDIA_EXTENSIONS) -> List[str]:
+    """Media files under ``root``, recursively, in a stable order."""
+    extensions = tuple(ext.lower() for ext in extensions)
+    found: List[str] = []
+    for directory, dirs, files in os.walk(root):
+        dirs.sort()
+        found.extend(os.path.join(directory, name) for name in sorted(files) if name.lower().endswith(extensions))
+    return found
+
+
+def load_items(source: str, question: str = "", question_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Work items from a directory or a manifest; ``id`` defaults to the path as listed."""
+    defaults = {"question": question, "question_id": question_id, "duration_seconds": None}
+    if os.path.isdir(source):
+        return [
+            {**defaults, "id": os.path.relpath(path, source), "path": path}
+            for path in discover(source)
+        ]
+
+    base = os.path.dirname(os.path.abspath(source))
+    items: List[Dict[str, Any]] = []
+    with open(source) as fh:
+        for line in fh:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line) if line.startswith("{") else {"path": line}
+            item = {**defaults, **entry}
+            item.setdefault("id", entry["path"])
+            item["path"] = os.path.join(base, entry["path"])
+            items.append(item)
+    return items
+
+
+def completed_ids(output_path: str, retry_failed: bool = True) -> Set[str]:
+    """Ids already recorded in ``output_path``; a line cut off by a crash is ignored."""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == OK or not retry_failed:
+                done.add(record["id"])
+    return done
+
+
+# ---------- Worker processes ----------
+_pipeline = None
+
+
+def _init_worker(cpu_threads: int, cpu_slots=None) -> None:
+    global _pipeline
+    if cpu_slots is not None:
+        cpus = cpu_slots.get()
+        pin_cpus(cpus)
+        cpu_threads = cpu_threads or len(cpus)
+    from pipeline import TranscriptionPipeline
+    _pipeline = TranscriptionPipeline(cpu_threads=cpu_threads)
+
+
+def process_item(item: Dict[str, Any], probe: MediaProbe, profile: str = BULK_PROFILE) -> Dict[str, Any]:
+    """Run one item through this process's pipeline; always returns a record."""
+    started = time.perf_counter()
+    record = {"id": item["id"], "path": item["path"], "media_seconds": probe.duration_seconds, "worker": os.getpid()}
+    try:
+        duration = item.get("duration_seconds") or int(round(probe.duration_seconds or 0))
+        result = _pipeline.run(
+            item["path"],
+            duration,
+            item.get("question") or "",
+            question_id=item.get("question_id"),
+            profile=profile,
+            probe=probe,
+            user_id=item.get("user_id"),
+            attempt_id=item["id"],
+        )
+        record.update(status=OK, result=result)
+    except Exception as e:
+        record.update(status=ERROR, error=str(e))
+    record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def open_pool(processes: int) -> ProcessPoolExecutor:
+    # Spawn, not fork: CTranslate2 and MediaPipe start threads that don't survive a fork.
+    context = multiprocessing.get_context("spawn")
+    threads = WHISPER_CPU_THREADS or max(1, (os.cpu_count() or 1) // processes)
+    cpu_slots = None
+    if WHISPER_CPU_AFFINITY:
+        cpu_slots = context.Queue()
+        for slot in range(processes):
+            cpu_slots.put(affinity_for(slot, processes))
+        threads = WHISPER_CPU_THREADS
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(threads, cpu_slots),
+    )
+
+
+# ---------- Progress ----------
+class Throughput:
+    """Items and media seconds done against wall time, with an ETA for the rest."""
+
+    def __init__(self, total_items: int, total_media_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.total_items = total_items
+        self.total_media_seconds = total_media_seconds
+        self.clock = clock
+        self.started = clock()
+        self.done = 0
+        self.failed = 0
+        self.media_seconds = 0.0
+
+    def record(self, record: Dict[str, Any]) -> None:
+        self.done += 1
+        self.failed += record["status"] != OK
+        self.media_seconds += record.get("media_seconds") or 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = max(self.clock() - self.started, 1e-9)
+        x_realtime = self.media_seconds / elapsed
+        remaining = self.total_media_seconds - self.media_seconds
+        if x_realtime > 0:
+            eta = remaining / x_realtime
+        elif self.done:
+            # Nothing with a known duration has finished yet; fall back to item rate.
+            eta = (self.total_items - self.done) * elapsed / self.done
+        else:
+            eta = None
+        return {
+            "done": self.done,
+            "total": self.total_items,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 1),
+            "items_per_minute": round(self.done * 60 / elapsed, 2),
+            "x_realtime": round(x_realtime, 2),
+            "eta_seconds": round(max(eta, 0.0), 1) if eta is not None else None,
+        }
+
+    def line(self) -> str:
+        s = self.snapshot()
+        eta = _clock_format(s["eta_seconds"]) if s["eta_seconds"] is not None else "?"
+        return (
+            f"{s['done']}/{s['total']} done ({s['failed']} failed), {s['items_per_minute']} items/min, "
+            f"{s['x_realtime']}x realtime, elapsed {_clock_format(s['elapsed_seconds'])}, ETA {eta}"
+        )
+
+
+def _clock_format(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+# ---------- Driver ----------
+def run_bulk(
+    items: List[Dict[str, Any]],
+    output_path: str,
+    open_executor: Callable[[], Executor],
+    workers: int,
+    profile: str = BULK_PROFILE,
+    process: Callable[..., Dict[str, Any]] = process_item,
+    report: Callable[[str], None] = print,
+    report_seconds: float = BULK_REPORT_SECONDS,
+    retry_failed: bool = True,
+    in_flight: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Process every item not yet in ``output_path``, appending a record as each finishes.
+
+    Headers are probed up front (cheap, no decoding) so unreadable files are
+    recorded without occupying a worker and the ETA can be based on media time.
+    At most ``in_flight`` items are submitted at once, so a large corpus never
+    sits in the executor's queue.
+
+    ``open_executor`` is called again whenever a worker process dies: that breaks
+    the whole pool, so the items in flight are recorded as errors (a rerun
+    retries them) and the run continues on a fresh pool.
+    """
+    done_ids = completed_ids(output_path, retry_failed)
+    pending = [item for item in items if item["id"] not in done_ids]
+    report(f"{len(items)} items, {len(items) - len(pending)} already done, {len(pending)} to process")
+
+    probes: Dict[str, MediaProbe] = {}
+    failures: List[Dict[str, Any]] = []
+    for item in pending:
+        try:
+            probes[item["id"]] = probe_media(item["path"])
+        except (OSError, ValueError) as e:
+            failures.append({"id": item["id"], "path": item["path"], "status": ERROR, "error": str(e)})
+    runnable = [item for item in pending if item["id"] in probes]
+    if failures:
+        report(f"{len(failures)} unreadable, recorded as errors")
+    meter = Throughput(len(runnable), sum(probes[item["id"]].duration_seconds or 0.0 for item in runnable))
+    limit = in_flight or max(1, 2 * workers)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "ab+") as out:
+        # After a crash the last line may be cut off; start on a fresh one.
+        if out.tell():
+            out.seek(-1, os.SEEK_END)
+            if out.read(1) != b"\n":
+                out.write(b"\n")
+
+        def write(record: Dict[str, Any]) -> None:
+            out.write(dumps(record) + b"\n")
+            out.flush()
+            os.fsync(out.fileno())
+
+        for record in failures:
+            write(record)
+
+        def collect(future: Future, item: Dict[str, Any]) -> bool:
+            """Write the item's record; True if the pool broke under it."""
+            try:
+                record = future.result()
+                broken = False
+            except BrokenExecutor as e:
+                record = {"id": item["id"], "path": item["path"], "status": ERROR, "error": f"worker process died: {e}"}
+                broken = True
+            except Exception as e:
+                record = {"id": item["id"], "path": item["path"], "status": ERROR, "error": repr(e)}
+                broken = False
+            write(record)
+            meter.record(record)
+            return broken
+
+        queue = iter(runnable)
+        futures: Dict[Any, Dict[str, Any]] = {}
+        # An item whose submit found the pool already broken; it goes first on the next pool.
+        held: Optional[Dict[str, Any]] = None
+        last_report = time.monotonic()
+        executor = open_executor()
+        try:
+            while True:
+                broken = False
+                while len(futures) < limit and not broken:
+                    item, held = held or next(queue, None), None
+                    if item is None:
+                        break
+                    try:
+                        futures[executor.submit(process, item, probes[item["id"]], profile)] = item
+                    except BrokenExecutor:
+                        held, broken = item, True
+                if not futures and not broken:
+                    break
+                finished, _ = wait(futures, timeout=report_seconds, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    broken = collect(future, futures.pop(future)) or broken
+                if broken:
+                    # A broken pool fails every pending future at once; record them all.
+                    for future in wait(futures)[0]:
+                        collect(future, futures.pop(future))
+                    executor.shutdown()
+                    report("A worker process died; its items in flight are recorded as errors. Restarting the pool.")
+                    executor = open_executor()
+                if time.monotonic() - last_report >= report_seconds:
+                    report(meter.line())
+                    last_report = time.monotonic()
+        finally:
+            executor.shutdown()
+
+    report(meter.line())
+    return {**meter.snapshot(), "unreadable": len(failures)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Transcribe and analyze a directory or manifest of recordings.")
+    parser.add_argument("source", help="directory to walk, or a .jsonl/.txt manifest")
+    parser.add_argument("--output", required=True, help="results JSONL; existing ok items are skipped")
+    parser.add_argument("--processes", type=int, default=BULK_PROCESSES, help="worker processes (default: one per CPU)")
+    parser.add_argument("--question", default="", help="question for items that don't name one")
+    parser.add_argument("--question-id", default=None)
+    parser.add_argument("--profile", default=BULK_PROFILE, choices=("full", "standard", "minimal"))
+    parser.add_argument("--skip-failed", action="store_true", help="don't retry items recorded as errors")
+    parser.add_argument("--report-seconds", type=float, default=BULK_REPORT_SECONDS)
+    args = parser.parse_args(argv)
+
+    items = load_items(args.source, args.question, args.question_id)
+    processes = args.processes or os.cpu_count() or 1
+    stats = run_bulk(
+        items,
+        args.output,
+        lambda: open_pool(processes),
+        processes,
+        profile=args.profile,
+        report_seconds=args.report_seconds,
+        retry_failed=not args.skip_failed,
+    )
+    return 1 if stats["failed"] or stats["unreadable"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+SCORING_CONFIG_POLL_SECONDS = float(os.environ.get("SCORING_CONFIG_POLL_SECONDS", "5"))
+
+KNOWN_MODES = ("behavioral", "technical", "system_design")
+SEVERITIES = ("low", "medium", "high")
+
+
+def freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Plain, JSON-serializable copy of a frozen value."""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+@dataclass(frozen=True)
+class ScoringSnapshot:
+    """One validated, immutable generation of the scoring config and question bank.
+
+    A request grabs the current snapshot once and uses it throughout, so a reload
+    never changes the rules half-way through scoring an answer.
+    """
+
+    version: str
+    generation: int
+    loaded_at: float
+    config: Mapping[str, Any]
+    weights: Mapping[str, float]
+    mode_weights: Mapping[str, Mapping[str, float]]
+    thresholds: Mapping[str, Any]
+    issue_defs: Mapping[str, Mapping[str, str]]
+    # question_bank.QuestionBankSnapshot: question_bank.json as staged for this
+    # generation, over the store's live-inserted rows.
+    question_bank: Any
+    # Precompiled: weight per label for each mode ("" is the mode-less default).
+    effective_weights: Mapping[str, Mapping[str, float]]
+    # Built from question_bank.json by the registry's ``relevance_builder``
+    # (relevance.RelevanceIndex); None when there is no builder.
+    relevance: Any = None
+
+    def weight(self, label: str, mode: Optional[str] = None) -> float:
+        table = self.effective_weights.get(mode or "") or self.effective_weights[""]
+        return table.get(label, 0.0)
+
+
+def _number_map(name: str, value: Any) -> Dict[str, float]:
+    if not isinstance(value, dict):
+        raise ValueError(f"{name} must be an object")
+    out: Dict[str, float] = {}
+    for key, raw in value.items():
+        if isinstance(raw, bool) or not isinstance(raw, (int, float)):
+            raise ValueError(f"{name}.{key} must be a number")
+        if raw < 0:
+            raise ValueError(f"{name}.{key} must not be negative")
+        out[key] = float(raw)
+    return out
+
+
+def validate_config(config: Any, default_config: Dict[str, Any]) -> Dict[str, Any]:
+    if not isinstance(config, dict):
+        raise ValueError("scoring config must be a JSON object")
+    weights = _number_map("weights", config.get("weights", default_config["weights"]))
+    if sum(weights.values()) <= 0:
+        raise ValueError("weights must not all be zero")
+    mode_weights = config.get("mode_weights", {})
+    if not isinstance(mode_weights, dict):
+        raise ValueError("mode_weights must be an object")
+    for mode, table in mode_weights.items():
+        if mode not in KNOWN_MODES:
+            raise ValueError(f"mode_weights has unknown mode {mode!r}")
+        _number_map(f"mode_weights.{mode}", table)
+    _number_map("thresholds", config.get("thresholds", default_config["thresholds"]))
+    issues = config.get("issues", {})
+    if not isinstance(issues, dict):
+        raise ValueError("issues must be an object")
+    for key, meta in issues.items():
+        if not isinstance(meta, dict):
+            raise ValueError(f"issues.{key} must be an object")
+        for field in ("type", "severity", "message"):
+            if field in meta and not isinstance(meta[field], str):
+                raise ValueError(f"issues.{key}.{field} must be a string")
+        if meta.get("severity", "medium") not in SEVERITIES:
+            raise ValueError(f"issues.{key}.severity must be one of {', '.join(SEVERITIES)}")
+    return config
+
+
+class ConfigRegistry:
+    """Loads ``scoring_config.json`` and ``question_bank.json`` into ``ScoringSnapshot``s.
+
+    ``reload()`` (called by the optional watcher thread whenever either file
+    changes) validates and precompiles a new snapshot and swaps it in atomically;
+    an invalid edit is rejected and the previous snapshot stays live. The
+    question bank store is synced with the file only as the new snapshot goes
+    live, after everything that can fail has been built.
+    """
+
+    def __init__(
+        self,
+        config_path: Path,
+        question_bank_path: Path,
+        default_config: Dict[str, Any],
+        question_bank: Any,
+        poll_seconds: float = SCORING_CONFIG_POLL_SECONDS,
+        relevance_builder: Optional[Callable[[List[Dict[str, Any]]], Any]] = None,
+    ):
+        self.config_path = Path(config_path)
+        self.question_bank_path = Path(question_bank_path)
+        self.default_config = default_config
+        self.question_bank = question_bank
+        self.poll_seconds = poll_seconds
+        self.relevance_builder = relevance_builder
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stamp: Tuple[Any, Any] = (None, None)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot = self._build(*self._read(), generation=1)
+        self._snapshot.question_bank.sync()
+        self._stamp = self._file_stamp()
+
+    def current(self) -> ScoringSnapshot:
+        return self._snapshot
+
+    def _file_stamp(self) -> Tuple[Any, Any]:
+        def stamp(path: Path) -> Any:
+            try:
+                st = path.stat()
+                return (st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                return None
+        return stamp(self.config_path), stamp(self.question_bank_path)
+
+    def _read(self) -> Tuple[bytes, bytes]:
+        try:
+            config_bytes = self.config_path.read_bytes()
+        except FileNotFoundError:
+            config_bytes = b""
+        try:
+            bank_bytes = self.question_bank_path.read_bytes()
+        except FileNotFoundError:
+            bank_bytes = b""
+        return config_bytes, bank_bytes
+
+    def _build(self, config_bytes: bytes, bank_bytes: bytes, generation: int) -> ScoringSnapshot:
+        config = json.loads(config_bytes) if config_bytes else self.default_config
+        config = validate_config(config, self.default_config)
+        # The bank is only staged here; reload() syncs the store once the snapshot is built.
+        library = json.loads(bank_bytes) if bank_bytes else []
+        bank = self.question_bank.snapshot(library, hashlib.sha256(bank_bytes).hexdigest())
+        relevance = self.relevance_builder(library) if self.relevance_builder else None
+
+        weights = config.get("weights", self.default_config["weights"])
+        mode_weights = config.get("mode_weights", {})
+        effective = {"": {k: float(v) for k, v in weights.items()}}
+        for mode, table in mode_weights.items():
+            labels = set(weights) | set(table)
+            effective[mode] = {label: float(table.get(label, weights.get(label, 0))) for label in labels}
+
+        digest = hashlib.sha256(config_bytes + b"\0" + bank_bytes).hexdigest()[:12]
+        return ScoringSnapshot(
+            version=digest,
+            generation=generation,
+            loaded_at=time.time(),
+            config=freeze(config),
+            weights=freeze(weights),
+            mode_weights=freeze(mode_weights),
+            thresholds=freeze(config.get("thresholds", self.default_config["thresholds"])),
+            issue_defs=freeze(config.get("issues", {})),
+            question_bank=bank,
+            effective_weights=freeze(effective),
+            relevance=relevance,
+        )
+
+    def reload(self, force: bool = False) -> bool:
+        """Swap in a new snapshot if the files changed. Returns True when a new snapshot went live."""
+        with self._lock:
+            stamp = self._file_stamp()
+            if not force and stamp == self._stamp:
+                return False
+            config_bytes, bank_bytes = self._read()
+            self._stamp = stamp
+            try:
+                snapshot = self._build(config_bytes, bank_bytes, generation=self._snapshot.generation + 1)
+            except ValueError as e:
+                # json.JSONDecodeError is a ValueError too.
+                self.last_error = str(e)
+                print(f"Scoring config reload rejected, keeping version {self._snapshot.version}: {e}")
+                return False
+            self.last_error = None
+            if snapshot.version == self._snapshot.version:
+                return False
+            snapshot.question_bank.sync()
+            self._snapshot = snapshot
+            print(f"Scoring config version {snapshot.version} is live (generation {snapshot.generation}).")
+            return True
+
+    def start_watching(self) -> None:
+        if self.poll_seconds <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="scoring-config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Scoring config watcher error: {e}")
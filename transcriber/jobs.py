@@ -0,0 +1,569 @@
+import fcntl
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing, contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+JOBS_DIR = os.environ.get("JOBS_DIR", os.path.join(tempfile.gettempdir(), "interview-transcriber-jobs"))
+JOBS_DB_PATH = os.environ.get("JOBS_DB_PATH", os.path.join(JOBS_DIR, "jobs.sqlite3"))
+JOBS_QUEUE_URL = os.environ.get("JOBS_QUEUE_URL", f"sqlite:///{JOBS_DB_PATH}")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "0.5"))
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+TRANSCRIBE = "transcribe"
+SCORE = "score"
+
+
+class JobQueue(ABC):
+    """Shared work queue with leases.
+
+    A claimed job belongs to one worker until its lease expires. Workers extend
+    the lease with ``heartbeat``; a job whose lease runs out (the worker died) is
+    handed to the next claimer until ``max_attempts`` is reached. ``complete`` and
+    ``fail`` only take effect while the caller still holds the lease, so a result
+    is committed at most once even if a slow worker finishes after losing it.
+    """
+
+    @abstractmethod
+    def enqueue(self, kind: str, params: Dict[str, Any], media_path: Optional[str] = None) -> str:
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def claim(
+        self,
+        worker_id: str,
+        kinds: Optional[Iterable[str]] = None,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+    ) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, lease_token: str, lease_seconds: float = JOB_LEASE_SECONDS) -> bool:
+        ...
+
+    @abstractmethod
+    def update_progress(self, job_id: str, lease_token: str, stage: str, fraction: float) -> bool:
+        ...
+
+    @abstractmethod
+    def complete(self, job_id: str, lease_token: str, result: Dict[str, Any]) -> bool:
+        ...
+
+    @abstractmethod
+    def fail(self, job_id: str, lease_token: str, error: str) -> bool:
+        ...
+
+    @abstractmethod
+    def reclaim_expired(self) -> int:
+        """Requeue (or fail, once out of attempts) running jobs whose lease has expired."""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL DEFAULT 'transcribe',
+    status TEXT NOT NULL,
+    media_path TEXT,
+    params TEXT NOT NULL,
+    progress TEXT NOT NULL DEFAULT '{}',
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    worker_id TEXT,
+    lease_token TEXT,
+    lease_expires_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+# Columns added after the first release of the table.
+_MIGRATIONS = {
+    "kind": "ALTER TABLE jobs ADD COLUMN kind TEXT NOT NULL DEFAULT 'transcribe'",
+    "max_attempts": "ALTER TABLE jobs ADD COLUMN max_attempts INTEGER NOT NULL DEFAULT 3",
+    "worker_id": "ALTER TABLE jobs ADD COLUMN worker_id TEXT",
+    "lease_token": "ALTER TABLE jobs ADD COLUMN lease_token TEXT",
+    "lease_expires_at": "ALTER TABLE jobs ADD COLUMN lease_expires_at REAL",
+}
+
+
+class SQLiteJobQueue(JobQueue):
+    """SQLite-backed queue. Every call opens its own connection, so it is safe to
+    share between threads and between processes on the same machine."""
+
+    def __init__(self, db_path: str = JOBS_DB_PATH, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, ddl in _MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(ddl)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def enqueue(self, kind: str, params: Dict[str, Any], media_path: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, media_path, params, max_attempts, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, media_path, json.dumps(params), self.max_attempts, now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def claim(
+        self,
+        worker_id: str,
+        kinds: Optional[Iterable[str]] = None,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+    ) -> Optional[Dict[str, Any]]:
+        self.reclaim_expired()
+        kinds = list(kinds or [])
+        query = "SELECT * FROM jobs WHERE status = ?"
+        args: List[Any] = [QUEUED]
+        if kinds:
+            query += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            args.extend(kinds)
+        query += " ORDER BY created_at LIMIT 1"
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(query, args).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, worker_id = ?, lease_token = ?, "
+                "lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                (RUNNING, worker_id, token, now + lease_seconds, now, row["id"]),
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        return _row_to_job(row)
+
+    def heartbeat(self, job_id: str, lease_token: str, lease_seconds: float = JOB_LEASE_SECONDS) -> bool:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_token = ?",
+                (now + lease_seconds, now, job_id, RUNNING, lease_token),
+            )
+            return cur.rowcount == 1
+
+    def update_progress(self, job_id: str, lease_token: str, stage: str, fraction: float) -> bool:
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET progress = json_set(progress, '$.' || ?, ?), updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_token = ?",
+                (stage, round(fraction, 3), time.time(), job_id, RUNNING, lease_token),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, job_id: str, lease_token: str, result: Dict[str, Any]) -> bool:
+        return self._finish(job_id, lease_token, SUCCEEDED, result=json.dumps(result))
+
+    def fail(self, job_id: str, lease_token: str, error: str) -> bool:
+        return self._finish(job_id, lease_token, FAILED, error=error)
+
+    def _finish(
+        self,
+        job_id: str,
+        lease_token: str,
+        status: str,
+        result: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_token = NULL, lease_expires_at = NULL, "
+                "updated_at = ? WHERE id = ? AND status = ? AND lease_token = ?",
+                (status, result, error, time.time(), job_id, RUNNING, lease_token),
+            )
+            return cur.rowcount == 1
+
+    def reclaim_expired(self) -> int:
+        now = time.time()
+        with self._transaction() as conn:
+            expired = conn.execute(
+                "SELECT id, attempts, max_attempts, media_path FROM jobs WHERE status = ? AND lease_expires_at < ?",
+                (RUNNING, now),
+            ).fetchall()
+            for row in expired:
+                if row["attempts"] >= row["max_attempts"]:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, lease_token = NULL, lease_expires_at = NULL, "
+                        "updated_at = ? WHERE id = ?",
+                        (FAILED, "Worker lease expired too many times", now, row["id"]),
+                    )
+                    _remove_media(row["media_path"])
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, worker_id = NULL, lease_token = NULL, lease_expires_at = NULL, "
+                        "updated_at = ? WHERE id = ?",
+                        (QUEUED, now, row["id"]),
+                    )
+        return len(expired)
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "kind": row["kind"],
+        "status": row["status"],
+        "media_path": row["media_path"],
+        "params": json.loads(row["params"]),
+        "progress": json.loads(row["progress"] or "{}"),
+        "result": json.loads(row["result"]) if row["result"] else None,
+        "error": row["error"],
+        "attempts": row["attempts"],
+        "max_attempts": row["max_attempts"],
+        "worker_id": row["worker_id"],
+        "lease_token": row["lease_token"],
+        "lease_expires_at": row["lease_expires_at"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+class FileJobQueue(JobQueue):
+    """Queue kept as one JSON file per job in a directory.
+
+    Mutations are serialized with an ``flock`` on ``queue.lock``, and files are
+    replaced atomically, so several worker processes on one machine can share it.
+    Queued jobs also get an empty marker in ``pending/`` whose name sorts by
+    enqueue time, so a claim does not need to read every job file.
+    """
+
+    def __init__(self, root: str, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.root = root
+        self.max_attempts = max_attempts
+        self.jobs_dir = os.path.join(root, "jobs")
+        self.pending_dir = os.path.join(root, "pending")
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        os.makedirs(self.pending_dir, exist_ok=True)
+        self.lock_path = os.path.join(root, "queue.lock")
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self.lock_path, "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._job_path(job_id)) as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, job: Dict[str, Any]) -> None:
+        job["updated_at"] = time.time()
+        fd, tmp_path = tempfile.mkstemp(dir=self.jobs_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(job, fh)
+        os.replace(tmp_path, self._job_path(job["id"]))
+
+    def _pending_marker(self, job: Dict[str, Any]) -> str:
+        return os.path.join(self.pending_dir, f"{int(job['created_at'] * 1e6):020d}-{job['kind']}-{job['id']}")
+
+    def _leased(self, job_id: str, lease_token: str) -> Optional[Dict[str, Any]]:
+        job = self._read(job_id)
+        if not job or job["status"] != RUNNING or job["lease_token"] != lease_token:
+            return None
+        return job
+
+    def enqueue(self, kind: str, params: Dict[str, Any], media_path: Optional[str] = None) -> str:
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": QUEUED,
+            "media_path": media_path,
+            "params": params,
+            "progress": {},
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "worker_id": None,
+            "lease_token": None,
+            "lease_expires_at": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        with self._locked():
+            self._write(job)
+            open(self._pending_marker(job), "w").close()
+        return job["id"]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._read(job_id)
+
+    def claim(
+        self,
+        worker_id: str,
+        kinds: Optional[Iterable[str]] = None,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+    ) -> Optional[Dict[str, Any]]:
+        self.reclaim_expired()
+        kinds = set(kinds or [])
+        with self._locked():
+            for marker in sorted(os.listdir(self.pending_dir)):
+                _, kind, job_id = marker.split("-", 2)
+                if kinds and kind not in kinds:
+                    continue
+                os.remove(os.path.join(self.pending_dir, marker))
+                job = self._read(job_id)
+                if not job or job["status"] != QUEUED:
+                    continue
+                job.update(
+                    status=RUNNING,
+                    attempts=job["attempts"] + 1,
+                    worker_id=worker_id,
+                    lease_token=uuid.uuid4().hex,
+                    lease_expires_at=time.time() + lease_seconds,
+                )
+                self._write(job)
+                return job
+        return None
+
+    def heartbeat(self, job_id: str, lease_token: str, lease_seconds: float = JOB_LEASE_SECONDS) -> bool:
+        with self._locked():
+            job = self._leased(job_id, lease_token)
+            if not job:
+                return False
+            job["lease_expires_at"] = time.time() + lease_seconds
+            self._write(job)
+            return True
+
+    def update_progress(self, job_id: str, lease_token: str, stage: str, fraction: float) -> bool:
+        with self._locked():
+            job = self._leased(job_id, lease_token)
+            if not job:
+                return False
+            job["progress"][stage] = round(fraction, 3)
+            self._write(job)
+            return True
+
+    def complete(self, job_id: str, lease_token: str, result: Dict[str, Any]) -> bool:
+        return self._finish(job_id, lease_token, SUCCEEDED, result=result)
+
+    def fail(self, job_id: str, lease_token: str, error: str) -> bool:
+        return self._finish(job_id, lease_token, FAILED, error=error)
+
+    def _finish(
+        self,
+        job_id: str,
+        lease_token: str,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        with self._locked():
+            job = self._leased(job_id, lease_token)
+            if not job:
+                return False
+            job.update(status=status, result=result, error=error, lease_token=None, lease_expires_at=None)
+            self._write(job)
+            return True
+
+    def reclaim_expired(self) -> int:
+        now = time.time()
+        reclaimed = 0
+        with self._locked():
+            for name in os.listdir(self.jobs_dir):
+                if not name.endswith(".json"):
+                    continue
+                job = self._read(name[:-len(".json")])
+                if not job or job["status"] != RUNNING or (job["lease_expires_at"] or 0) >= now:
+                    continue
+                reclaimed += 1
+                job.update(worker_id=None, lease_token=None, lease_expires_at=None)
+                if job["attempts"] >= job["max_attempts"]:
+                    job.update(status=FAILED, error="Worker lease expired too many times")
+                    self._write(job)
+                    _remove_media(job["media_path"])
+                else:
+                    job["status"] = QUEUED
+                    self._write(job)
+                    open(self._pending_marker(job), "w").close()
+        return reclaimed
+
+
+def open_queue(url: str = JOBS_QUEUE_URL) -> JobQueue:
+    """Open a queue from ``sqlite:///path/to/jobs.sqlite3`` or ``file:///path/to/dir``."""
+    if url.startswith("sqlite://"):
+        return SQLiteJobQueue(url[len("sqlite://"):])
+    if url.startswith("file://"):
+        return FileJobQueue(url[len("file://"):])
+    raise ValueError(f"Unsupported job queue URL: {url}")
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """The job as returned by ``GET /jobs/{id}``; internal paths, params and lease tokens are left out."""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "media": (job["params"] or {}).get("probe"),
+        "cost": (job["params"] or {}).get("cost"),
+        "attempts": job["attempts"],
+        "worker_id": job["worker_id"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+
+def _remove_media(media_path: Optional[str]) -> None:
+    try:
+        if media_path and os.path.exists(media_path):
+            os.remove(media_path)
+    except OSError:
+        pass
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+# Called as handler(job, progress) and returns the job's result payload.
+JobHandler = Callable[[Dict[str, Any], Callable[[str, float], None]], Dict[str, Any]]
+
+
+class JobWorker:
+    """Threads that claim jobs from a ``JobQueue`` and run them with ``handlers[job["kind"]]``.
+
+    While a handler runs, a heartbeat keeps the lease alive. If the lease is lost
+    anyway, the handler's result is dropped rather than committed twice.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, JobHandler],
+        worker_id: Optional[str] = None,
+        concurrency: int = JOB_WORKERS,
+        poll_seconds: float = JOB_POLL_SECONDS,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = max(1, concurrency)
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        self._stop.clear()
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wait(self) -> None:
+        for thread in self._threads:
+            while thread.is_alive():
+                thread.join(0.5)
+
+    def run_once(self) -> bool:
+        """Process a single queued job. Returns False when there was nothing to claim."""
+        job = self.queue.claim(self.worker_id, kinds=self.handlers.keys(), lease_seconds=self.lease_seconds)
+        if not job:
+            return False
+        job_id, token = job["id"], job["lease_token"]
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, token, done), daemon=True)
+        heartbeat.start()
+        try:
+            result = self.handlers[job["kind"]](
+                job, lambda stage, fraction: self.queue.update_progress(job_id, token, stage, fraction)
+            )
+            committed = self.queue.complete(job_id, token, result)
+        except Exception as e:
+            traceback.print_exc()
+            committed = self.queue.fail(job_id, token, str(e))
+        finally:
+            done.set()
+            heartbeat.join()
+        if committed:
+            _remove_media(job["media_path"])
+        else:
+            print(f"Lease on job {job_id} was lost; result discarded.")
+        return True
+
+    def _heartbeat(self, job_id: str, token: str, done: threading.Event) -> None:
+        interval = max(0.05, self.lease_seconds / 3)
+        while not done.wait(interval):
+            if not self.queue.heartbeat(job_id, token, self.lease_seconds):
+                return
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if not self.run_once():
+                    self._stop.wait(self.poll_seconds)
+            except Exception:
+                traceback.print_exc()
+                self._stop.wait(self.poll_seconds)
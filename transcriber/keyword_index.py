@@ -0,0 +1,200 @@
+"""Token index for keyword and phrase matching over a transcript.
+
+Matching works on word tokens, not substrings: "cost" no longer hits
+"costume" and "scale" no longer hits "escalate". Tokens are kept in two forms:
+
+* surface: the lower-cased word, for exact term lists (fillers, hedges) where
+  "liked" must not count as the filler "like";
+* stem: a light suffix-stripping stem plus a lemma table for irregular forms,
+  for rubric keywords, so "scaled", "scaling" and "scales" all hit "scale" and
+  "partitioning" hits "partition". Auxiliary verbs keep their tense, so the
+  cue "we were" does not match "we are".
+
+Each transcript is tokenized once into per-form posting lists (token ->
+positions), so checking a keyword is a dict lookup and a phrase is a lookup
+plus a check of the following tokens. Phrases only match across whitespace or
+a hyphen ("trade-off" == "trade off"), never across punctuation, so "so. I"
+is not the cue "so i".
+"""
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+TOKEN_RE = re.compile(r"\w+(?:['’]\w+)*")
+_SPLIT_RE = re.compile(f"({TOKEN_RE.pattern})")
+# Text allowed between two words of a phrase.
+_JOIN_RE = re.compile(r"[\s-]*")
+
+# Bumped whenever ``stem`` changes, so caches of stemmed terms are rebuilt.
+STEM_VERSION = 2
+
+# Irregular forms a suffix stripper can't reach, mapped to their base word.
+# Auxiliaries (be, have, do) are deliberately left out: STAR cues such as "we
+# were" and "i had to" depend on their tense.
+LEMMAS = {
+    "built": "build", "led": "lead", "drove": "drive", "driven": "drive", "ran": "run",
+    "wrote": "write", "written": "write", "taught": "teach", "thought": "think",
+    "learnt": "learn", "made": "make", "went": "go", "gone": "go",
+    "took": "take", "taken": "take", "chose": "choose", "chosen": "choose", "found": "find",
+    "brought": "bring", "began": "begin", "begun": "begin", "grew": "grow", "grown": "grow",
+    "knew": "know", "known": "know", "met": "meet", "kept": "keep",
+    "sent": "send", "spent": "spend", "shot": "shoot", "saw": "see", "seen": "see",
+    "caught": "catch", "sought": "seek", "broke": "break", "broken": "break",
+    "indices": "index", "matrices": "matrix", "analyses": "analysis", "criteria": "criterion",
+    # -ee verbs: "-eed" is otherwise part of the root (need, proceed, exceed).
+    "agreed": "agree", "disagreed": "disagree", "freed": "free", "guaranteed": "guarantee",
+}
+
+# Words ending in "s" that are not plurals.
+NOT_PLURAL = {
+    "news", "series", "species", "always", "perhaps", "lens", "bias", "alias", "canvas", "atlas",
+    "chaos", "does", "various", "across",
+}
+
+_VOWEL = re.compile(r"[aeiouy]")
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Lower-case stem shared by a word's inflections (plural, -ed, -ing)."""
+    word = word.lower()
+    base = LEMMAS.get(word)
+    if base is not None:
+        word = base
+    if len(word) <= 3 or word in NOT_PLURAL:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ing", "ed"):
+        root = word[: -len(suffix)]
+        if not word.endswith(suffix) or not _VOWEL.search(root):
+            continue
+        if suffix == "ed" and root.endswith("e"):
+            break  # need, speed, proceed: "-eed" is part of the root
+        if len(root) >= 3:
+            word = root
+            if word[-1] == word[-2] and word[-1] not in "aeiouylsz":
+                word = word[:-1]  # planned -> plan
+        elif len(root) == 2 and root[-1] not in "aeiouy":
+            word = root + "e"  # used, using -> use
+        elif len(root) == 2 and suffix == "ing":
+            word = root  # doing -> do
+        break
+    if word.endswith("y") and len(word) > 3:
+        word = word[:-1] + "i"
+    # Base forms of three letters ("use") keep their "e", so inflections must too.
+    if word.endswith("e") and not word.endswith("ee") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+@lru_cache(maxsize=8192)
+def phrase_key(phrase: str, stemmed: bool = True) -> Tuple[str, ...]:
+    """Token sequence a keyword or phrase is matched as."""
+    words = TOKEN_RE.findall(phrase.lower())
+    return tuple(stem(w) for w in words) if stemmed else tuple(words)
+
+
+class TokenIndex:
+    """Word tokens of a lower-cased text with posting lists per surface form and stem.
+
+    Built with one regex split (words interleaved with the text between them);
+    character offsets and the stem postings are only computed when first needed.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        parts = _SPLIT_RE.split(text)
+        self.words: List[str] = parts[1::2]
+        # gaps[i]: the text between word i and word i + 1.
+        self._gaps = parts[2:-1:2]
+        self._lead = len(parts[0])
+        self._surface: Dict[str, List[int]] = {}
+        for i, word in enumerate(self.words):
+            postings = self._surface.get(word)
+            if postings is None:
+                self._surface[word] = [i]
+            else:
+                postings.append(i)
+        self._stem_of: Optional[Dict[str, str]] = None
+        self._stemmed: Optional[Dict[str, List[int]]] = None
+        self._starts: Optional[List[int]] = None
+        self._found: Dict[Tuple[str, bool], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def _stem_postings(self) -> Dict[str, List[int]]:
+        if self._stemmed is None:
+            self._stem_of = {word: stem(word) for word in self._surface}
+            merged: Dict[str, List[int]] = {}
+            for word, postings in self._surface.items():
+                merged.setdefault(self._stem_of[word], []).extend(postings)
+            for postings in merged.values():
+                postings.sort()
+            self._stemmed = merged
+        return self._stemmed
+
+    def stem_counts(self) -> Dict[str, int]:
+        """Occurrences of each stem (term frequencies for relevance scoring)."""
+        return {term: len(postings) for term, postings in self._stem_postings().items()}
+
+    def _joined(self, i: int) -> bool:
+        """Whether word i and word i + 1 can belong to one phrase."""
+        gap = self._gaps[i]
+        return gap == " " or _JOIN_RE.fullmatch(gap) is not None
+
+    def positions(self, phrase: str, stemmed: bool = True) -> List[int]:
+        """Token index where each occurrence of ``phrase`` starts."""
+        cache_key = (phrase, stemmed)
+        found = self._found.get(cache_key)
+        if found is not None:
+            return found
+        key = phrase_key(phrase, stemmed)
+        found = []
+        if key:
+            postings = self._stem_postings() if stemmed else self._surface
+            candidates = postings.get(key[0], [])
+            n = len(key)
+            if n == 1:
+                found = candidates
+            else:
+                words, stem_of, last = self.words, self._stem_of, len(self.words) - n
+                for i in candidates:
+                    if i > last:
+                        break
+                    for k in range(1, n):
+                        word = words[i + k]
+                        if (stem_of[word] if stemmed else word) != key[k] or not self._joined(i + k - 1):
+                            break
+                    else:
+                        found.append(i)
+        self._found[cache_key] = found
+        return found
+
+    def count(self, phrase: str, stemmed: bool = False) -> int:
+        return len(self.positions(phrase, stemmed))
+
+    def contains(self, phrase: str, stemmed: bool = True) -> bool:
+        return bool(self.positions(phrase, stemmed))
+
+    def contains_any(self, phrases: List[str], stemmed: bool = True) -> bool:
+        return any(self.positions(p, stemmed) for p in phrases)
+
+    @property
+    def starts(self) -> List[int]:
+        """Character offset of each word."""
+        if self._starts is None:
+            starts, offset = [], self._lead
+            for word, gap in zip(self.words, self._gaps + [""]):
+                starts.append(offset)
+                offset += len(word) + len(gap)
+            self._starts = starts
+        return self._starts
+
+    def span(self, position: int, phrase: str, stemmed: bool = True) -> Tuple[int, int]:
+        """Character offsets of the occurrence of ``phrase`` starting at token ``position``."""
+        last = position + len(phrase_key(phrase, stemmed)) - 1
+        return self.starts[position], self.starts[last] + len(self.words[last])
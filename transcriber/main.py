@@ -1,13 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from faster_whisper import WhisperModel
-import tempfile, shutil, os, json
+from fastapi.responses import JSONResponse, StreamingResponse
+import tempfile, shutil, os
 
-from scoring import score_answer
-from video_analysis import VideoAnalyzer
+from admission import ASYNC, AdmissionController, AdmissionRejected
+from jobs import JOB_WORKERS, JOBS_DIR, SCORE, TRANSCRIBE, JobWorker, open_queue, public_job
+from media import probe_media
+from prefork import process_memory, worker_slot
+from pipeline import COMPUTE_TYPE, DEVICE, MODEL_SIZE, TranscriptionPipeline, parse_history
+from progress import analyze_progress, snapshot_matrix
+from responses import FastJSONResponse
+from scheduler import INFERENCE_SLOTS
+from scoring import REGISTRY as scoring_registry, RESPONSE_PROFILE, RESPONSE_PROFILES, build_history_snapshots
+from streaming import MEDIA_TYPES, STREAM_FORMATS, ProvisionalScorer, stream_events
+from whisper_tuning import apply_affinity
+from word_timing import PACING_WINDOW_SECONDS, load_artifact, pacing_metrics
+from worker import build_handlers
 
-app = FastAPI(title="Local ASR (faster-whisper)")
+# Pre-forked workers (prefork.py) each pin to their own slice of the CPUs.
+apply_affinity(*worker_slot())
+pipeline = TranscriptionPipeline(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
+admission = AdmissionController(pipeline.cost_model)
+
+# JOB_WORKERS=0 leaves the queue to standalone `worker.py` processes.
+job_queue = open_queue()
+job_worker = JobWorker(job_queue, build_handlers([TRANSCRIBE, SCORE], pipeline), concurrency=JOB_WORKERS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scoring_registry.start_watching()
+    if JOB_WORKERS > 0:
+        job_worker.start()
+    yield
+    job_worker.stop(timeout=5)
+    scoring_registry.stop_watching()
+
+
+app = FastAPI(title="Local ASR (faster-whisper)", lifespan=lifespan)
 
 # ... (CORS setup remains) ...
 
@@ -27,15 +59,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-MODEL_SIZE = os.environ.get("WHISPER_MODEL", "base")
-DEVICE = os.environ.get("WHISPER_DEVICE", "cpu")
-COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
-model = WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
-video_analyzer = VideoAnalyzer()
-
 @app.get("/health")
 def health():
-    return {"status": "ok", "model": MODEL_SIZE, "device": DEVICE}
+    snapshot = scoring_registry.current()
+    return {
+        "status": "ok",
+        "model": pipeline.model_size,
+        "device": DEVICE,
+        "compute_type": pipeline.compute_type,
+        "whisper_selection": pipeline.selection.as_dict() if pipeline.selection else None,
+        "whisper_threading": pipeline.threading.as_dict(),
+        "config_version": snapshot.version,
+        "config_generation": snapshot.generation,
+        "config_error": scoring_registry.last_error,
+        "admission": admission.stats(),
+        "scheduler": {**pipeline.scheduler.stats(), "inference_slots": INFERENCE_SLOTS, "num_workers": pipeline.threading.num_workers},
+        "worker": {"pid": os.getpid(), "slot": worker_slot()[0], "memory": process_memory()},
+    }
+
+
+def rejection_response(e: AdmissionRejected, estimate) -> JSONResponse:
+    headers = {"Retry-After": str(e.retry_after)} if e.retry_after else None
+    return JSONResponse({"error": str(e), "cost": estimate.as_dict()}, status_code=e.status_code, headers=headers)
+
+
+def enqueue_transcription(media_path: str, probe, estimate, **params) -> JSONResponse:
+    job_id = job_queue.enqueue(TRANSCRIBE, {
+        **params,
+        "probe": probe.as_dict(),
+        "cost": estimate.as_dict(),
+    }, media_path=media_path)
+    return JSONResponse(
+        {"job_id": job_id, "status": "queued", "media": probe.as_dict(), "cost": estimate.as_dict()},
+        status_code=202,
+    )
 
 @app.post("/transcribe")
 async def transcribe(
@@ -44,53 +101,92 @@ async def transcribe(
     question: str = Form("Tell me about a challenge you faced and how you handled it."),  # default
     question_id: str | None = Form(None),
     history: str | None = Form(None),
+    profile: str = Form(RESPONSE_PROFILE),
+    tenant: str | None = Form(None),
+    user_id: str | None = Form(None),
+    stream: str | None = Form(None),
 ):
+    if profile not in RESPONSE_PROFILES:
+        return JSONResponse({"error": f"profile must be one of {', '.join(RESPONSE_PROFILES)}"}, status_code=400)
+    if stream and stream not in STREAM_FORMATS:
+        return JSONResponse({"error": f"stream must be one of {', '.join(STREAM_FORMATS)}"}, status_code=400)
     try:
         suffix = os.path.splitext(file.filename or "")[1] or ".webm"
-        is_video = suffix.lower() in ['.mp4', '.webm', '.mov', '.mkv']
-        
+
         with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
             shutil.copyfileobj(file.file, tmp)
             tmp_path = tmp.name
 
-        # 1. Transcribe (works for audio and video files via ffmpeg)
-        segments, info = model.transcribe(tmp_path, beam_size=5)
-        transcript = " ".join(seg.text for seg in segments).strip()
+        try:
+            probe = probe_media(tmp_path)
+        except ValueError as e:
+            os.remove(tmp_path)
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+        # Size the request from the probe before decoding anything.
+        estimate = admission.model.estimate(probe, fallback_seconds=duration_seconds)
+        try:
+            route = admission.decide(estimate)
+        except AdmissionRejected as e:
+            os.remove(tmp_path)
+            return rejection_response(e, estimate)
+        if route == ASYNC:
+            # Too long to hold the connection for: hand it to the job queue instead
+            # (streamed requests too; the job reports progress instead).
+            os.makedirs(JOBS_DIR, exist_ok=True)
+            media_path = shutil.move(tmp_path, os.path.join(JOBS_DIR, os.path.basename(tmp_path)))
+            return enqueue_transcription(
+                media_path, probe, estimate,
+                duration_seconds=duration_seconds,
+                question=question,
+                question_id=question_id,
+                history=history,
+                profile=profile,
+                tenant=tenant,
+                user_id=user_id,
+            )
 
-        # 2. Video Analysis (if applicable)
-        video_metrics = None
-        if is_video:
-            try:
-                video_metrics = video_analyzer.analyze(tmp_path)
-            except Exception as e:
-                print(f"Video analysis failed: {e}")
-                video_metrics = {"error": str(e)}
+        def run_admitted(on_event=None):
+            with admission.reserve(estimate):
+                return pipeline.run(
+                    tmp_path,
+                    duration_seconds,
+                    question,
+                    question_id=question_id,
+                    history=parse_history(history),
+                    profile=profile,
+                    probe=probe,
+                    tenant=tenant,
+                    user_id=user_id,
+                    on_event=on_event,
+                )
 
-        os.remove(tmp_path)
+        if stream:
+            def run_streamed(emit):
+                # Cleans up in the worker thread, so a client that disconnects
+                # mid-stream still has its upload removed once the run finishes.
+                try:
+                    payload = run_admitted(ProvisionalScorer(emit, question, question_id, parse_history(history)))
+                finally:
+                    os.remove(tmp_path)
+                payload["cost"] = estimate.as_dict()
+                return payload
 
-        history_payload = []
-        if history:
-            try:
-                history_payload = json.loads(history)
-            except Exception:
-                history_payload = []
-
-        scoring = score_answer(
-            question, 
-            transcript, 
-            duration_seconds, 
-            history_payload, 
-            question_id=question_id,
-            video_metrics=video_metrics
-        )
+            return StreamingResponse(
+                stream_events(stream, run_streamed),
+                media_type=MEDIA_TYPES[stream],
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        try:
+            payload = await run_in_threadpool(run_admitted)
+        except AdmissionRejected as e:
+            os.remove(tmp_path)
+            return rejection_response(e, estimate)
+        os.remove(tmp_path)
 
-        return JSONResponse({
-            "transcript": transcript,
-            "language": info.language,
-            "duration_seconds": duration_seconds,
-            "video_metrics": video_metrics,
-            **scoring
-        })
+        payload["cost"] = estimate.as_dict()
+        return FastJSONResponse(payload)
     except Exception as e:
         try:
             if 'tmp_path' in locals() and os.path.exists(tmp_path):
@@ -100,3 +196,99 @@ async def transcribe(
         import traceback
         traceback.print_exc()
         return JSONResponse({"error": str(e)}, status_code=500)
+
+@app.post("/jobs")
+async def create_job(
+    file: UploadFile = File(...),
+    duration_seconds: int = Form(...),
+    question: str = Form("Tell me about a challenge you faced and how you handled it."),
+    question_id: str | None = Form(None),
+    history: str | None = Form(None),
+    profile: str = Form(RESPONSE_PROFILE),
+    tenant: str | None = Form(None),
+    user_id: str | None = Form(None),
+):
+    if profile not in RESPONSE_PROFILES:
+        return JSONResponse({"error": f"profile must be one of {', '.join(RESPONSE_PROFILES)}"}, status_code=400)
+    try:
+        suffix = os.path.splitext(file.filename or "")[1] or ".webm"
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=JOBS_DIR) as tmp:
+            shutil.copyfileobj(file.file, tmp)
+            media_path = tmp.name
+
+        # Reject unreadable uploads now, and record what the file holds so the
+        # queue can size the job before a worker decodes it.
+        try:
+            probe = probe_media(media_path)
+        except ValueError as e:
+            os.remove(media_path)
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+        estimate = admission.model.estimate(probe, fallback_seconds=duration_seconds)
+        try:
+            admission.check_limit(estimate)
+        except AdmissionRejected as e:
+            os.remove(media_path)
+            return rejection_response(e, estimate)
+
+        return enqueue_transcription(
+            media_path, probe, estimate,
+            duration_seconds=duration_seconds,
+            question=question,
+            question_id=question_id,
+            history=history,
+            profile=profile,
+            tenant=tenant,
+            user_id=user_id,
+        )
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@app.post("/jobs/score")
+async def create_score_job(
+    transcript: str = Form(...),
+    duration_seconds: int = Form(...),
+    question: str = Form("Tell me about a challenge you faced and how you handled it."),
+    question_id: str | None = Form(None),
+    history: str | None = Form(None),
+    profile: str = Form(RESPONSE_PROFILE),
+    user_id: str | None = Form(None),
+):
+    if profile not in RESPONSE_PROFILES:
+        return JSONResponse({"error": f"profile must be one of {', '.join(RESPONSE_PROFILES)}"}, status_code=400)
+    job_id = job_queue.enqueue(SCORE, {
+        "transcript": transcript,
+        "duration_seconds": duration_seconds,
+        "question": question,
+        "question_id": question_id,
+        "history": history,
+        "profile": profile,
+        "user_id": user_id,
+    })
+    return JSONResponse({"job_id": job_id, "status": "queued"}, status_code=202)
+
+@app.post("/progress")
+def progress(history: str = Form(...)):
+    """Trends, standing and plateaus across a candidate's attempts (history newest first, as for /transcribe)."""
+    snapshots = build_history_snapshots(parse_history(history))
+    return FastJSONResponse(analyze_progress(snapshot_matrix(snapshots)))
+
+@app.get("/attempts/{attempt_id}/pacing")
+def attempt_pacing(attempt_id: str, window_seconds: float = PACING_WINDOW_SECONDS):
+    """Pacing recomputed from an attempt's stored word timings, without re-running ASR."""
+    words = load_artifact(attempt_id)
+    if words is None:
+        return JSONResponse({"error": "No word timings stored for this attempt"}, status_code=404)
+    if window_seconds <= 0:
+        return JSONResponse({"error": "window_seconds must be positive"}, status_code=400)
+    return FastJSONResponse({"attempt_id": attempt_id, "pacing": pacing_metrics(words, window_seconds)})
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if not job:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return FastJSONResponse(public_job(job))
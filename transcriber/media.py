@@ -0,0 +1,211 @@
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import av
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+@dataclass
+class MediaProbe:
+    """What an upload's container header says, read without decoding any media.
+
+    When the header records no duration (browser MediaRecorder WebM often
+    doesn't), ``duration_seconds`` is read off the packet timestamps instead and
+    ``duration_estimated`` is set; it is None only if no packet has a timestamp.
+    """
+
+    format_name: str
+    has_audio: bool
+    has_video: bool
+    duration_seconds: Optional[float] = None
+    duration_estimated: bool = False
+    audio_codec: Optional[str] = None
+    sample_rate: int = 0
+    video_codec: Optional[str] = None
+    fps: float = 0.0
+    width: int = 0
+    height: int = 0
+    size_bytes: int = 0
+    probe_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def probe_media(path: str) -> MediaProbe:
+    """Inspect the container once for stream presence, duration, resolution and fps.
+
+    Raises ValueError for files FFmpeg can't open.
+    """
+    start = time.perf_counter()
+    try:
+        container = av.open(path)
+    except av.error.FFmpegError as e:
+        raise ValueError(f"Unsupported or corrupt media file: {getattr(e, 'strerror', None) or e}") from e
+    try:
+        audio = container.streams.audio[0] if container.streams.audio else None
+        video = container.streams.video[0] if container.streams.video else None
+
+        duration = None
+        if container.duration:
+            duration = container.duration / av.time_base
+        else:
+            lengths = [float(s.duration * s.time_base) for s in (audio, video) if s is not None and s.duration and s.time_base]
+            duration = max(lengths) if lengths else None
+        estimated = False
+        if duration is None:
+            duration = _packet_span(container, [s for s in (audio, video) if s is not None])
+            estimated = duration is not None
+
+        fps = 0.0
+        if video is not None:
+            rate = video.average_rate or video.guessed_rate
+            fps = float(rate) if rate else 0.0
+        return MediaProbe(
+            format_name=container.format.name,
+            has_audio=audio is not None,
+            has_video=video is not None,
+            duration_seconds=round(duration, 3) if duration is not None else None,
+            duration_estimated=estimated,
+            audio_codec=audio.codec_context.name if audio is not None else None,
+            sample_rate=(audio.codec_context.sample_rate or 0) if audio is not None else 0,
+            video_codec=video.codec_context.name if video is not None else None,
+            fps=fps,
+            width=video.codec_context.width if video is not None else 0,
+            height=video.codec_context.height if video is not None else 0,
+            size_bytes=os.path.getsize(path),
+            probe_seconds=round(time.perf_counter() - start, 4),
+        )
+    finally:
+        container.close()
+
+
+def _packet_span(container: Any, streams: List[Any]) -> Optional[float]:
+    """Seconds from the first packet to the end of the last, by demuxing only (nothing is decoded)."""
+    if not streams:
+        return None
+    first = last = None
+    try:
+        for packet in container.demux(*streams):
+            if packet.pts is None or packet.time_base is None:
+                continue
+            start = float(packet.pts * packet.time_base)
+            end = float((packet.pts + (packet.duration or 0)) * packet.time_base)
+            first = start if first is None else min(first, start)
+            last = end if last is None else max(last, end)
+    except av.error.FFmpegError:
+        # A truncated upload still has a usable span up to the damage.
+        pass
+    return last - first if first is not None else None
+
+
+@dataclass
+class DecodedMedia:
+    """An upload demuxed once: 16 kHz mono PCM plus lazily decoded video frames.
+
+    ``audio`` is the float32 buffer Whisper, VAD and delivery metrics read
+    directly. Video is not held in memory at all: ``frames()`` demuxes the video
+    stream from the file and decodes it lazily, so memory stays flat however long
+    the upload is. Call ``close()`` (or use as a context manager) when done.
+    """
+
+    audio: np.ndarray
+    has_audio: bool
+    has_video: bool
+    fps: float = 0.0
+    width: int = 0
+    height: int = 0
+    decode_seconds: float = 0.0
+    _path: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def audio_duration(self) -> float:
+        return len(self.audio) / SAMPLE_RATE
+
+    def frames(
+        self,
+        step: int = 1,
+        select: Optional[Callable[[int], Optional[bool]]] = None,
+    ) -> Iterator[Tuple[float, np.ndarray]]:
+        """Yield ``(timestamp_seconds, bgr_frame)`` for every ``step``-th video frame.
+
+        With ``select``, it decides instead: it gets the 1-based frame index and
+        returns True to yield the frame, False to skip it, or None to stop decoding.
+        All frames up to the stop are decoded, but only yielded ones are converted.
+        """
+        if not self.has_video or self._path is None:
+            return
+        # A second, video-only pass; packets are decoded as they are read.
+        container = av.open(self._path)
+        try:
+            index = 0
+            for frame in container.decode(container.streams.video[0]):
+                index += 1
+                take = select(index) if select else index % step == 0
+                if take is None:
+                    return
+                if take:
+                    yield (frame.time or 0.0), frame.to_ndarray(format="bgr24")
+        finally:
+            container.close()
+
+    def close(self) -> None:
+        self._path = None
+
+    def __enter__(self) -> "DecodedMedia":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def decode_media(path: str, with_video: bool = True) -> DecodedMedia:
+    """Decode the audio of ``path`` to 16 kHz mono float32; video is left for ``frames()``."""
+    start = time.perf_counter()
+    chunks: List[np.ndarray] = []
+    with av.open(path) as container:
+        audio_stream = container.streams.audio[0] if container.streams.audio else None
+        video_stream = container.streams.video[0] if (with_video and container.streams.video) else None
+
+        if audio_stream is not None:
+            resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+            for packet in container.demux(audio_stream):
+                try:
+                    for frame in packet.decode():
+                        for resampled in resampler.resample(frame):
+                            chunks.append(resampled.to_ndarray())
+                except av.error.InvalidDataError:
+                    # Same as faster-whisper's decoder: skip corrupt audio packets.
+                    continue
+            for resampled in resampler.resample(None):
+                chunks.append(resampled.to_ndarray())
+
+        fps = 0.0
+        width = height = 0
+        if video_stream is not None:
+            rate = video_stream.average_rate or video_stream.guessed_rate
+            fps = float(rate) if rate else 0.0
+            width = video_stream.codec_context.width
+            height = video_stream.codec_context.height
+
+    if chunks:
+        pcm = np.concatenate(chunks, axis=1).reshape(-1)
+        audio = pcm.astype(np.float32)
+        audio /= 32768.0
+    else:
+        audio = np.zeros(0, dtype=np.float32)
+
+    return DecodedMedia(
+        audio=audio,
+        has_audio=audio_stream is not None,
+        has_video=video_stream is not None,
+        fps=fps,
+        width=width,
+        height=height,
+        decode_seconds=time.perf_counter() - start,
+        _path=path if video_stream is not None else None,
+    )
@@ -0,0 +1,230 @@
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from faster_whisper import WhisperModel
+
+from admission import CostModel
+from media import MediaProbe, decode_media, probe_media
+from scheduler import INFERENCE_SLOTS, FairScheduler
+from scoring import RESPONSE_PROFILE, score_answer
+from transcription import LONGFORM_PROCESSES, LongformTranscriber
+from video_analysis import VideoAnalyzer
+from whisper_tuning import (
+    WHISPER_AUTOSELECT,
+    WHISPER_AUTOSELECT_COMPUTE_TYPES,
+    WHISPER_AUTOSELECT_MODELS,
+    resolve_threading,
+    select_compute_type,
+)
+from word_timing import WORD_TIMESTAMPS, WordTimings, pacing_metrics, save_artifact
+
+MODEL_SIZE = os.environ.get("WHISPER_MODEL", "base")
+DEVICE = os.environ.get("WHISPER_DEVICE", "cpu")
+COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
+
+# Called as progress(stage, fraction) with fraction in 0..1.
+ProgressCallback = Callable[[str, float], None]
+# Called as on_event(event, data) with "segment" and "video" results as they are ready.
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+
+def parse_history(history: Optional[str]) -> List[Any]:
+    if not history:
+        return []
+    try:
+        return json.loads(history)
+    except Exception:
+        return []
+
+
+class TranscriptionPipeline:
+    """Transcribe, analyze video and score one recording already saved to disk."""
+
+    STAGES = ("probe", "queue", "decode", "transcribe", "video", "score")
+
+    def __init__(
+        self,
+        model_size: str = MODEL_SIZE,
+        device: str = DEVICE,
+        compute_type: str = COMPUTE_TYPE,
+        cpu_threads: int = 0,
+    ):
+        self.selection = None
+        if WHISPER_AUTOSELECT:
+            self.selection = select_compute_type(
+                device,
+                WHISPER_AUTOSELECT_MODELS or [model_size],
+                WHISPER_AUTOSELECT_COMPUTE_TYPES,
+                fallback=(model_size, compute_type),
+            )
+            model_size, compute_type = self.selection.model_size, self.selection.compute_type
+            print(f"Whisper {model_size}/{compute_type} selected ({self.selection.source}: {self.selection.reason})")
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        # num_workers > 1 lets that many transcriptions run at once; the scheduler
+        # hands out that many slots unless INFERENCE_SLOTS says otherwise.
+        self.threading = resolve_threading(cpu_threads) if cpu_threads else resolve_threading()
+        self.model = WhisperModel(
+            model_size,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=self.threading.cpu_threads,
+            num_workers=self.threading.num_workers,
+        )
+        self.video_analyzer = VideoAnalyzer()
+        # Learns per-stage real-time factors from every run for admission control.
+        self.cost_model = CostModel()
+        self.scheduler = FairScheduler(slots=INFERENCE_SLOTS or self.threading.num_workers)
+        self.longform = (
+            LongformTranscriber(model_size, device, compute_type) if LONGFORM_PROCESSES > 1 else None
+        )
+
+    def run(
+        self,
+        media_path: str,
+        duration_seconds: int,
+        question: str,
+        question_id: Optional[str] = None,
+        history: Optional[List[Any]] = None,
+        progress: Optional[ProgressCallback] = None,
+        profile: str = RESPONSE_PROFILE,
+        probe: Optional[MediaProbe] = None,
+        tenant: Optional[str] = None,
+        user_id: Optional[str] = None,
+        attempt_id: Optional[str] = None,
+        on_event: Optional[EventCallback] = None,
+    ) -> Dict[str, Any]:
+        report = progress or (lambda stage, fraction: None)
+        emit = on_event or (lambda event, data: None)
+        timings: Dict[str, Any] = {}
+        # Keys this attempt's stored artifacts (word timings, answer fingerprint).
+        attempt_id = attempt_id or uuid.uuid4().hex
+
+        # 0. Probe the container header (unless the caller already did) so only the
+        # stages that apply run: no video analysis for audio-only WebM, no Whisper
+        # for silent screen captures.
+        if probe is None:
+            report("probe", 0.0)
+            probe = probe_media(media_path)
+        timings["probe_seconds"] = probe.probe_seconds
+        report("probe", 1.0)
+
+        # Decode, Whisper and video analysis wait here for an inference slot;
+        # queued work goes shortest-first, fairly across tenants.
+        estimate = self.cost_model.estimate(probe, fallback_seconds=duration_seconds)
+        report("queue", 0.0)
+        with self.scheduler.slot(estimate.seconds, tenant) as waited:
+            timings["queue_seconds"] = round(waited, 3)
+            report("queue", 1.0)
+            transcript, language, video_metrics, words = self._analyze(media_path, probe, report, timings, emit)
+
+        pacing = None
+        if words is not None:
+            pacing = pacing_metrics(words)
+            try:
+                save_artifact(attempt_id, words)
+            except OSError as e:
+                print(f"Could not store word timings for {attempt_id}: {e}")
+
+        # 3. Scoring
+        report("score", 0.0)
+        started = time.perf_counter()
+        scoring = score_answer(
+            question,
+            transcript,
+            duration_seconds,
+            history or [],
+            question_id=question_id,
+            # The timeline is for charting; scoring only reads the aggregates.
+            video_metrics={k: v for k, v in video_metrics.items() if k != "timeline"} if video_metrics else video_metrics,
+            profile=profile,
+            user_id=user_id,
+            attempt_id=attempt_id,
+        )
+        if video_metrics and profile == "minimal":
+            video_metrics.pop("timeline", None)
+        timings["score_seconds"] = round(time.perf_counter() - started, 3)
+        report("score", 1.0)
+        self.cost_model.observe(probe, timings, fallback_seconds=duration_seconds)
+
+        return {
+            "attempt_id": attempt_id,
+            "transcript": transcript,
+            "language": language,
+            "duration_seconds": duration_seconds,
+            "video_metrics": video_metrics,
+            "pacing": pacing,
+            "media": probe.as_dict(),
+            "timings": timings,
+            **scoring
+        }
+
+    def _analyze(
+        self,
+        media_path: str,
+        probe: MediaProbe,
+        report: ProgressCallback,
+        timings: Dict[str, Any],
+        emit: EventCallback,
+    ) -> Tuple[str, Optional[str], Optional[Dict[str, Any]], Optional[WordTimings]]:
+        # Decode once; every stage below reads this buffer instead of the file.
+        report("decode", 0.0)
+        media = decode_media(media_path, with_video=probe.has_video)
+        timings["decode_seconds"] = round(media.decode_seconds, 3)
+        report("decode", 1.0)
+
+        try:
+            # 1. Transcribe
+            report("transcribe", 0.0)
+            started = time.perf_counter()
+            words = None
+            if not media.has_audio or len(media.audio) == 0:
+                transcript, language = "", None
+                timings["transcribe_mode"] = "skipped"
+            elif self.longform and self.longform.applies_to(media.audio):
+                segments, language = self.longform.transcribe(
+                    media.audio, beam_size=5, progress=lambda fraction: report("transcribe", fraction)
+                )
+                # Chunks finish out of order and are stitched at the end, so
+                # their segments are only emitted once all of them are done.
+                for i, seg in enumerate(segments):
+                    emit("segment", {"index": i, "start": seg["start"], "end": seg["end"], "text": seg["text"]})
+                transcript = " ".join(seg["text"] for seg in segments).strip()
+                words = WordTimings.from_segments(segments, language)
+                timings["transcribe_mode"] = "longform"
+            else:
+                generated, info = self.model.transcribe(media.audio, beam_size=5, word_timestamps=WORD_TIMESTAMPS)
+                language = info.language
+                segments = []
+                # Whisper decodes lazily: each segment is ready as the loop reaches it.
+                for seg in generated:
+                    emit("segment", {"index": len(segments), "start": seg.start, "end": seg.end, "text": seg.text})
+                    segments.append(seg)
+                    if info.duration:
+                        report("transcribe", min(1.0, seg.end / info.duration))
+                transcript = " ".join(seg.text for seg in segments).strip()
+                words = WordTimings.from_segments(segments, language)
+            timings["transcribe_seconds"] = round(time.perf_counter() - started, 3)
+            report("transcribe", 1.0)
+
+            # 2. Video Analysis (if applicable)
+            video_metrics = None
+            if media.has_video:
+                report("video", 0.0)
+                started = time.perf_counter()
+                try:
+                    video_metrics = self.video_analyzer.analyze_media(media)
+                except Exception as e:
+                    print(f"Video analysis failed: {e}")
+                    video_metrics = {"error": str(e)}
+                timings["video_seconds"] = round(time.perf_counter() - started, 3)
+                emit("video", video_metrics)
+            report("video", 1.0)
+        finally:
+            media.close()
+
+        return transcript, language, video_metrics, words
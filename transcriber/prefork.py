@@ -0,0 +1,277 @@
+"""Pre-fork HTTP server: load shared state once, fork workers that share it copy-on-write.
+
+    python prefork.py --workers 4 --port 8000
+
+Running ``uvicorn --workers N`` imports ``main`` N times from scratch. Here the
+parent imports every module the app needs (NumPy, PyAV, OpenCV, MediaPipe,
+CTranslate2, FastAPI, the scoring tables and the parsed scoring config), then
+freezes the GC so collections in the children don't write to those pages, and
+forks the workers. Each worker shares that memory with the parent until it
+writes to it, and a crashed worker is replaced by a fresh fork without
+re-importing anything. A worker that keeps dying soon after it starts (a model
+that fails to load, say) is restarted with exponential backoff, and after
+``PREFORK_MAX_FAST_FAILURES`` such failures in a row the server shuts down.
+
+The Whisper model and the MediaPipe face landmarker are built in each worker
+after the fork. Both start native thread pools when they load, and those
+threads don't exist in a forked child, so a model built before the fork
+deadlocks on first use. CTranslate2 copies the weights into its own buffers
+rather than mapping the model file, so each worker holds one copy of them.
+Size ``WHISPER_NUM_WORKERS`` (and with it the inference slots) so that fewer
+HTTP workers can run concurrent transcriptions.
+
+Every worker serves from the same listening socket. The parent prints each
+worker's RSS, PSS (its fair share of pages it shares) and private memory every
+``PREFORK_MEMORY_REPORT_SECONDS``, and ``/health`` reports the same for the
+worker that answers.
+"""
+import argparse
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+PREFORK_WORKERS = int(os.environ.get("PREFORK_WORKERS", "2"))
+PREFORK_HOST = os.environ.get("PREFORK_HOST", "0.0.0.0")
+PREFORK_PORT = int(os.environ.get("PREFORK_PORT", "8000"))
+PREFORK_MEMORY_REPORT_SECONDS = float(os.environ.get("PREFORK_MEMORY_REPORT_SECONDS", "60"))
+PREFORK_SHUTDOWN_SECONDS = float(os.environ.get("PREFORK_SHUTDOWN_SECONDS", "30"))
+# A worker that exits within this many seconds of starting counts as a fast failure.
+PREFORK_FAST_FAILURE_SECONDS = float(os.environ.get("PREFORK_FAST_FAILURE_SECONDS", "30"))
+PREFORK_MAX_FAST_FAILURES = int(os.environ.get("PREFORK_MAX_FAST_FAILURES", "5"))
+PREFORK_RESTART_BACKOFF_SECONDS = float(os.environ.get("PREFORK_RESTART_BACKOFF_SECONDS", "1"))
+PREFORK_RESTART_BACKOFF_MAX_SECONDS = float(os.environ.get("PREFORK_RESTART_BACKOFF_MAX_SECONDS", "60"))
+
+# "<slot>/<workers>", set in each forked worker before ``main`` is imported.
+WORKER_SLOT_ENV = "PREFORK_WORKER_SLOT"
+
+# Everything ``main`` imports, minus ``main`` itself (which builds the models).
+PRELOAD = ("worker", "progress", "responses", "admission", "scheduler", "fastapi.middleware.cors", "uvicorn")
+
+_SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "private",
+    "Private_Dirty": "private",
+}
+
+
+def worker_slot() -> Tuple[int, int]:
+    """``(slot, workers)`` for this process; ``(0, 1)`` outside a pre-forked worker."""
+    slot, _, workers = os.environ.get(WORKER_SLOT_ENV, "0/1").partition("/")
+    try:
+        return int(slot), max(1, int(workers))
+    except ValueError:
+        return 0, 1
+
+
+def process_memory(pid: Union[int, str] = "self") -> Dict[str, int]:
+    """RSS, PSS, shared and private bytes of ``pid`` from /proc (empty where that is unavailable).
+
+    RSS counts every shared page in full; PSS splits each shared page between
+    the processes mapping it, so summing PSS over workers gives their real total.
+    """
+    memory: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as fh:
+            for line in fh:
+                name, _, value = line.partition(":")
+                key = _SMAPS_FIELDS.get(name)
+                if key:
+                    memory[key] = memory.get(key, 0) + int(value.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        return {}
+    return memory
+
+
+def _mb(value: Optional[int]) -> str:
+    return f"{value / 2 ** 20:.1f}" if value is not None else "?"
+
+
+def preload(modules=PRELOAD) -> Dict[str, Any]:
+    """Import and warm everything fork-safe, then freeze it for the workers to share."""
+    started = time.perf_counter()
+    for name in modules:
+        importlib.import_module(name)
+    import scoring
+    scoring.REGISTRY.current()
+    # SQLite connections must not cross a fork; each worker reopens its own.
+    scoring.QUESTION_BANK.close()
+    scoring.ANSWER_INDEX.close()
+    gc.collect()
+    # Objects that survive to here are never collected in a worker, so GC passes
+    # there don't touch (and copy) the pages they live on.
+    gc.freeze()
+    return {"seconds": round(time.perf_counter() - started, 2), "memory": process_memory()}
+
+
+def bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve_worker(slot: int, workers: int, sock: socket.socket, log_level: str = "info") -> None:
+    """Body of a forked worker: build the models, then serve until told to stop."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    os.environ[WORKER_SLOT_ENV] = f"{slot}/{workers}"
+    import scoring
+    import uvicorn
+    scoring.QUESTION_BANK.reopen()
+    scoring.ANSWER_INDEX.reopen()
+    import main  # builds the pipeline (Whisper, MediaPipe) in this process
+    uvicorn.Server(uvicorn.Config(main.app, log_level=log_level)).run(sockets=[sock])
+
+
+class Supervisor:
+    """Forks ``workers`` copies of the app onto one socket and keeps them running."""
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        workers: int = PREFORK_WORKERS,
+        log_level: str = "info",
+        fast_failure_seconds: float = PREFORK_FAST_FAILURE_SECONDS,
+        max_fast_failures: int = PREFORK_MAX_FAST_FAILURES,
+        backoff_seconds: float = PREFORK_RESTART_BACKOFF_SECONDS,
+        backoff_max_seconds: float = PREFORK_RESTART_BACKOFF_MAX_SECONDS,
+    ):
+        self.sock = sock
+        self.workers = max(1, workers)
+        self.log_level = log_level
+        self.fast_failure_seconds = fast_failure_seconds
+        self.max_fast_failures = max_fast_failures
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.children: Dict[int, int] = {}  # pid -> slot
+        self.started_at: Dict[int, float] = {}  # slot -> monotonic start time
+        self.fast_failures: Dict[int, int] = {}  # slot -> consecutive fast failures
+        self.restart_at: Dict[int, float] = {}  # slot -> when to fork its replacement
+        self.stopping = False
+        self.exit_code = 0
+
+    def spawn(self, slot: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                serve_worker(slot, self.workers, self.sock, self.log_level)
+            except BaseException as e:
+                print(f"Worker {slot} failed: {e}")
+                code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(code)
+        self.children[pid] = slot
+        self.started_at[slot] = time.monotonic()
+        print(f"Started worker {slot} (pid {pid})")
+        return pid
+
+    def restart_delay(self, slot: int, uptime: float) -> Optional[float]:
+        """Seconds to wait before replacing a worker that ran for ``uptime``; None to give up."""
+        if uptime >= self.fast_failure_seconds:
+            self.fast_failures[slot] = 0
+            return 0.0
+        failures = self.fast_failures.get(slot, 0) + 1
+        self.fast_failures[slot] = failures
+        if failures >= self.max_fast_failures:
+            return None
+        return min(self.backoff_max_seconds, self.backoff_seconds * 2 ** (failures - 1))
+
+    def memory_report(self) -> List[Dict[str, Any]]:
+        rows = [{"slot": "parent", "pid": os.getpid(), **process_memory()}]
+        for pid, slot in sorted(self.children.items(), key=lambda item: item[1]):
+            rows.append({"slot": slot, "pid": pid, **process_memory(pid)})
+        return rows
+
+    def print_memory(self) -> None:
+        rows = self.memory_report()
+        for row in rows:
+            print(
+                f"  {row['slot']:>6} pid {row['pid']}: rss {_mb(row.get('rss'))} MB, "
+                f"pss {_mb(row.get('pss'))} MB, private {_mb(row.get('private'))} MB"
+            )
+        total = sum(row.get("pss", 0) for row in rows)
+        print(f"  total pss {_mb(total)} MB across {len(rows) - 1} workers and the parent")
+
+    def stop(self, signum=None, frame=None) -> None:
+        self.stopping = True
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for slot in range(self.workers):
+            self.spawn(slot)
+
+        last_report = time.monotonic()
+        while not self.stopping:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid, status = 0, 0
+            now = time.monotonic()
+            if pid and pid in self.children:
+                slot = self.children.pop(pid)
+                delay = self.restart_delay(slot, now - self.started_at.get(slot, now))
+                if delay is None:
+                    print(
+                        f"Worker {slot} (pid {pid}) exited with status {status}, "
+                        f"{self.fast_failures[slot]} times in a row within {self.fast_failure_seconds:g}s of starting; giving up"
+                    )
+                    self.exit_code = 1
+                    self.stopping = True
+                    break
+                print(f"Worker {slot} (pid {pid}) exited with status {status}; restarting in {delay:g}s")
+                self.restart_at[slot] = now + delay
+            for slot, when in list(self.restart_at.items()):
+                if when <= now:
+                    del self.restart_at[slot]
+                    self.spawn(slot)
+            if PREFORK_MEMORY_REPORT_SECONDS > 0 and time.monotonic() - last_report >= PREFORK_MEMORY_REPORT_SECONDS:
+                self.print_memory()
+                last_report = time.monotonic()
+            time.sleep(0.5)
+
+        print(f"Stopping {len(self.children)} workers...")
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + PREFORK_SHUTDOWN_SECONDS
+        while self.children and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self.children.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        for pid in self.children:
+            os.kill(pid, signal.SIGKILL)
+        return self.exit_code
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers that share preloaded state.")
+    parser.add_argument("--workers", type=int, default=PREFORK_WORKERS)
+    parser.add_argument("--host", default=PREFORK_HOST)
+    parser.add_argument("--port", type=int, default=PREFORK_PORT)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    loaded = preload()
+    print(f"Preloaded shared state in {loaded['seconds']}s (rss {_mb(loaded['memory'].get('rss'))} MB)")
+    sock = bind(args.host, args.port)
+    print(f"Serving on {args.host}:{args.port} with {args.workers} pre-forked workers")
+    return Supervisor(sock, args.workers, args.log_level).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Long-horizon progress analytics over a candidate's attempt history.
+
+History snapshots (``scoring.build_history_snapshots``, newest first) become one
+attempts x metrics float matrix, oldest attempt first, with NaN where a metric
+is missing. Every statistic is computed column-wise over that matrix in one
+pass: EWMA level, least-squares slope over all attempts and over the recent
+window, percentile standing of the current attempt, and plateau detection.
+"""
+import os
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+# Attempts after which an attempt's weight in the EWMA has halved.
+PROGRESS_EWMA_HALFLIFE = float(os.environ.get("PROGRESS_EWMA_HALFLIFE", "5"))
+# Attempts the recent slope (and trend) is fitted over.
+PROGRESS_RECENT_WINDOW = int(os.environ.get("PROGRESS_RECENT_WINDOW", "10"))
+# A metric has plateaued when its fitted change across the last
+# PROGRESS_PLATEAU_WINDOW attempts is within PROGRESS_PLATEAU_TOLERANCE of its
+# standard deviation over the whole history.
+PROGRESS_PLATEAU_WINDOW = int(os.environ.get("PROGRESS_PLATEAU_WINDOW", "5"))
+PROGRESS_PLATEAU_TOLERANCE = float(os.environ.get("PROGRESS_PLATEAU_TOLERANCE", "0.25"))
+
+METRICS = (
+    "total",
+    "clarity",
+    "concision",
+    "content",
+    "confidence",
+    "wpm",
+    "avg_sentence_len",
+    "fillers_per_100w",
+    "hedges_per_100w",
+    "star_coverage",
+    "result_strength",
+)
+# 1: higher is better, -1: lower is better, 0: neither (pace and sentence length have a sweet spot).
+DIRECTION = {"fillers_per_100w": -1, "hedges_per_100w": -1, "wpm": 0, "avg_sentence_len": 0}
+
+
+def snapshot_matrix(snapshots: Sequence[Mapping[str, Any]], metrics: Sequence[str] = METRICS) -> np.ndarray:
+    """Newest-first snapshots -> (attempts, metrics) float64 matrix, oldest row first."""
+    rows = [[s.get(name) for name in metrics] for s in reversed(snapshots)]
+    return np.array(rows, dtype=np.float64).reshape(len(rows), len(metrics))
+
+
+def _slopes(block: np.ndarray) -> np.ndarray:
+    """Least-squares slope per column against row index, ignoring NaNs."""
+    valid = ~np.isnan(block)
+    y = np.where(valid, block, 0.0)
+    t = np.arange(block.shape[0], dtype=np.float64)[:, None] * valid
+    n = valid.sum(axis=0)
+    st, sy = t.sum(axis=0), y.sum(axis=0)
+    denom = n * (t * t).sum(axis=0) - st * st
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denom > 0, (n * (t * y).sum(axis=0) - st * sy) / denom, np.nan)
+
+
+def _rounded(values: np.ndarray, digits: int) -> List[Optional[float]]:
+    return [None if np.isnan(v) else float(v) for v in np.round(values, digits)]
+
+
+def analyze_progress(
+    matrix: np.ndarray,
+    current: Optional[Mapping[str, Any]] = None,
+    metrics: Sequence[str] = METRICS,
+    halflife: float = PROGRESS_EWMA_HALFLIFE,
+    recent_window: int = PROGRESS_RECENT_WINDOW,
+    plateau_window: int = PROGRESS_PLATEAU_WINDOW,
+    plateau_tolerance: float = PROGRESS_PLATEAU_TOLERANCE,
+) -> Dict[str, Any]:
+    """Trend, standing and plateau per metric.
+
+    ``current`` (the attempt being scored) is appended as the newest attempt for
+    trends and ranked against the earlier attempts for ``percentile`` (0-100,
+    higher is better where the metric has a direction). Without it, the newest
+    history attempt is ranked instead.
+    """
+    history = matrix
+    if current is not None:
+        row = np.array([[current.get(name) for name in metrics]], dtype=np.float64)
+        matrix = np.vstack([matrix, row])
+    n, m = matrix.shape
+    direction = np.array([DIRECTION.get(name, 1) for name in metrics], dtype=np.float64)
+
+    valid = ~np.isnan(matrix)
+    values = np.where(valid, matrix, 0.0)
+    count = valid.sum(axis=0)
+    rows = np.arange(n)
+    last_row = np.where(valid, rows[:, None], -1).max(axis=0, initial=-1)
+    latest = np.where(last_row >= 0, matrix[np.clip(last_row, 0, None), np.arange(m)] if n else np.nan, np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = values.sum(axis=0) / count
+        std = np.sqrt(np.maximum((values * values).sum(axis=0) / count - mean * mean, 0.0))
+        decay = 0.5 ** (1.0 / max(halflife, 1e-9))
+        weights = (decay ** (n - 1 - rows))[:, None] * valid
+        ewma = (weights * values).sum(axis=0) / weights.sum(axis=0)
+    high = np.where(valid, matrix, -np.inf).max(axis=0, initial=-np.inf)
+    low = np.where(valid, matrix, np.inf).min(axis=0, initial=np.inf)
+    best = np.where(count > 0, np.where(direction < 0, low, high), np.nan)
+
+    slope = _slopes(matrix)
+    recent_slope = _slopes(matrix[-recent_window:]) if recent_window > 0 else np.full(m, np.nan)
+    window = matrix[-plateau_window:] if plateau_window > 0 else matrix[:0]
+    window_slope = _slopes(window)
+    plateau = (
+        (n >= plateau_window)
+        & ((~np.isnan(window)).sum(axis=0) >= plateau_window)
+        & (np.abs(np.nan_to_num(window_slope, nan=np.inf)) * (plateau_window - 1) <= plateau_tolerance * std + 1e-9)
+    )
+
+    # Standing of the newest attempt among the ones before it.
+    previous = history if current is not None else matrix[:-1]
+    target = matrix[-1] if n else np.full(m, np.nan)
+    prev_valid = ~np.isnan(previous)
+    prev_count = prev_valid.sum(axis=0)
+    below = ((previous < target) & prev_valid).sum(axis=0)
+    ties = ((previous == target) & prev_valid).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percentile = np.where(prev_count > 0, (below + 0.5 * ties) / prev_count * 100, np.nan)
+    percentile = np.where(direction < 0, 100 - percentile, percentile)
+    percentile = np.where(np.isnan(target), np.nan, percentile)
+
+    signed = np.where(direction == 0, recent_slope, recent_slope * direction)
+    columns = {
+        "count": count.tolist(),
+        "latest": _rounded(latest, 2),
+        "ewma": _rounded(ewma, 2),
+        "mean": _rounded(mean, 2),
+        "best": _rounded(best, 2),
+        "slope": _rounded(slope, 3),
+        "recent_slope": _rounded(recent_slope, 3),
+        "percentile": _rounded(percentile, 1),
+        "plateau": plateau.tolist(),
+    }
+    out: Dict[str, Any] = {"attempt_count": n, "metrics": {}, "improving": [], "declining": [], "plateaued": []}
+    for j, name in enumerate(metrics):
+        if not count[j]:
+            continue
+        stats = {key: column[j] for key, column in columns.items()}
+        if np.isnan(signed[j]) or stats["plateau"] or abs(signed[j]) < 1e-9:
+            trend = "flat"
+        elif direction[j] == 0:
+            trend = "rising" if signed[j] > 0 else "falling"
+        else:
+            trend = "improving" if signed[j] > 0 else "declining"
+        stats["trend"] = trend
+        out["metrics"][name] = stats
+        if trend in ("improving", "declining"):
+            out[trend].append(name)
+        if stats["plateau"]:
+            out["plateaued"].append(name)
+    return out
@@ -0,0 +1,471 @@
+"""SQLite-backed question bank.
+
+Questions live on disk with indexes on slug, normalized prompt, mode and tag, so
+startup time and memory do not grow with the size of the bank. Entries are
+parsed only when a request asks for them and kept in a small LRU cache that is
+dropped whenever the database changes, including writes from other processes.
+
+``question_bank.json`` is synced into the store by the scoring config registry.
+Each generation of the file is also staged under its digest, so a config
+snapshot keeps reading the bank it was built from through the same indexed
+lookups after a newer file has been synced.
+Bigger, company-specific banks are inserted directly and go live immediately:
+
+    python question_bank.py import company_questions.json
+    python question_bank.py stats
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from config_registry import KNOWN_MODES, freeze
+
+QUESTION_BANK_DB_PATH = os.environ.get(
+    "QUESTION_BANK_DB_PATH", os.path.join(tempfile.gettempdir(), "interview-transcriber-questions.sqlite3")
+)
+QUESTION_BANK_CACHE_SIZE = int(os.environ.get("QUESTION_BANK_CACHE_SIZE", "2048"))
+# Staged question_bank.json generations kept for snapshots still serving requests.
+QUESTION_BANK_FILE_GENERATIONS = int(os.environ.get("QUESTION_BANK_FILE_GENERATIONS", "4"))
+
+# Rows synced from question_bank.json vs. inserted at runtime.
+SOURCE_FILE = "file"
+SOURCE_LIVE = "live"
+
+
+def validate_question_bank(library: Any) -> List[Dict[str, Any]]:
+    if not isinstance(library, list):
+        raise ValueError("question bank must be a JSON list")
+    seen = set()
+    for i, entry in enumerate(library):
+        if not isinstance(entry, dict):
+            raise ValueError(f"question bank entry {i} must be an object")
+        slug = entry.get("slug")
+        if slug in seen:
+            raise ValueError(f"duplicate question slug {slug!r}")
+        if slug:
+            seen.add(slug)
+        if entry.get("mode") is not None and entry["mode"] not in KNOWN_MODES:
+            raise ValueError(f"question {slug!r} has unknown mode {entry['mode']!r}")
+        for field in ("tags", "competencies"):
+            if not isinstance(entry.get(field, []), list):
+                raise ValueError(f"question {slug!r} {field} must be a list")
+    return library
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    slug TEXT NOT NULL UNIQUE,
+    prompt TEXT NOT NULL DEFAULT '',
+    normalized TEXT NOT NULL DEFAULT '',
+    mode TEXT,
+    source TEXT NOT NULL DEFAULT 'live',
+    entry TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_normalized ON questions (normalized);
+CREATE INDEX IF NOT EXISTS questions_mode ON questions (mode, seq);
+CREATE TABLE IF NOT EXISTS question_tags (
+    tag TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    PRIMARY KEY (tag, slug)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS question_tags_slug ON question_tags (slug);
+-- Every question_bank.json generation a config snapshot was built from, by file digest.
+CREATE TABLE IF NOT EXISTS file_questions (
+    digest TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    normalized TEXT NOT NULL DEFAULT '',
+    entry TEXT NOT NULL,
+    PRIMARY KEY (digest, slug)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS file_questions_normalized ON file_questions (digest, normalized, seq);
+CREATE TABLE IF NOT EXISTS file_generations (
+    digest TEXT PRIMARY KEY,
+    staged_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class QuestionBankStore:
+    """Question lookups by slug, prompt, mode and tag over one SQLite file.
+
+    Reads go through one shared connection (serialized by a lock) so the hot
+    path does not pay for opening a database per request.
+    """
+
+    def __init__(
+        self,
+        db_path: str = QUESTION_BANK_DB_PATH,
+        normalize_question: Callable[[str], str] = lambda text: text.strip().lower(),
+        cache_size: int = QUESTION_BANK_CACHE_SIZE,
+    ):
+        self.db_path = db_path
+        self.normalize_question = normalize_question
+        self.cache_size = cache_size
+        self._lock = threading.RLock()
+        # Keyed by (scope, slug) and (scope, match, normalized prompt); the scope is
+        # the source filter, or "file:<digest>" for a staged file generation.
+        self._entries: "OrderedDict[Tuple[Optional[str], str], Optional[Mapping[str, Any]]]" = OrderedDict()
+        self._prompts: "OrderedDict[Tuple[Optional[str], str, str], Optional[str]]" = OrderedDict()
+        self._data_version: Optional[int] = None
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._clear_cache()
+
+    def _clear_cache(self) -> None:
+        self._entries.clear()
+        self._prompts.clear()
+
+    def _check_cache(self) -> None:
+        # data_version changes when another connection commits to the database.
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._clear_cache()
+            self._data_version = version
+
+    def _cached(self, cache: OrderedDict, key: Tuple, load: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._check_cache()
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+            value = load()
+            cache[key] = value
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+            return value
+
+    def _entry(self, sql: str, params: Tuple) -> Optional[Mapping[str, Any]]:
+        row = self._conn.execute(sql, params).fetchone()
+        return freeze(json.loads(row["entry"])) if row else None
+
+    def _slug(self, sql: str, params: Tuple) -> Optional[str]:
+        row = self._conn.execute(sql, params).fetchone()
+        return row["slug"] if row else None
+
+    # ---------- Reads ----------
+    # ``source`` restricts a lookup to rows synced from the file or inserted live.
+    def get(self, slug: str, source: Optional[str] = None) -> Optional[Mapping[str, Any]]:
+        """The question entry for ``slug`` as a read-only mapping, or None."""
+        if not slug:
+            return None
+        return self._cached(self._entries, (source, slug), lambda: self._entry(
+            "SELECT entry FROM questions WHERE slug = ? AND (? IS NULL OR source = ?)", (slug, source, source)
+        ))
+
+    def slug_for_prompt(self, question_text: str, source: Optional[str] = None) -> Optional[str]:
+        """Exact normalized-prompt match first, then the first prompt that contains
+        (or is contained in) the question."""
+        normalized = self.normalize_question(question_text)
+        return self.exact_slug_for_prompt(question_text, source) or self._cached(
+            self._prompts, (source, "contains", normalized), lambda: self._slug(
+                "SELECT slug FROM questions WHERE normalized != '' AND (? IS NULL OR source = ?) "
+                "AND (instr(?, normalized) > 0 OR instr(normalized, ?) > 0) ORDER BY seq LIMIT 1",
+                (source, source, normalized, normalized),
+            )
+        )
+
+    def exact_slug_for_prompt(self, question_text: str, source: Optional[str] = None) -> Optional[str]:
+        normalized = self.normalize_question(question_text)
+        return self._cached(self._prompts, (source, "exact", normalized), lambda: self._slug(
+            "SELECT slug FROM questions WHERE normalized = ? AND (? IS NULL OR source = ?) ORDER BY seq LIMIT 1",
+            (normalized, source, source),
+        ))
+
+    # ``digest`` selects one staged question_bank.json generation (see ``stage_file``).
+    def file_entry(self, digest: str, slug: str) -> Optional[Mapping[str, Any]]:
+        if not slug:
+            return None
+        return self._cached(self._entries, (f"{SOURCE_FILE}:{digest}", slug), lambda: self._entry(
+            "SELECT entry FROM file_questions WHERE digest = ? AND slug = ?", (digest, slug)
+        ))
+
+    def file_slug_for_prompt(self, digest: str, question_text: str, exact: bool = False) -> Optional[str]:
+        normalized = self.normalize_question(question_text)
+        scope = f"{SOURCE_FILE}:{digest}"
+        slug = self._cached(self._prompts, (scope, "exact", normalized), lambda: self._slug(
+            "SELECT slug FROM file_questions WHERE digest = ? AND normalized = ? ORDER BY seq LIMIT 1",
+            (digest, normalized),
+        ))
+        if slug or exact:
+            return slug
+        return self._cached(self._prompts, (scope, "contains", normalized), lambda: self._slug(
+            "SELECT slug FROM file_questions WHERE digest = ? AND normalized != '' "
+            "AND (instr(?, normalized) > 0 OR instr(normalized, ?) > 0) ORDER BY seq LIMIT 1",
+            (digest, normalized, normalized),
+        ))
+
+    def slugs_by_mode(self, mode: str, limit: int = 100, offset: int = 0) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT slug FROM questions WHERE mode = ? ORDER BY seq LIMIT ? OFFSET ?", (mode, limit, offset)
+            ).fetchall()
+        return [row["slug"] for row in rows]
+
+    def slugs_by_tag(self, tag: str, limit: int = 100, offset: int = 0) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT t.slug FROM question_tags t JOIN questions q ON q.slug = t.slug "
+                "WHERE t.tag = ? ORDER BY q.seq LIMIT ? OFFSET ?",
+                (tag, limit, offset),
+            ).fetchall()
+        return [row["slug"] for row in rows]
+
+    def slugs(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT slug FROM questions ORDER BY seq").fetchall()
+        return (row["slug"] for row in rows)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def counts_by_mode(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT mode, COUNT(*) AS n FROM questions GROUP BY mode").fetchall()
+        return {row["mode"] or "-": row["n"] for row in rows}
+
+    # ---------- Writes ----------
+    def _upsert(self, conn: sqlite3.Connection, entry: Dict[str, Any], source: str, now: float) -> None:
+        slug = entry["slug"]
+        prompt = entry.get("prompt") or ""
+        conn.execute(
+            "INSERT INTO questions (slug, prompt, normalized, mode, source, entry, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(slug) DO UPDATE SET prompt = excluded.prompt, normalized = excluded.normalized, "
+            "mode = excluded.mode, source = excluded.source, entry = excluded.entry, updated_at = excluded.updated_at",
+            (slug, prompt, self.normalize_question(prompt) if prompt else "", entry.get("mode"), source,
+             json.dumps(entry), now),
+        )
+        conn.execute("DELETE FROM question_tags WHERE slug = ?", (slug,))
+        tags = set(entry.get("tags", [])) | set(entry.get("competencies", []))
+        conn.executemany("INSERT INTO question_tags (tag, slug) VALUES (?, ?)", [(tag, slug) for tag in tags])
+
+    def upsert_many(self, entries: Iterable[Dict[str, Any]], source: str = SOURCE_LIVE) -> int:
+        """Insert or replace entries (validated like question_bank.json). Live immediately."""
+        entries = validate_question_bank(list(entries))
+        now = time.time()
+        written = 0
+        with self._transaction() as conn:
+            for entry in entries:
+                if not entry.get("slug"):
+                    continue
+                self._upsert(conn, entry, source, now)
+                written += 1
+        return written
+
+    def upsert(self, entry: Dict[str, Any]) -> None:
+        if not isinstance(entry, dict) or not entry.get("slug"):
+            raise ValueError("question entry needs a slug")
+        self.upsert_many([entry])
+
+    def delete(self, slug: str) -> bool:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM question_tags WHERE slug = ?", (slug,))
+            return conn.execute("DELETE FROM questions WHERE slug = ?", (slug,)).rowcount > 0
+
+    def file_digest(self) -> Optional[str]:
+        """Digest of the question_bank.json last synced into the store."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'file_digest'").fetchone()
+        return row["value"] if row else None
+
+    def sync_file(self, library: List[Dict[str, Any]], digest: str) -> bool:
+        """Make the file-sourced rows match ``library``. A no-op when ``digest``
+        matches the last synced file, so restarts don't re-import the bank."""
+        with self._lock:
+            if self.file_digest() == digest:
+                return False
+            library = validate_question_bank(library)
+            now = time.time()
+            slugs = [entry["slug"] for entry in library if entry.get("slug")]
+            with self._transaction() as conn:
+                existing = {r["slug"] for r in conn.execute("SELECT slug FROM questions WHERE source = ?", (SOURCE_FILE,))}
+                for slug in existing - set(slugs):
+                    conn.execute("DELETE FROM question_tags WHERE slug = ?", (slug,))
+                    conn.execute("DELETE FROM questions WHERE slug = ?", (slug,))
+                for entry in library:
+                    if entry.get("slug"):
+                        self._upsert(conn, entry, SOURCE_FILE, now)
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('file_digest', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (digest,),
+                )
+            return True
+
+    def stage_file(self, library: List[Dict[str, Any]], digest: str) -> bool:
+        """Store ``library`` as file generation ``digest`` without touching the rows
+        lookups see. Only the newest ``QUESTION_BANK_FILE_GENERATIONS`` (and the
+        synced one) are kept."""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM file_generations WHERE digest = ?", (digest,)).fetchone():
+                return False
+            library = validate_question_bank(library)
+            with self._transaction() as conn:
+                conn.execute("INSERT OR IGNORE INTO file_generations (digest, staged_at) VALUES (?, ?)", (digest, time.time()))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO file_questions (digest, slug, seq, normalized, entry) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (digest, entry["slug"], seq, self.normalize_question(entry.get("prompt") or ""), json.dumps(entry))
+                        for seq, entry in enumerate(library)
+                        if entry.get("slug")
+                    ],
+                )
+                stale = [row["digest"] for row in conn.execute(
+                    "SELECT digest FROM file_generations WHERE digest NOT IN "
+                    "(SELECT value FROM meta WHERE key = 'file_digest') "
+                    "ORDER BY staged_at DESC, rowid DESC LIMIT -1 OFFSET ?",
+                    (max(1, QUESTION_BANK_FILE_GENERATIONS),),
+                )]
+                for old in stale:
+                    conn.execute("DELETE FROM file_questions WHERE digest = ?", (old,))
+                    conn.execute("DELETE FROM file_generations WHERE digest = ?", (old,))
+            return True
+
+    def staged_file(self, digest: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT entry FROM file_questions WHERE digest = ? ORDER BY seq", (digest,)
+            ).fetchall()
+        return [json.loads(row["entry"]) for row in rows]
+
+    def snapshot(self, library: Any, digest: str) -> "QuestionBankSnapshot":
+        """A view of ``library`` over this store's live rows. ``library`` is staged
+        under ``digest``; the rows lookups see are not written."""
+        self.stage_file(library, digest)
+        return QuestionBankSnapshot(self, digest)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def reopen(self) -> None:
+        """Open a fresh connection, e.g. in a forked child (SQLite connections must not cross a fork)."""
+        with self._lock:
+            self._conn = self._connect()
+            self._data_version = None
+
+    # ---------- Mapping views for callers that used the old dicts ----------
+    @property
+    def by_slug(self) -> Mapping[str, Mapping[str, Any]]:
+        return _SlugView(self)
+
+
+class QuestionBankSnapshot:
+    """The question bank as one config generation sees it.
+
+    ``question_bank.json`` is read from the generation staged under its digest,
+    so a reload never changes the questions under an in-flight request. Rows
+    inserted live (``python question_bank.py import``) win over a file entry with
+    the same slug, as they do in the store itself.
+    """
+
+    def __init__(self, store: QuestionBankStore, digest: str):
+        self.store = store
+        self.digest = digest
+
+    def sync(self) -> bool:
+        """Make this generation the store's file rows (done when the snapshot goes live)."""
+        if self.store.file_digest() == self.digest:
+            return False
+        return self.store.sync_file(self.store.staged_file(self.digest), self.digest)
+
+    def get(self, slug: str) -> Optional[Mapping[str, Any]]:
+        return self.store.get(slug, source=SOURCE_LIVE) or self.store.file_entry(self.digest, slug)
+
+    def exact_slug_for_prompt(self, question_text: str) -> Optional[str]:
+        return self.store.exact_slug_for_prompt(question_text, source=SOURCE_LIVE) or self.store.file_slug_for_prompt(
+            self.digest, question_text, exact=True
+        )
+
+    def slug_for_prompt(self, question_text: str) -> Optional[str]:
+        """Exact prompt match (live rows, then the file), then the first containing prompt."""
+        return (
+            self.exact_slug_for_prompt(question_text)
+            or self.store.slug_for_prompt(question_text, source=SOURCE_LIVE)
+            or self.store.file_slug_for_prompt(self.digest, question_text)
+        )
+
+
+class _SlugView(Mapping):
+    def __init__(self, store: QuestionBankStore):
+        self._store = store
+
+    def __getitem__(self, slug: str) -> Mapping[str, Any]:
+        entry = self._store.get(slug)
+        if entry is None:
+            raise KeyError(slug)
+        return entry
+
+    def __iter__(self) -> Iterator[str]:
+        return self._store.slugs()
+
+    def __len__(self) -> int:
+        return self._store.count()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the SQLite question bank.")
+    parser.add_argument("--db", default=QUESTION_BANK_DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    load = sub.add_parser("import", help="insert or replace questions from a JSON list")
+    load.add_argument("path")
+    sub.add_parser("stats", help="print question counts")
+    args = parser.parse_args(argv)
+
+    from scoring import _normalize_question
+
+    store = QuestionBankStore(args.db, _normalize_question)
+    if args.command == "import":
+        with open(args.path, "r", encoding="utf-8") as fh:
+            library = json.load(fh)
+        try:
+            written = store.upsert_many(library)
+        except ValueError as e:
+            print(f"Import rejected: {e}")
+            return 1
+        print(f"Imported {written} questions into {args.db}")
+    else:
+        print(f"{store.count()} questions in {args.db}")
+        for mode, count in sorted(store.counts_by_mode().items()):
+            print(f"  {mode}: {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""TF-IDF relevance of an answer against every question in the bank.
+
+Each question's prompt, tags and competencies become one L2-normalised TF-IDF
+vector over stemmed terms (``keyword_index.stem``), held together as a CSR
+matrix. Scoring an answer builds its vector from the transcript's stem counts
+and takes one sparse matrix-vector product, giving its cosine similarity to
+every question at once: the asked question's similarity feeds the relevance
+score, and a clearly closer other question means the candidate probably
+answered a different question.
+
+The matrix is rebuilt when the bank file changes (with each scoring snapshot)
+and cached as ``.npz`` under ``RELEVANCE_CACHE_DIR``, keyed by the bank's
+content, so a restart loads it instead of re-vectorising every question.
+
+Only ``question_bank.json`` is indexed. Questions inserted live into the
+question bank store (``python question_bank.py import``) are not: when one is
+asked, its prompt is vectorised on the fly for the similarity score, but it is
+never reported as the closest other question, and a live row that replaces a
+file question is still matched by the file's prompt and tags until the file
+changes. Indexing the store would mean holding a vector per stored question in
+every worker, which the store exists to avoid.
+"""
+import hashlib
+import json
+import math
+import os
+import tempfile
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from keyword_index import STEM_VERSION, TOKEN_RE, stem
+
+RELEVANCE_CACHE_DIR = os.environ.get(
+    "RELEVANCE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "interview-transcriber-relevance")
+)
+# Share of the question-alignment score that comes from similarity (the rest is rubric topics).
+RELEVANCE_BLEND = float(os.environ.get("RELEVANCE_BLEND", "0.3"))
+# Cosine similarity that counts as fully on-topic (on-topic answers score about 0.3-0.7 against one-line prompts).
+RELEVANCE_FULL_SIMILARITY = float(os.environ.get("RELEVANCE_FULL_SIMILARITY", "0.3"))
+# Another question must beat the asked one by this much (and reach the minimum) to be called off-target.
+RELEVANCE_OFF_TARGET_MARGIN = float(os.environ.get("RELEVANCE_OFF_TARGET_MARGIN", "0.15"))
+RELEVANCE_MIN_SIMILARITY = float(os.environ.get("RELEVANCE_MIN_SIMILARITY", "0.3"))
+
+# Tags and competencies are curated, so they count for more than prompt words;
+# ``keywords`` are the question's rubric keywords, where it has a rubric.
+FIELD_WEIGHTS = {"prompt": 1.0, "tags": 2.0, "competencies": 2.0, "keywords": 1.0}
+# Words that frame a prompt rather than say what it is about. With a few dozen
+# questions the rarer ones ("did", "walk") would get a high idf and make any
+# answer using them look on-topic.
+PROMPT_WORDS = {
+    "tell", "describe", "explain", "walk", "through", "give", "example", "time", "times",
+    "would", "could", "should", "can", "will", "did", "does", "do", "done", "have", "has", "had",
+    "me", "us", "your", "you're", "you’re", "yourself", "not", "any", "some", "one", "all",
+    "there", "than", "such", "very", "just", "also", "more", "most", "other", "new",
+}
+# Bump when vectorisation changes so stale cache files are ignored.
+CACHE_FORMAT = 1
+
+
+def term_counts(text: str, stopwords: Iterable[str] = ()) -> Dict[str, float]:
+    stop = PROMPT_WORDS | set(stopwords)
+    counts: Dict[str, float] = {}
+    for word in TOKEN_RE.findall(text.lower()):
+        if len(word) > 2 and word not in stop:
+            term = stem(word)
+            counts[term] = counts.get(term, 0.0) + 1.0
+    return counts
+
+
+def document_terms(entry: Mapping[str, Any], stopwords: Iterable[str] = ()) -> Dict[str, float]:
+    """Weighted term counts of one question-bank entry."""
+    counts = {t: c * FIELD_WEIGHTS["prompt"] for t, c in term_counts(entry.get("prompt", ""), stopwords).items()}
+    for field in ("tags", "competencies", "keywords"):
+        for label in entry.get(field) or ():
+            for term, c in term_counts(str(label).replace("_", " "), stopwords).items():
+                counts[term] = counts.get(term, 0.0) + c * FIELD_WEIGHTS[field]
+    return counts
+
+
+class RelevanceIndex:
+    """CSR matrix of question TF-IDF vectors (rows) over a stemmed vocabulary (columns)."""
+
+    def __init__(
+        self,
+        slugs: Sequence[str],
+        prompts: Sequence[str],
+        vocab: Sequence[str],
+        idf: np.ndarray,
+        data: np.ndarray,
+        indices: np.ndarray,
+        indptr: np.ndarray,
+    ):
+        self.slugs = list(slugs)
+        self.prompts = list(prompts)
+        self.vocab = list(vocab)
+        self.columns = {term: j for j, term in enumerate(self.vocab)}
+        self.rows = {slug: i for i, slug in enumerate(self.slugs)}
+        self.idf = idf
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self._row_of = np.repeat(np.arange(len(self.slugs)), np.diff(indptr))
+
+    def __len__(self) -> int:
+        return len(self.slugs)
+
+    @classmethod
+    def build(cls, entries: Sequence[Mapping[str, Any]], stopwords: Iterable[str] = ()) -> "RelevanceIndex":
+        stopwords = set(stopwords)
+        entries = [entry for entry in entries if entry.get("slug")]
+        docs = [document_terms(entry, stopwords) for entry in entries]
+        vocab = sorted({term for doc in docs for term in doc})
+        columns = {term: j for j, term in enumerate(vocab)}
+        df = np.zeros(len(vocab))
+        for doc in docs:
+            for term in doc:
+                df[columns[term]] += 1
+        # Smoothed idf, as in scikit-learn: a term in every question still counts a little.
+        idf = np.log((1 + len(docs)) / (1 + df)) + 1.0
+
+        data: List[float] = []
+        indices: List[int] = []
+        indptr = [0]
+        for doc in docs:
+            cols = sorted(columns[term] for term in doc)
+            weights = np.array([(1 + math.log(doc[vocab[j]])) * idf[j] for j in cols])
+            norm = np.linalg.norm(weights)
+            data.extend((weights / norm) if norm else weights)
+            indices.extend(cols)
+            indptr.append(len(indices))
+        return cls(
+            [entry["slug"] for entry in entries],
+            [entry.get("prompt", "") for entry in entries],
+            vocab,
+            idf,
+            np.array(data, dtype=np.float64),
+            np.array(indices, dtype=np.int64),
+            np.array(indptr, dtype=np.int64),
+        )
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp,
+            slugs=np.array(self.slugs, dtype=str),
+            prompts=np.array(self.prompts, dtype=str),
+            vocab=np.array(self.vocab, dtype=str),
+            idf=self.idf,
+            data=self.data,
+            indices=self.indices,
+            indptr=self.indptr,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "RelevanceIndex":
+        with np.load(path) as npz:
+            return cls(
+                npz["slugs"].tolist(), npz["prompts"].tolist(), npz["vocab"].tolist(),
+                npz["idf"], npz["data"], npz["indices"], npz["indptr"],
+            )
+
+    def vector(self, counts: Mapping[str, float]) -> np.ndarray:
+        """Dense, L2-normalised TF-IDF vector of ``counts`` over this vocabulary (unknown terms dropped)."""
+        vec = np.zeros(len(self.vocab))
+        for term, count in counts.items():
+            j = self.columns.get(term)
+            if j is not None and count > 0:
+                vec[j] = (1 + math.log(count)) * self.idf[j]
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def similarities(self, counts: Mapping[str, float]) -> np.ndarray:
+        """Cosine similarity of ``counts`` to every question, in one sparse matrix-vector product."""
+        vec = self.vector(counts)
+        return np.bincount(self._row_of, weights=self.data * vec[self.indices], minlength=len(self.slugs))
+
+    def match(
+        self,
+        counts: Mapping[str, float],
+        slug: Optional[str] = None,
+        question_counts: Optional[Mapping[str, float]] = None,
+    ) -> Dict[str, Any]:
+        """How well an answer fits the asked question, and the closest other question.
+
+        The asked question is ``slug`` when it is in the bank; otherwise its text's
+        ``question_counts`` are vectorised on the fly.
+        """
+        sims = self.similarities(counts)
+        target = self.rows.get(slug) if slug else None
+        if target is not None:
+            similarity = float(sims[target])
+        elif question_counts:
+            similarity = float(self.vector(question_counts) @ self.vector(counts))
+        else:
+            similarity = None
+
+        others = sims.copy()
+        if target is not None:
+            others[target] = -1.0
+        closest = None
+        if len(others) and others.max() > 0:
+            best = int(others.argmax())
+            closest = {"slug": self.slugs[best], "prompt": self.prompts[best], "similarity": round(float(others[best]), 4)}
+        off_target = bool(
+            closest is not None
+            and similarity is not None
+            and closest["similarity"] >= RELEVANCE_MIN_SIMILARITY
+            and closest["similarity"] > similarity + RELEVANCE_OFF_TARGET_MARGIN
+        )
+        return {
+            "similarity": round(similarity, 4) if similarity is not None else None,
+            "score": min(1.0, similarity / RELEVANCE_FULL_SIMILARITY) if similarity is not None else None,
+            "rank": int((sims > similarity).sum()) + 1 if target is not None else None,
+            "closest": closest,
+            "off_target": off_target,
+        }
+
+
+def cache_key(entries: Sequence[Mapping[str, Any]], stopwords: Iterable[str] = ()) -> str:
+    payload = json.dumps([CACHE_FORMAT, STEM_VERSION, FIELD_WEIGHTS, sorted(stopwords), entries], sort_keys=True, default=list)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def load_or_build(
+    entries: Sequence[Mapping[str, Any]],
+    stopwords: Iterable[str] = (),
+    cache_dir: str = RELEVANCE_CACHE_DIR,
+) -> RelevanceIndex:
+    """The bank's index from the disk cache, building and caching it on a miss."""
+    stopwords = sorted(set(stopwords))
+    path = os.path.join(cache_dir, f"relevance-{cache_key(entries, stopwords)}.npz") if cache_dir else ""
+    if path and os.path.exists(path):
+        try:
+            return RelevanceIndex.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable relevance cache {path}: {e}")
+    index = RelevanceIndex.build(entries, stopwords)
+    if path:
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"Could not cache relevance index at {path}: {e}")
+    return index
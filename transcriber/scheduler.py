@@ -0,0 +1,143 @@
+"""Orders transcriptions waiting for an inference slot.
+
+Work that has been admitted (see ``admission``) waits here for one of the
+inference slots around decode, Whisper and video analysis. There are as many
+slots as the Whisper model has workers (``num_workers``, tuned or from
+``WHISPER_NUM_WORKERS``) unless INFERENCE_SLOTS overrides it. When a slot frees
+up it goes to:
+
+* across tenants, weighted fair queuing (start-time fair queuing over estimated
+  cost), so one tenant sending a stream of long uploads gets its share and no
+  more. ``INFERENCE_TENANT_WEIGHTS`` ("acme=2,trial=0.5") scales shares;
+  requests without a tenant share one "anonymous" bucket;
+* within a tenant, the shortest estimated job, so a 30-second practice answer
+  doesn't wait behind a 10-minute upload;
+* with aging: every second a job waits lowers its effective cost by
+  INFERENCE_AGING_RATE seconds, so long jobs are never starved.
+"""
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# 0 derives the slot count from the Whisper model's num_workers.
+INFERENCE_SLOTS = int(os.environ.get("INFERENCE_SLOTS", "0"))
+INFERENCE_AGING_RATE = float(os.environ.get("INFERENCE_AGING_RATE", "0.5"))
+INFERENCE_TENANT_WEIGHTS = os.environ.get("INFERENCE_TENANT_WEIGHTS", "")
+
+ANONYMOUS = "anonymous"
+
+
+def parse_weights(raw: str) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for item in raw.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            weights[name.strip()] = float(value)
+    return weights
+
+
+class Ticket:
+    __slots__ = ("tenant", "cost", "arrived", "seq", "granted")
+
+    def __init__(self, tenant: str, cost: float, arrived: float, seq: int):
+        self.tenant = tenant
+        self.cost = cost
+        self.arrived = arrived
+        self.seq = seq
+        self.granted = False
+
+
+class FairScheduler:
+    def __init__(
+        self,
+        slots: int = INFERENCE_SLOTS or 1,
+        weights: Optional[Dict[str, float]] = None,
+        aging_rate: float = INFERENCE_AGING_RATE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.slots = max(1, slots)
+        self.weights = parse_weights(INFERENCE_TENANT_WEIGHTS) if weights is None else dict(weights)
+        self.aging_rate = aging_rate
+        self.clock = clock
+        self.running = 0
+        self._queues: Dict[str, List[Ticket]] = {}
+        # Start-time fair queuing tags: a backlogged tenant's next start tag and
+        # every tenant's last finish tag.
+        self._start: Dict[str, float] = {}
+        self._finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def weight(self, tenant: str) -> float:
+        return max(1e-6, self.weights.get(tenant, 1.0))
+
+    @contextmanager
+    def slot(self, cost: float, tenant: Optional[str] = None) -> Iterator[float]:
+        """Block until this job's turn; yields how many seconds it waited."""
+        ticket = Ticket(tenant or ANONYMOUS, max(0.0, cost), self.clock(), next(self._seq))
+        with self._cond:
+            queue = self._queues.setdefault(ticket.tenant, [])
+            if not queue:
+                self._start[ticket.tenant] = max(self._virtual_time, self._finish.get(ticket.tenant, 0.0))
+            queue.append(ticket)
+            self._dispatch()
+            while not ticket.granted:
+                self._cond.wait()
+        try:
+            yield self.clock() - ticket.arrived
+        finally:
+            with self._cond:
+                self.running -= 1
+                self._dispatch()
+
+    def _effective_cost(self, ticket: Ticket, now: float) -> float:
+        return max(0.0, ticket.cost - self.aging_rate * (now - ticket.arrived))
+
+    def _next(self, now: float) -> Optional[Tuple[Ticket, float, float]]:
+        best: Optional[Tuple[Tuple[float, int], Ticket, float, float]] = None
+        for tenant, queue in self._queues.items():
+            head = min(queue, key=lambda t: (self._effective_cost(t, now), t.seq))
+            start = self._start[tenant]
+            finish = start + self._effective_cost(head, now) / self.weight(tenant)
+            key = (finish, head.seq)
+            if best is None or key < best[0]:
+                best = (key, head, start, finish)
+        return best[1:] if best else None
+
+    def _dispatch(self) -> None:
+        granted = False
+        now = self.clock()
+        while self.running < self.slots:
+            picked = self._next(now)
+            if picked is None:
+                break
+            ticket, start, finish = picked
+            queue = self._queues[ticket.tenant]
+            queue.remove(ticket)
+            if queue:
+                self._start[ticket.tenant] = finish
+            else:
+                del self._queues[ticket.tenant]
+                del self._start[ticket.tenant]
+            self._virtual_time = max(self._virtual_time, start)
+            self._finish[ticket.tenant] = finish
+            ticket.granted = True
+            self.running += 1
+            granted = True
+        if granted:
+            # An idle tenant whose finish tag is behind virtual time restarts from it anyway.
+            for tenant in [t for t, f in self._finish.items() if f <= self._virtual_time and t not in self._queues]:
+                del self._finish[tenant]
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "running": self.running,
+                "queued": {tenant: len(queue) for tenant, queue in self._queues.items()},
+            }
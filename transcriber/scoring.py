@@ -1,8 +1,18 @@
+import os
 import re
-import json
+import sqlite3
+from bisect import bisect_right
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+from config_registry import ConfigRegistry, ScoringSnapshot, thaw
+from duplicates import DUPLICATES_DB_PATH, AnswerIndex
+from keyword_index import TokenIndex
+from progress import analyze_progress, snapshot_matrix
+from question_bank import QUESTION_BANK_DB_PATH, QuestionBankStore
+from relevance import RELEVANCE_BLEND, load_or_build, term_counts
+
 # ---------- Lexicons ----------
 FILLERS = [
     "um", "uh", "er", "ah", "like", "you know", "kind of", "kinda",
@@ -72,7 +82,16 @@ VAGUE_PHRASES = [
 NUMBER_RE = re.compile(r"(?<!\w)(?:\$?\d+(?:\.\d+)?%?|\d{1,3}(?:,\d{3})+%?)(?!\w)")
 TIME_RE = re.compile(r"\b(days?|weeks?|months?|quarters?|years?)\b", re.I)
 
+# How much of the score_answer payload to build:
+#   full     - everything, including the legacy ``scores`` block and echoed sentences
+#   standard - drops ``scores`` and the sections repeated inside explanations/detected
+#   minimal  - overall score, subscores, issues, suggestions and strengths only
+RESPONSE_PROFILES = ("full", "standard", "minimal")
+RESPONSE_PROFILE = os.environ.get("RESPONSE_PROFILE", "full")
+
 SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+# Same boundaries as SENTENCE_SPLIT (group 1 is the gap), without the per-position lookbehind.
+SENTENCE_BREAK = re.compile(r'[.!?](\s+)')
 WORD_SPLIT = re.compile(r"\b[\w'-]+\b", re.I)
 
 
@@ -90,21 +109,6 @@ QUESTION_TEXT_TO_ID = {
 }
 
 QUESTION_LIBRARY_PATH = Path(__file__).with_name("question_bank.json")
-QUESTION_LIBRARY: List[Dict[str, Any]] = []
-QUESTION_BY_ID: Dict[str, Dict[str, Any]] = {}
-QUESTION_BY_TEXT: Dict[str, str] = {}
-
-try:
-    if QUESTION_LIBRARY_PATH.exists():
-        QUESTION_LIBRARY = json.loads(QUESTION_LIBRARY_PATH.read_text())
-        QUESTION_BY_ID = {q["slug"]: q for q in QUESTION_LIBRARY if q.get("slug")}
-        QUESTION_BY_TEXT = {
-            _normalize_question(q["prompt"]): q["slug"] for q in QUESTION_LIBRARY if q.get("prompt") and q.get("slug")
-        }
-except Exception:
-    QUESTION_LIBRARY = []
-    QUESTION_BY_ID = {}
-    QUESTION_BY_TEXT = {}
 
 
 QUESTION_RUBRICS: Dict[str, Dict[str, Any]] = {
@@ -266,11 +270,22 @@ def tokenize_words(text: str) -> List[str]:
     return WORD_SPLIT.findall(text.lower())
 
 
+def sentence_spans(text: str) -> Tuple[List[int], List[int]]:
+    """Start and end offsets of each sentence of an already stripped ``text``."""
+    starts, ends = [0], []
+    for gap in SENTENCE_BREAK.finditer(text):
+        ends.append(gap.start(1))
+        starts.append(gap.end(1))
+    ends.append(len(text))
+    return starts, ends
+
+
 def split_sentences(text: str) -> List[str]:
     text = text.strip()
     if not text:
         return []
-    return SENTENCE_SPLIT.split(text)
+    starts, ends = sentence_spans(text)
+    return [text[a:b] for a, b in zip(starts, ends)]
 
 
 def extract_keywords(text: str, limit: int = 8) -> List[str]:
@@ -286,23 +301,100 @@ def extract_keywords(text: str, limit: int = 8) -> List[str]:
 
 
 def keyword_signal(text: str, keywords: List[str]) -> bool:
-    t = text.lower()
-    return any(kw in t for kw in keywords)
+    return TokenIndex(text.lower()).contains_any(keywords)
+
+
+class TranscriptIndex:
+    """Lower-cased transcript with sentence spans and a token index for phrase lookups.
+
+    Keywords and cues are matched as stemmed tokens (see ``keyword_index``), so
+    each lookup is a posting-list hit rather than a substring scan; the sentence
+    holding a hit is found by binary search over sentence start offsets.
+    """
+
+    def __init__(self, text: str):
+        self._text = text.strip()
+        self.lower = self._text.lower()
+        self._tokens: Optional[TokenIndex] = None
+        self._spans: Optional[Tuple[List[int], List[int]]] = None
+        self._sentences: Optional[List[str]] = None
+
+    @property
+    def tokens(self) -> TokenIndex:
+        if self._tokens is None:
+            self._tokens = TokenIndex(self.lower)
+        return self._tokens
+
+    @property
+    def spans(self) -> Tuple[List[int], List[int]]:
+        # Offsets are taken on the lower-cased text so they line up with first().
+        if self._spans is None:
+            self._spans = sentence_spans(self.lower)
+        return self._spans
+
+    @property
+    def sentences(self) -> List[str]:
+        """Same list as split_sentences(text)."""
+        if self._sentences is None:
+            if not self._text:
+                self._sentences = []
+            elif len(self._text) == len(self.lower):
+                starts, ends = self.spans
+                self._sentences = [self._text[a:b] for a, b in zip(starts, ends)]
+            else:
+                # lower() changed the length (e.g. "İ"), so offsets don't map back.
+                self._sentences = split_sentences(self._text)
+        return self._sentences
+
+    def first(self, phrase: str) -> int:
+        """Character offset of the first (stemmed) occurrence of ``phrase``, or -1."""
+        positions = self.tokens.positions(phrase)
+        return self.tokens.starts[positions[0]] if positions else -1
+
+    def contains(self, phrase: str) -> bool:
+        return self.tokens.contains(phrase)
+
+    def contains_any(self, phrases: List[str]) -> bool:
+        return self.tokens.contains_any(phrases)
+
+    def count(self, phrase: str) -> int:
+        """Occurrences of exactly ``phrase`` (no stemming)."""
+        return self.tokens.count(phrase)
+
+    def sentence_index(self, offset: int) -> int:
+        return bisect_right(self.spans[0], offset) - 1
+
+    def sentence_with(self, phrase: str) -> Optional[str]:
+        """First sentence containing ``phrase``, like find_sentence_with_keyword()."""
+        if not self.sentences:
+            return None
+        for position in self.tokens.positions(phrase):
+            start, end = self.tokens.span(position, phrase)
+            i = self.sentence_index(start)
+            # A hit that runs across a sentence break doesn't belong to either sentence.
+            if end <= self.spans[1][i]:
+                return self.sentences[i].strip()
+        return None
 
 
-def build_rubric_for_question(qid: Optional[str], question_text: str) -> Optional[Dict[str, Any]]:
+def build_rubric_for_question(
+    qid: Optional[str],
+    question_text: str,
+    cfg: Optional[ScoringSnapshot] = None,
+) -> Optional[Dict[str, Any]]:
     if qid and qid in QUESTION_RUBRICS:
         return QUESTION_RUBRICS[qid]
 
-    entry = QUESTION_BY_ID.get(qid or "")
+    bank = (cfg or REGISTRY.current()).question_bank
+    entry = bank.get(qid or "")
     if not entry and question_text:
-        entry = QUESTION_BY_ID.get(QUESTION_BY_TEXT.get(_normalize_question(question_text), ""))
+        entry = bank.get(bank.exact_slug_for_prompt(question_text) or "")
     if not entry and not question_text:
         return None
 
     mode = (entry.get("mode") if entry else None) or ("system_design" if "design" in question_text.lower() else "behavioral")
     prompt_keywords = extract_keywords(question_text)
-    tags = (entry.get("tags", []) if entry else []) + (entry.get("competencies", []) if entry else [])
+    tags = (list(entry.get("tags", ())) if entry else []) + (list(entry.get("competencies", ())) if entry else [])
     tag_keywords = [t.replace("_", " ") for t in tags]
 
     if mode == "behavioral":
@@ -465,24 +557,56 @@ DEFAULT_CONFIG = {
     "issues": {},
 }
 
-try:
-    CONFIG = json.loads(CONFIG_PATH.read_text())
-except FileNotFoundError:
-    CONFIG = DEFAULT_CONFIG
+def rubric_keywords(slug: Optional[str]) -> List[str]:
+    """Topic keywords of a question's hand-written rubric (none for other questions)."""
+    rubric = QUESTION_RUBRICS.get(slug or "", {})
+    return [kw for topic in rubric.get("topics", []) for kw in topic.get("keywords", [])]
+
+
+# scoring_config.json is served from immutable snapshots that the registry swaps
+# when the file changes (see config_registry.py); question_bank.json is synced
+# into the SQLite question store, which also takes live inserts.
+QUESTION_BANK = QuestionBankStore(QUESTION_BANK_DB_PATH, _normalize_question)
+# MinHash fingerprints of each user's earlier answers, for repeat detection.
+ANSWER_INDEX = AnswerIndex(DUPLICATES_DB_PATH)
+REGISTRY = ConfigRegistry(
+    CONFIG_PATH,
+    QUESTION_LIBRARY_PATH,
+    DEFAULT_CONFIG,
+    QUESTION_BANK,
+    relevance_builder=lambda library: load_or_build(
+        [{**entry, "keywords": rubric_keywords(entry.get("slug"))} for entry in library], STOPWORDS
+    ),
+)
+
+# Module-level names kept for callers that read the tables directly; they always
+# resolve against the live snapshot.
+_SNAPSHOT_ATTRS = {
+    "CONFIG": "config",
+    "WEIGHTS": "weights",
+    "MODE_WEIGHTS": "mode_weights",
+    "THRESHOLDS": "thresholds",
+    "ISSUE_DEFS": "issue_defs",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _SNAPSHOT_ATTRS:
+        return getattr(REGISTRY.current(), _SNAPSHOT_ATTRS[name])
+    if name == "QUESTION_BY_ID":
+        return QUESTION_BANK.by_slug
+    if name == "QUESTION_LIBRARY":
+        # Loads every entry; prefer QUESTION_BANK lookups on large banks.
+        return [QUESTION_BANK.get(slug) for slug in QUESTION_BANK.slugs()]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-WEIGHTS = CONFIG.get("weights", DEFAULT_CONFIG["weights"])
-MODE_WEIGHTS = CONFIG.get("mode_weights", {})
-THRESHOLDS = CONFIG.get("thresholds", DEFAULT_CONFIG["thresholds"])
-ISSUE_DEFS = CONFIG.get("issues", {})
 
 def clamp(value: float, lo: float = 0.0, hi: float = 1.0) -> float:
     return max(lo, min(hi, value))
 
 
-def weight(label: str, mode: Optional[str] = None) -> float:
-    if mode and mode in MODE_WEIGHTS:
-        return float(MODE_WEIGHTS.get(mode, {}).get(label, WEIGHTS.get(label, 0)))
-    return float(WEIGHTS.get(label, 0))
+def weight(label: str, mode: Optional[str] = None, cfg: Optional[ScoringSnapshot] = None) -> float:
+    return (cfg or REGISTRY.current()).weight(label, mode)
 
 
 def infer_mode(question_id: Optional[str], question_text: str) -> str:
@@ -494,8 +618,8 @@ def infer_mode(question_id: Optional[str], question_text: str) -> str:
     return "behavioral"
 
 
-def issue_entry(key: str, snippet: str) -> Optional[Dict[str, str]]:
-    meta = ISSUE_DEFS.get(key)
+def issue_entry(key: str, snippet: str, cfg: Optional[ScoringSnapshot] = None) -> Optional[Dict[str, str]]:
+    meta = (cfg or REGISTRY.current()).issue_defs.get(key)
     if not meta:
         return None
     return {
@@ -507,26 +631,27 @@ def issue_entry(key: str, snippet: str) -> Optional[Dict[str, str]]:
 
 
 # ---------- Detectors ----------
-def count_matches(text: str, terms: List[str]) -> List[Tuple[str, int]]:
-    t = " " + _lower(text) + " "
+def count_matches(text: str, terms: List[str], index: Optional[TranscriptIndex] = None) -> List[Tuple[str, int]]:
+    """Whole-word occurrences of each term, exact form (fillers must not match "liked")."""
+    tokens = index.tokens if index else TokenIndex(_lower(text))
     results = []
     for term in terms:
-        cnt = len(re.findall(rf"(?<!\w){re.escape(term)}(?!\w)", t))
+        cnt = tokens.count(term)
         if cnt > 0:
             results.append((term, cnt))
     return results
 
 
-def filler_stats(text: str) -> Dict[str, Any]:
-    matches = count_matches(text, FILLERS)
+def filler_stats(text: str, index: Optional[TranscriptIndex] = None) -> Dict[str, Any]:
+    matches = count_matches(text, FILLERS, index)
     total = sum(c for _, c in matches)
     words = max(1, len(tokenize_words(text)))
     rate_per_100 = (total / words) * 100
     return {"total": total, "per_100w": rate_per_100, "details": matches}
 
 
-def hedge_stats(text: str) -> Dict[str, Any]:
-    matches = count_matches(text, HEDGES)
+def hedge_stats(text: str, index: Optional[TranscriptIndex] = None) -> Dict[str, Any]:
+    matches = count_matches(text, HEDGES, index)
     total = sum(c for _, c in matches)
     words = max(1, len(tokenize_words(text)))
     rate_per_100 = (total / words) * 100
@@ -555,8 +680,8 @@ def quantification(text: str) -> Dict[str, Any]:
     return {"numbers": nums[:20], "has_numbers": bool(nums), "time_terms": times[:20]}
 
 
-def sentence_stats(text: str) -> Dict[str, Any]:
-    sents = [s.strip() for s in split_sentences(text) if s.strip()]
+def sentence_stats(text: str, index: Optional[TranscriptIndex] = None) -> Dict[str, Any]:
+    sents = [s.strip() for s in (index.sentences if index else split_sentences(text)) if s.strip()]
     if not sents:
         return {"avg_len": 0, "sentences": []}
     lens = [len(tokenize_words(s)) for s in sents]
@@ -564,37 +689,37 @@ def sentence_stats(text: str) -> Dict[str, Any]:
     return {"avg_len": avg_len, "sentences": sents[:40]}
 
 
-def star_segments(text: str) -> Dict[str, Any]:
-    tl = _lower(text)
+def star_segments(text: str, index: Optional[TranscriptIndex] = None) -> Dict[str, Any]:
+    index = index or TranscriptIndex(text)
     tags = {"s": False, "t": False, "a": False, "r": False}
-    if any(c in tl for c in SITUATION_CUES):
+    if index.contains_any(SITUATION_CUES):
         tags["s"] = True
-    if any(c in tl for c in TASK_CUES):
+    if index.contains_any(TASK_CUES):
         tags["t"] = True
-    if any(c in tl for c in ACTION_CUES):
+    if index.contains_any(ACTION_CUES):
         tags["a"] = True
     return {"tags": tags, "coverage": sum(1 for v in tags.values() if v)}
 
 
-def result_strength(text: str) -> Dict[str, Any]:
+def result_strength(text: str, index: Optional[TranscriptIndex] = None) -> Dict[str, Any]:
     """Score 0..1 based on explicit impact phrases, metrics, and result placement."""
     tl = _lower(text)
-    sents = split_sentences(text)
+    sents = index.sentences if index else split_sentences(text)
     n = max(1, len(sents))
     end_idx = int(n * 0.7)  # last 30% treated as result region
 
-    cue_hits = count_matches(text, RESULT_CUES)
+    cue_hits = count_matches(text, RESULT_CUES, index)
     cue_score = min(1.0, sum(c for _, c in cue_hits) * 0.25)
 
     has_num = bool(NUMBER_RE.search(tl))
     num_score = 0.35 if has_num else 0.0
 
-    end_text = " ".join(sents[end_idx:]).lower()
+    end_tokens = TokenIndex(" ".join(sents[end_idx:]).lower())
     end_cues = [
         "users could", "successfully", "enabled", "reduced", "increased",
         "confirmed", "recognized", "passed", "fixed", "resolved", "unblocked", "achieved"
     ]
-    end_hits = sum(1 for c in end_cues if c in end_text)
+    end_hits = sum(1 for c in end_cues if end_tokens.contains(c))
     end_score = min(0.4, end_hits * 0.2)
 
     score = min(1.0, cue_score + num_score + end_score)
@@ -607,15 +732,15 @@ def result_strength(text: str) -> Dict[str, Any]:
     return {"score": score, "details": details}
 
 
-def vagueness_penalty(text: str) -> Dict[str, Any]:
-    hits = count_matches(text, VAGUE_PHRASES)
+def vagueness_penalty(text: str, index: Optional[TranscriptIndex] = None) -> Dict[str, Any]:
+    hits = count_matches(text, VAGUE_PHRASES, index)
     total = sum(c for _, c in hits)
     penalty = min(0.6, total * 0.2)
     return {"penalty": penalty, "hits": hits}
 
 
-def reflection_presence(text: str) -> Dict[str, Any]:
-    matches = count_matches(text, REFLECTION_CUES)
+def reflection_presence(text: str, index: Optional[TranscriptIndex] = None) -> Dict[str, Any]:
+    matches = count_matches(text, REFLECTION_CUES, index)
     return {
         "has_reflection": bool(matches),
         "phrases": [term for term, _ in matches][:3],
@@ -635,9 +760,9 @@ def lexical_stats(tokens: List[str]) -> Dict[str, Any]:
     }
 
 
-def star_sequence_signal(text: str) -> Dict[str, Any]:
-    tl = _lower(text)
-    length = max(1, len(tl))
+def star_sequence_signal(text: str, index: Optional[TranscriptIndex] = None) -> Dict[str, Any]:
+    index = index or TranscriptIndex(text)
+    length = max(1, len(index.lower))
     labels = [
         ("s", SITUATION_CUES),
         ("t", TASK_CUES),
@@ -646,25 +771,25 @@ def star_sequence_signal(text: str) -> Dict[str, Any]:
     ]
     positions: Dict[str, Optional[float]] = {}
     for label, cues in labels:
-        idxs = [tl.find(c) for c in cues if c in tl]
+        idxs = [pos for pos in (index.first(c) for c in cues) if pos >= 0]
         positions[label] = (min(idxs) / length) if idxs else None
     ordered_positions = [positions[l] for l in ["s", "t", "a", "r"] if positions[l] is not None]
     ordered = all(ordered_positions[i] < ordered_positions[i + 1] for i in range(len(ordered_positions) - 1))
     return {"positions": positions, "observed": sum(v is not None for v in positions.values()), "ordered": ordered}
 
 
-def infer_question_id(provided_id: Optional[str], question_text: str) -> Optional[str]:
+def infer_question_id(
+    provided_id: Optional[str],
+    question_text: str,
+    cfg: Optional[ScoringSnapshot] = None,
+) -> Optional[str]:
     if provided_id:
         candidate = provided_id.strip().lower()
-        if candidate in QUESTION_RUBRICS or candidate in QUESTION_BY_ID:
-            return candidate
         return candidate
+    slug = (cfg or REGISTRY.current()).question_bank.slug_for_prompt(question_text)
+    if slug:
+        return slug
     normalized = _normalize_question(question_text)
-    if normalized in QUESTION_BY_TEXT:
-        return QUESTION_BY_TEXT[normalized]
-    for key, value in QUESTION_BY_TEXT.items():
-        if key in normalized or normalized in key:
-            return value
     if normalized in QUESTION_TEXT_TO_ID:
         return QUESTION_TEXT_TO_ID[normalized]
     for key, value in QUESTION_TEXT_TO_ID.items():
@@ -674,9 +799,8 @@ def infer_question_id(provided_id: Optional[str], question_text: str) -> Optiona
 
 
 def find_sentence_with_keyword(sentences: List[str], keyword: str) -> Optional[str]:
-    kw = keyword.lower()
     for sent in sentences:
-        if kw in sent.lower():
+        if TokenIndex(sent.lower()).contains(keyword):
             return sent.strip()
     return None
 
@@ -705,14 +829,35 @@ def evaluate_metric(spec: Dict[str, Any], metrics: Dict[str, Any]) -> bool:
     return False
 
 
+def question_relevance(
+    question_id: Optional[str],
+    question_text: str,
+    index: TranscriptIndex,
+    cfg: ScoringSnapshot,
+) -> Optional[Dict[str, Any]]:
+    """TF-IDF similarity of the answer to the asked question and to the closest other one."""
+    if cfg.relevance is None or not len(cfg.relevance) or not index.tokens.words:
+        return None
+    return cfg.relevance.match(
+        index.tokens.stem_counts(),
+        slug=question_id,
+        question_counts=term_counts(question_text, STOPWORDS),
+    )
+
+
 def analyze_question_alignment(
     question_id: Optional[str],
     question_text: str,
     transcript: str,
     metrics: Dict[str, Any],
+    cfg: Optional[ScoringSnapshot] = None,
+    index: Optional[TranscriptIndex] = None,
 ) -> Dict[str, Any]:
-    qid = infer_question_id(question_id, question_text)
-    rubric = build_rubric_for_question(qid, question_text)
+    cfg = cfg or REGISTRY.current()
+    qid = infer_question_id(question_id, question_text, cfg)
+    rubric = build_rubric_for_question(qid, question_text, cfg)
+    index = index or TranscriptIndex(transcript)
+    relevance = question_relevance(qid, question_text, index, cfg)
     if not rubric:
         return {
             'question_id': qid,
@@ -722,9 +867,9 @@ def analyze_question_alignment(
             'suggestions': [],
             'strengths': [],
             'penalty': 0.0,
+            'relevance': relevance,
         }
-    transcript_lower = _lower(transcript)
-    sentences = split_sentences(transcript)
+    sentences = index.sentences
 
     topic_results: List[Dict[str, Any]] = []
     total_weight = sum(topic.get('weight', 0.0) for topic in rubric['topics']) or 1.0
@@ -737,14 +882,14 @@ def analyze_question_alignment(
         keywords = topic.get('keywords', [])
         metric_spec = topic.get('metric')
 
-        keyword_hits = [kw for kw in keywords if kw in transcript_lower]
+        keyword_hits = [kw for kw in keywords if index.contains(kw)]
         metric_hit = evaluate_metric(metric_spec, metrics) if metric_spec else False
         hit = bool(keyword_hits) or metric_hit
 
         evidence = None
         if keyword_hits:
             for kw in keyword_hits:
-                evidence = find_sentence_with_keyword(sentences, kw)
+                evidence = index.sentence_with(kw)
                 if evidence:
                     break
         if not evidence and metric_hit and sentences:
@@ -767,11 +912,15 @@ def analyze_question_alignment(
         })
 
     score = earned / total_weight
+    if relevance and relevance['score'] is not None:
+        score = (1 - RELEVANCE_BLEND) * score + RELEVANCE_BLEND * relevance['score']
+    if relevance and relevance['off_target']:
+        suggestions.append(f"This answer reads closer to \"{relevance['closest']['prompt']}\"; make sure it answers the question asked.")
 
     penalty = 0.0
     negative_details = []
     for label, patterns in rubric.get('negative_keywords', {}).items():
-        hits = [p for p in patterns if p in transcript_lower]
+        hits = [p for p in patterns if index.contains(p)]
         if hits:
             negative_details.extend(hits)
             penalty += min(0.12 * len(hits), 0.25)
@@ -788,6 +937,7 @@ def analyze_question_alignment(
         'strengths': strengths,
         'penalty': penalty,
         'negative_hits': negative_details,
+        'relevance': relevance,
     }
 
 
@@ -834,27 +984,40 @@ def build_history_snapshots(history: List[Any]) -> List[Dict[str, Any]]:
             snapshot["star_coverage"] = safe_float(star_info.get("coverage"))
             result_info = _ensure_dict(explanations.get("result_strength"))
             snapshot["result_strength"] = safe_float(result_info.get("score"))
-        else:
-            # derive lightweight metrics from transcript when explanations are absent
-            if transcript:
-                fill = filler_stats(transcript)
-                hed = hedge_stats(transcript)
-                res = result_strength(transcript)
-                star = star_segments(transcript)
-                star["tags"]["r"] = res["score"] >= 0.35
-                star["coverage"] = sum(1 for v in star["tags"].values() if v)
-                snapshot["fillers_per_100w"] = fill["per_100w"]
-                snapshot["hedges_per_100w"] = hed["per_100w"]
-                snapshot["result_strength"] = res["score"]
-                snapshot["star_coverage"] = star["coverage"]
-                tokens = tokenize_words(transcript)
-                if duration:
-                    minutes = max(0.001, duration / 60.0)
-                    snapshot["wpm"] = len(tokens) / minutes
+        elif transcript:
+            snapshot.update(_transcript_snapshot(transcript, duration))
         snapshots.append(snapshot)
     return snapshots
 
 
+@lru_cache(maxsize=4096)
+def _transcript_snapshot_cached(transcript: str, duration: Optional[float]) -> Tuple[Tuple[str, float], ...]:
+    fill = filler_stats(transcript)
+    hed = hedge_stats(transcript)
+    res = result_strength(transcript)
+    star = star_segments(transcript)
+    star["tags"]["r"] = res["score"] >= 0.35
+    metrics = {
+        "fillers_per_100w": fill["per_100w"],
+        "hedges_per_100w": hed["per_100w"],
+        "result_strength": res["score"],
+        "star_coverage": sum(1 for v in star["tags"].values() if v),
+    }
+    if duration:
+        minutes = max(0.001, duration / 60.0)
+        metrics["wpm"] = len(tokenize_words(transcript)) / minutes
+    return tuple(metrics.items())
+
+
+def _transcript_snapshot(transcript: str, duration: Optional[float]) -> Dict[str, Any]:
+    """Lightweight metrics derived from a history transcript when explanations are absent.
+
+    Clients resend the whole history with every answer, so these are cached by
+    transcript instead of being re-derived each time.
+    """
+    return dict(_transcript_snapshot_cached(transcript, duration))
+
+
 def make_history_summary(
     snapshots: List[Dict[str, Any]],
     current_metrics: Dict[str, Any],
@@ -869,6 +1032,7 @@ def make_history_summary(
         "metric_deltas": {},
         "persisting_flags": [],
         "last_metrics": snapshots[0] if snapshots else {},
+        "progress": None,
     }
     if not snapshots:
         return summary
@@ -906,6 +1070,14 @@ def make_history_summary(
     if last.get("star_coverage") is not None and current_metrics["star"]["coverage"] < 3 and last["star_coverage"] < 3:
         persisting.append("structure")
     summary["persisting_flags"] = persisting
+    summary["progress"] = analyze_progress(snapshot_matrix(snapshots), {
+        "total": current_total,
+        "fillers_per_100w": current_metrics["fillers"]["per_100w"],
+        "hedges_per_100w": current_metrics["hedges"]["per_100w"],
+        "result_strength": current_metrics["result"]["score"],
+        "star_coverage": current_metrics["star"]["coverage"],
+        "wpm": current_metrics["wpm"],
+    })
     return summary
 
 
@@ -917,24 +1089,34 @@ def score_answer(
     history: Optional[List[Dict[str, Any]]] = None,
     question_id: Optional[str] = None,
     video_metrics: Optional[Dict[str, Any]] = None,
+    profile: str = RESPONSE_PROFILE,
+    user_id: Optional[str] = None,
+    attempt_id: Optional[str] = None,
 ) -> Dict[str, Any]:
+    if profile not in RESPONSE_PROFILES:
+        raise ValueError(f"Unknown response profile {profile!r}; expected one of {', '.join(RESPONSE_PROFILES)}")
+    # One snapshot for the whole request, even if the config is reloaded meanwhile.
+    cfg = REGISTRY.current()
+    thresholds = cfg.thresholds
+
     tokens = tokenize_words(transcript)
+    index = TranscriptIndex(transcript)
     words = len(tokens)
     minutes = max(0.001, duration_seconds / 60.0)
     wpm = words / minutes
 
-    fillers = filler_stats(transcript)
-    hedges = hedge_stats(transcript)
+    fillers = filler_stats(transcript, index)
+    hedges = hedge_stats(transcript, index)
     actions = action_verb_density(transcript)
     own = ownership_ratio(transcript)
     quant = quantification(transcript)
-    sstats = sentence_stats(transcript)
-    star = star_segments(transcript)
-    res = result_strength(transcript)
-    vag = vagueness_penalty(transcript)
-    reflection = reflection_presence(transcript)
+    sstats = sentence_stats(transcript, index)
+    star = star_segments(transcript, index)
+    res = result_strength(transcript, index)
+    vag = vagueness_penalty(transcript, index)
+    reflection = reflection_presence(transcript, index)
     lexical = lexical_stats(tokens)
-    sequence = star_sequence_signal(transcript)
+    sequence = star_sequence_signal(transcript, index)
 
     question_metrics = {
         'actions_density': actions['density'],
@@ -942,21 +1124,32 @@ def score_answer(
         'has_numbers': quant['has_numbers'],
         'reflection': reflection['has_reflection'],
         'star_coverage': star['coverage'],
-        'has_tradeoffs': keyword_signal(transcript, TRADEOFF_TERMS),
-        'has_requirements': keyword_signal(transcript, REQUIREMENTS_TERMS),
-        'has_reliability': keyword_signal(transcript, RELIABILITY_TERMS),
-        'has_edges': keyword_signal(transcript, EDGE_TERMS),
-        'has_complexity': keyword_signal(transcript, COMPLEXITY_TERMS),
-        'has_scaling': keyword_signal(transcript, SCALING_TERMS),
-        'has_data': keyword_signal(transcript, DATA_TERMS),
-        'has_api': keyword_signal(transcript, API_TERMS),
+        'has_tradeoffs': index.contains_any(TRADEOFF_TERMS),
+        'has_requirements': index.contains_any(REQUIREMENTS_TERMS),
+        'has_reliability': index.contains_any(RELIABILITY_TERMS),
+        'has_edges': index.contains_any(EDGE_TERMS),
+        'has_complexity': index.contains_any(COMPLEXITY_TERMS),
+        'has_scaling': index.contains_any(SCALING_TERMS),
+        'has_data': index.contains_any(DATA_TERMS),
+        'has_api': index.contains_any(API_TERMS),
     }
-    question_analysis = analyze_question_alignment(question_id, question, transcript, question_metrics)
+    question_analysis = analyze_question_alignment(question_id, question, transcript, question_metrics, cfg, index)
+    # Compared with this user's earlier answers, then added to them.
+    repetition = None
+    if user_id:
+        try:
+            repetition = ANSWER_INDEX.check(user_id, tokens, question_analysis['question_id'], attempt_id)
+        except sqlite3.Error as e:
+            print(f"Could not check {user_id}'s answer for repetition: {e}")
 
     star["tags"]["r"] = res["score"] >= 0.35
     star["coverage"] = sum(1 for v in star["tags"].values() if v)
 
-    snapshots = build_history_snapshots(history or [])
+    history = history or []
+    if profile == "minimal":
+        # Only the latest attempt feeds the score deltas; skip the summary's full pass.
+        history = [entry for entry in history if isinstance(entry, dict)][:1]
+    snapshots = build_history_snapshots(history)
     last_snapshot = snapshots[0] if snapshots else {}
 
     clarity = 1.0
@@ -1016,12 +1209,12 @@ def score_answer(
             conf += 0.06
         elif ec < 0.3:
             conf -= 0.08
-            entry = issue_entry("poor_eye_contact", f"Eye contact was low ({int(ec*100)}%).")
+            entry = issue_entry("poor_eye_contact", f"Eye contact was low ({int(ec*100)}%).", cfg)
             if entry: video_issues.append(entry)
             
         if fp < 0.5:
             conf -= 0.1
-            entry = issue_entry("face_not_visible", f"Face only visible in {int(fp*100)}% of frames.")
+            entry = issue_entry("face_not_visible", f"Face only visible in {int(fp*100)}% of frames.", cfg)
             if entry: video_issues.append(entry)
 
         # Cap confidence with video
@@ -1034,8 +1227,8 @@ def score_answer(
 
     sentence_count = len(sstats['sentences'])
     brevity_penalty = 0.0
-    if words < THRESHOLDS.get("min_tokens", 80):
-        brevity_penalty = min(0.7, (THRESHOLDS.get("min_tokens", 80) - words) / 80)
+    if words < thresholds.get("min_tokens", 80):
+        brevity_penalty = min(0.7, (thresholds.get("min_tokens", 80) - words) / 80)
     brevity_factor = max(0.2, 1.0 - brevity_penalty)
     if sentence_count < 2:
         brevity_factor = max(0.2, brevity_factor * 0.5)
@@ -1051,7 +1244,7 @@ def score_answer(
     conf = clamp(conf * (0.6 + 0.4 * alignment) * max(0.35, brevity_factor) - penalty * 0.5)
     pacing = clamp(pacing * (0.5 + 0.5 * alignment) * max(0.35, brevity_factor))
 
-    short_answer = words < THRESHOLDS.get("min_tokens", 80) or sentence_count < 2
+    short_answer = words < thresholds.get("min_tokens", 80) or sentence_count < 2
 
     previous_fillers = last_snapshot.get("fillers_per_100w")
     previous_result = last_snapshot.get("result_strength")
@@ -1123,48 +1316,50 @@ def score_answer(
             subscores_raw["technical"] = clamp(subscores_raw["technical"] - penalty)
             subscores_raw["relevance"] = clamp(subscores_raw["relevance"] - penalty * 0.6)
     conciseness_raw = subscores_raw["conciseness"]
-    if duration_seconds > THRESHOLDS.get("ideal_duration", 150) * 1.4:
+    if duration_seconds > thresholds.get("ideal_duration", 150) * 1.4:
         conciseness_raw = clamp(conciseness_raw - 0.2)
         subscores_raw["conciseness"] = conciseness_raw
 
     subscores = {k: round(v * 100, 1) for k, v in subscores_raw.items()}
 
-    weight_sum = sum(weight(k, question_mode) for k in subscores_raw)
+    weight_sum = sum(cfg.weight(k, question_mode) for k in subscores_raw)
     overall = 0.0
     for key, value in subscores_raw.items():
-        overall += value * weight(key, question_mode)
+        overall += value * cfg.weight(key, question_mode)
     overall = round((overall / weight_sum) * 100, 1) if weight_sum else round(sum(subscores.values()) / len(subscores), 1)
 
-    current_metrics = {
-        "fillers": fillers,
-        "hedges": hedges,
-        "result": res,
-        "star": star,
-        "wpm": wpm,
-    }
-    history_summary = make_history_summary(snapshots, current_metrics, overall)
-
     issues: List[Dict[str, str]] = []
     if subscores_raw["structure"] < 0.6:
-        entry = issue_entry("structure_missing", sstats["sentences"][0] if sstats["sentences"] else transcript[:120])
+        entry = issue_entry("structure_missing", sstats["sentences"][0] if sstats["sentences"] else transcript[:120], cfg)
         if entry:
             issues.append(entry)
-    relevance_floor = THRESHOLDS.get("relevance_floor", 0.5)
-    relevance_hard = THRESHOLDS.get("relevance_hard_floor", 0.35)
+    relevance_floor = thresholds.get("relevance_floor", 0.5)
+    relevance_hard = thresholds.get("relevance_hard_floor", 0.35)
     if subscores_raw["relevance"] < relevance_floor:
-        entry = issue_entry("low_relevance", sstats["sentences"][0] if sstats["sentences"] else transcript[:120])
+        entry = issue_entry("low_relevance", sstats["sentences"][0] if sstats["sentences"] else transcript[:120], cfg)
         if entry:
             issues.append(entry)
     if subscores_raw["relevance"] < relevance_hard:
-        entry = issue_entry("off_prompt", sstats["sentences"][0] if sstats["sentences"] else transcript[:120])
+        entry = issue_entry("off_prompt", sstats["sentences"][0] if sstats["sentences"] else transcript[:120], cfg)
+        if entry:
+            issues.append(entry)
+    similarity = question_analysis.get('relevance') or {}
+    if similarity.get('off_target'):
+        entry = issue_entry("different_question", f"Closer to: {similarity['closest']['prompt']}", cfg)
+        if entry:
+            issues.append(entry)
+    # Re-recording the same question is practice; the same script for a different one is not.
+    if repetition and repetition['duplicate'] and not repetition['matched']['same_question']:
+        earlier = repetition['matched']['question_id'] or 'another question'
+        entry = issue_entry("repeated_answer", f"{round(repetition['similarity'] * 100)}% the same as your answer to {earlier}", cfg)
         if entry:
             issues.append(entry)
     if subscores_raw["conciseness"] < 0.55:
-        entry = issue_entry("rambling", sstats["sentences"][-1] if sstats["sentences"] else transcript[-120:])
+        entry = issue_entry("rambling", sstats["sentences"][-1] if sstats["sentences"] else transcript[-120:], cfg)
         if entry:
             issues.append(entry)
-    if fillers["per_100w"] > THRESHOLDS.get("max_filler_per_100", 2.5):
-        entry = issue_entry("filler_heavy", ", ".join(f"{term} ({cnt})" for term, cnt in fillers["details"][:3]))
+    if fillers["per_100w"] > thresholds.get("max_filler_per_100", 2.5):
+        entry = issue_entry("filler_heavy", ", ".join(f"{term} ({cnt})" for term, cnt in fillers["details"][:3]), cfg)
         if entry:
             issues.append(entry)
     
@@ -1185,6 +1380,40 @@ def score_answer(
     if video_metrics and video_metrics.get("eye_contact_score", 0) > 0.75:
         strengths.append("Strong eye contact engaged the audience.")
 
+    response: Dict[str, Any] = {
+        "overallScore": overall,
+        "subscores": subscores,
+        "issues": issues,
+        "suggestions": suggestions,
+        "strengths": strengths[:5],
+        "config_version": cfg.version,
+    }
+    if user_id:
+        response["repetition"] = repetition
+    if profile == "minimal":
+        return response
+
+    current_metrics = {
+        "fillers": fillers,
+        "hedges": hedges,
+        "result": res,
+        "star": star,
+        "wpm": wpm,
+    }
+    response["history_summary"] = make_history_summary(snapshots, current_metrics, overall)
+    response["question_alignment"] = question_analysis
+    response["explain"] = {
+        "weights": thaw(cfg.mode_weights.get(question_mode, cfg.weights)),
+        "signals": {
+            "starCoverage": star["coverage"],
+            "resultStrength": res["score"],
+            "fillerRate": fillers["per_100w"],
+            "hedgeRate": hedges["per_100w"],
+            "wpm": wpm,
+            "avgSentenceLength": sstats["avg_len"],
+        },
+    }
+
     explanations = {
         "wpm": round(wpm, 1),
         "avg_sentence_len": round(sstats["avg_len"], 1),
@@ -1199,45 +1428,23 @@ def score_answer(
         "vagueness": vag,
         "lexical": lexical,
         "reflection": reflection,
-        "question_alignment": question_analysis,
-        "video_metrics": video_metrics
     }
-
     detected = {
         "fillers": fillers["details"],
         "hedges": hedges["details"],
         "action_verbs": actions["examples"],
         "numbers": quant["numbers"],
         "time_terms": quant["time_terms"],
-        "sentences": sstats["sentences"],
         "reflection_phrases": reflection["phrases"],
-        "question_alignment": question_analysis,
-    }
-
-    explain = {
-        "weights": MODE_WEIGHTS.get(question_mode, WEIGHTS),
-        "signals": {
-            "starCoverage": star["coverage"],
-            "resultStrength": res["score"],
-            "fillerRate": fillers["per_100w"],
-            "hedgeRate": hedges["per_100w"],
-            "wpm": wpm,
-            "avgSentenceLength": sstats["avg_len"],
-        },
-    }
-
-    legacy_scores = {**subscores, "total": overall}
-
-    return {
-        "overallScore": overall,
-        "subscores": subscores,
-        "issues": issues,
-        "explain": explain,
-        "scores": legacy_scores,
-        "explanations": explanations,
-        "detected": detected,
-        "suggestions": suggestions,
-        "strengths": strengths[:5],
-        "history_summary": history_summary,
-        "question_alignment": question_analysis,
     }
+    response["explanations"] = explanations
+    response["detected"] = detected
+    if profile == "standard":
+        return response
+
+    explanations["question_alignment"] = question_analysis
+    explanations["video_metrics"] = video_metrics
+    detected["sentences"] = sstats["sentences"]
+    detected["question_alignment"] = question_analysis
+    response["scores"] = {**subscores, "total": overall}
+    return response
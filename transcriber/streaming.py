@@ -0,0 +1,114 @@
+"""Progressive ``/transcribe`` responses.
+
+With ``stream=ndjson`` (one JSON object per line) or ``stream=sse``
+(Server-Sent Events) the request is answered as the pipeline goes instead of
+after it: every Whisper segment as soon as it is decoded, provisional scores
+for the transcript so far every ``PROVISIONAL_SCORE_SECONDS`` of audio, the
+video metrics, and finally the same payload the plain JSON response carries.
+
+Events, in order::
+
+    segment      {"index", "start", "end", "text"}            (repeated)
+    provisional  {"audio_seconds", "words", "overallScore", "subscores"}  (repeated)
+    video        video metrics, when the upload has video
+    result       the full response
+    error        {"error", "status"} in place of result if the run fails
+"""
+import asyncio
+import os
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from pipeline import EventCallback
+from responses import dumps
+from scoring import score_answer, tokenize_words
+
+STREAM_FORMATS = ("ndjson", "sse")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+# Seconds of decoded audio between provisional scores; 0 disables them.
+PROVISIONAL_SCORE_SECONDS = float(os.environ.get("PROVISIONAL_SCORE_SECONDS", "15"))
+
+
+def encode_event(fmt: str, event: str, data: Any) -> bytes:
+    if fmt == "sse":
+        return b"event: " + event.encode("ascii") + b"\ndata: " + dumps(data) + b"\n\n"
+    return dumps({"event": event, "data": data}) + b"\n"
+
+
+class ProvisionalScorer:
+    """Passes pipeline events on, adding a running score every ``interval`` seconds of audio."""
+
+    def __init__(
+        self,
+        emit: EventCallback,
+        question: str,
+        question_id: Optional[str] = None,
+        history: Optional[List[Any]] = None,
+        interval: float = PROVISIONAL_SCORE_SECONDS,
+    ):
+        self.emit = emit
+        self.question = question
+        self.question_id = question_id
+        self.history = history
+        self.interval = interval
+        self.texts: List[str] = []
+        self.scored_at = 0.0
+
+    def __call__(self, event: str, data: Dict[str, Any]) -> None:
+        self.emit(event, data)
+        if event != "segment":
+            return
+        self.texts.append(data["text"])
+        if self.interval > 0 and data["end"] - self.scored_at >= self.interval:
+            self.scored_at = data["end"]
+            self.emit("provisional", self.score(data["end"]))
+
+    def score(self, audio_seconds: float) -> Dict[str, Any]:
+        transcript = " ".join(self.texts).strip()
+        # Minimal profile and no user_id: cheap, and the partial answer is not
+        # fingerprinted for duplicate detection.
+        scoring = score_answer(
+            self.question,
+            transcript,
+            max(1, int(audio_seconds)),
+            self.history,
+            question_id=self.question_id,
+            profile="minimal",
+        )
+        return {
+            "audio_seconds": round(audio_seconds, 2),
+            "words": len(tokenize_words(transcript)),
+            "overallScore": scoring["overallScore"],
+            "subscores": scoring["subscores"],
+        }
+
+
+async def stream_events(fmt: str, run: Callable[[EventCallback], Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Run ``run(emit)`` in the thread pool and yield its events, then its result, encoded as ``fmt``.
+
+    ``run`` may raise an exception with a ``status_code`` attribute (admission
+    rejections); the status is reported in the error event because the HTTP
+    status has already been sent.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data: Dict[str, Any]) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    task = asyncio.ensure_future(run_in_threadpool(run, emit))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    while True:
+        item = await queue.get()
+        if item is None:
+            break
+        yield encode_event(fmt, *item)
+    try:
+        result = task.result()
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        yield encode_event(fmt, "error", {"error": str(e), "status": getattr(e, "status_code", 500)})
+        return
+    yield encode_event(fmt, "result", result)
@@ -0,0 +1,104 @@
+import threading
+import time
+import unittest
+
+from admission import ASYNC, SYNC, AdmissionController, AdmissionRejected, CostEstimate, CostModel
+from media import MediaProbe
+
+
+def probe(seconds=60.0, audio=True, video=False, width=0, height=0):
+    return MediaProbe("webm", audio, video, duration_seconds=seconds, width=width, height=height)
+
+
+def estimate(seconds):
+    return CostEstimate(media_seconds=seconds, stages={}, seconds=seconds)
+
+
+class CostModelTests(unittest.TestCase):
+    def test_estimate_covers_only_present_streams(self):
+        model = CostModel({"decode": 0.1, "transcribe": 0.5, "video": 0.2, "score": 0.0})
+        cost = model.estimate(probe(60, audio=True, video=False))
+        self.assertEqual(cost.stages, {"decode": 6.0, "transcribe": 30.0, "video": 0.0, "score": 0.0})
+        self.assertEqual(cost.seconds, 36.0)
+
+        cost = model.estimate(probe(10, audio=False, video=True, width=1280, height=720))
+        self.assertEqual(cost.stages["transcribe"], 0.0)
+        self.assertEqual(cost.stages["video"], 10 * 0.2 * 4)
+
+    def test_missing_duration_falls_back_to_client_value(self):
+        model = CostModel({"decode": 0.0, "transcribe": 1.0, "video": 0.0, "score": 0.0})
+        self.assertEqual(model.estimate(probe(None), fallback_seconds=45).seconds, 45.0)
+
+    def test_estimated_duration_is_a_floor_for_the_client_value(self):
+        model = CostModel({"decode": 0.0, "transcribe": 1.0, "video": 0.0, "score": 0.0})
+        webm = MediaProbe("webm", True, False, duration_seconds=300.0, duration_estimated=True)
+        self.assertEqual(model.estimate(webm, fallback_seconds=1).seconds, 300.0)
+        self.assertEqual(model.estimate(webm, fallback_seconds=400).seconds, 400.0)
+        # A duration from the header is used as is.
+        self.assertEqual(model.estimate(probe(60), fallback_seconds=1).seconds, 60.0)
+
+    def test_observe_moves_factors_toward_measured(self):
+        model = CostModel({"decode": 0.1, "transcribe": 0.5, "video": 0.2, "score": 0.0}, smoothing=0.5)
+        model.observe(probe(100), {"decode_seconds": 10.0, "transcribe_seconds": 10.0, "score_seconds": 0.5})
+        self.assertAlmostEqual(model.rtf["decode"], 0.1)
+        self.assertAlmostEqual(model.rtf["transcribe"], 0.3)
+        # No video stream: its factor is left alone.
+        self.assertAlmostEqual(model.rtf["video"], 0.2)
+        self.assertEqual(model.snapshot()["observations"], 1)
+
+
+class AdmissionControllerTests(unittest.TestCase):
+    def controller(self, **settings):
+        settings = {"max_cost": 100, "request_budget": 10, "global_budget": 20, "queue_timeout": 0.2, "route_async": True, **settings}
+        return AdmissionController(CostModel(), **settings)
+
+    def test_budgets_route_and_reject(self):
+        controller = self.controller()
+        self.assertEqual(controller.decide(estimate(5)), SYNC)
+        self.assertEqual(controller.decide(estimate(50)), ASYNC)
+        with self.assertRaises(AdmissionRejected) as raised:
+            controller.decide(estimate(500))
+        self.assertEqual(raised.exception.status_code, 413)
+
+        strict = self.controller(route_async=False)
+        with self.assertRaises(AdmissionRejected):
+            strict.decide(estimate(50))
+        self.assertEqual(strict.stats()["rejected"], 1)
+
+    def test_reserve_waits_for_room_then_times_out(self):
+        controller = self.controller()
+        started = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with controller.reserve(estimate(15)):
+                started.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        started.wait(5)
+        with controller.reserve(estimate(5)):
+            self.assertEqual(controller.stats()["in_flight"], 2)
+        with self.assertRaises(AdmissionRejected) as raised:
+            with controller.reserve(estimate(10)):
+                pass
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+
+        # Room frees up while waiting: the request goes through.
+        threading.Timer(0.05, release.set).start()
+        begun = time.monotonic()
+        with controller.reserve(estimate(10)):
+            self.assertLess(time.monotonic() - begun, 0.2)
+        thread.join()
+        self.assertEqual(controller.stats()["in_flight_cost_seconds"], 0.0)
+
+    def test_oversized_request_runs_alone(self):
+        controller = self.controller(global_budget=5)
+        with controller.reserve(estimate(50)):
+            self.assertEqual(controller.in_flight, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+import scoring
+from bench_scoring import HISTORY_DETECTORS, build_cases, compare_results, synthetic_transcript
+from scoring import tokenize_words
+
+
+class SyntheticCorpusTests(unittest.TestCase):
+    def test_transcripts_are_reproducible(self):
+        first = synthetic_transcript(500, "technical", seed=3)
+        second = synthetic_transcript(500, "technical", seed=3)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, synthetic_transcript(500, "technical", seed=4))
+
+    def test_transcript_length_tracks_requested_words(self):
+        for words in (50, 1000):
+            count = len(tokenize_words(synthetic_transcript(words, "behavioral")))
+            self.assertGreaterEqual(count, words * 0.9)
+            self.assertLessEqual(count, words * 1.3)
+
+    def test_cases_cover_modes_and_histories(self):
+        cases = build_cases([50], [0, 3])
+        self.assertEqual({c.mode for c in cases}, {"behavioral", "technical", "system_design"})
+        self.assertEqual({c.history_len for c in cases}, {0, 3})
+        self.assertTrue(all(len(c.history) == c.history_len for c in cases))
+
+    def test_cold_history_benchmark_misses_the_snapshot_memo(self):
+        case = build_cases([50], [3])[0]
+        memo = scoring._transcript_snapshot_cached
+        HISTORY_DETECTORS["build_history_snapshots_warm"](case)
+        misses = memo.cache_info().misses
+        HISTORY_DETECTORS["build_history_snapshots_warm"](case)
+        self.assertEqual(memo.cache_info().misses, misses)
+        # cache_clear() also resets the counters: every entry is derived again.
+        HISTORY_DETECTORS["build_history_snapshots"](case)
+        self.assertEqual((memo.cache_info().hits, memo.cache_info().misses), (0, 3))
+
+
+class RegressionCheckTests(unittest.TestCase):
+    def test_flags_only_slowdowns_past_tolerance(self):
+        baseline = [
+            {"id": "a/x", "benchmark": "a", "median_us": 100.0},
+            {"id": "b/x", "benchmark": "b", "median_us": 100.0},
+        ]
+        current = [
+            {"id": "a/x", "benchmark": "a", "median_us": 120.0},
+            {"id": "b/x", "benchmark": "b", "median_us": 120.0},
+        ]
+        thresholds = {"default_tolerance": 0.25, "tolerances": {"b": 0.1}}
+        regressions = compare_results(current, baseline, thresholds)
+        self.assertEqual([r["id"] for r in regressions], ["b/x"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from bulk import ERROR, OK, Throughput, completed_ids, discover, load_items, run_bulk
+from test_media import write_wav
+
+
+def fake_process(item, probe, profile):
+    if "bad" in item["id"]:
+        return {"id": item["id"], "path": item["path"], "status": ERROR, "error": "boom", "media_seconds": probe.duration_seconds}
+    return {
+        "id": item["id"],
+        "path": item["path"],
+        "status": OK,
+        "media_seconds": probe.duration_seconds,
+        "result": {"question": item["question"], "profile": profile},
+    }
+
+
+def crashing_process(item, probe, profile):
+    if "bad" in item["id"]:
+        os._exit(1)
+    return fake_process(item, probe, profile)
+
+
+class BulkTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "media")
+        os.makedirs(os.path.join(self.root, "b"))
+        write_wav(os.path.join(self.root, "a.wav"), seconds=0.5)
+        write_wav(os.path.join(self.root, "b", "bad.wav"), seconds=0.5)
+        write_wav(os.path.join(self.root, "b", "c.wav"), seconds=1.0)
+        with open(os.path.join(self.root, "notes.txt"), "w") as fh:
+            fh.write("not media")
+        self.output = os.path.join(self.tmp.name, "out", "results.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_items(self, items, **kwargs):
+        lines = []
+        kwargs.setdefault("process", fake_process)
+        stats = run_bulk(items, self.output, lambda: ThreadPoolExecutor(max_workers=2), 2, report=lines.append, **kwargs)
+        return stats, lines
+
+    def records(self):
+        with open(self.output) as fh:
+            return [json.loads(line) for line in fh]
+
+    def test_discover_walks_media_only(self):
+        self.assertEqual(
+            [os.path.relpath(p, self.root) for p in discover(self.root)],
+            ["a.wav", os.path.join("b", "bad.wav"), os.path.join("b", "c.wav")],
+        )
+
+    def test_manifest_paths_are_relative_to_it(self):
+        manifest = os.path.join(self.tmp.name, "manifest.jsonl")
+        with open(manifest, "w") as fh:
+            fh.write(json.dumps({"path": "media/a.wav", "question": "Why us?"}) + "\n")
+            fh.write("# comment\n\nmedia/b/c.wav\n")
+        items = load_items(manifest, question="Default?")
+        self.assertEqual([i["id"] for i in items], ["media/a.wav", "media/b/c.wav"])
+        self.assertEqual([i["question"] for i in items], ["Why us?", "Default?"])
+        self.assertTrue(os.path.exists(items[1]["path"]))
+
+    def test_results_are_appended_and_a_rerun_resumes(self):
+        items = load_items(self.root, question="Q")
+        items.append({"id": "missing.wav", "path": os.path.join(self.root, "missing.wav"), "question": "Q"})
+        stats, lines = self.run_items(items)
+        self.assertEqual((stats["done"], stats["failed"], stats["unreadable"]), (3, 1, 1))
+        self.assertEqual(sorted(r["status"] for r in self.records()), [ERROR, ERROR, OK, OK])
+        self.assertIn("ETA", lines[-1])
+
+        # A crash mid-write leaves a partial line; it is ignored and failures are retried.
+        with open(self.output, "a") as fh:
+            fh.write('{"id": "a.wa')
+        self.assertEqual(completed_ids(self.output), {"a.wav", os.path.join("b", "c.wav")})
+        stats, lines = self.run_items(items)
+        self.assertEqual((stats["done"], stats["unreadable"]), (1, 1))
+        self.assertIn("2 already done, 2 to process", lines[0])
+        # Records appended after the partial line are intact.
+        self.assertEqual(len(completed_ids(self.output, retry_failed=False)), 4)
+
+        stats, _ = self.run_items(items, retry_failed=False)
+        self.assertEqual((stats["done"], stats["unreadable"]), (0, 0))
+
+
+    def test_a_dead_worker_process_fails_its_item_and_the_run_continues(self):
+        items = load_items(self.root, question="Q")
+        opened = []
+
+        def open_executor():
+            opened.append(ProcessPoolExecutor(max_workers=1))
+            return opened[-1]
+
+        lines = []
+        stats = run_bulk(items, self.output, open_executor, 1, process=crashing_process, report=lines.append, in_flight=1)
+        self.assertEqual((stats["done"], stats["failed"]), (3, 1))
+        records = {r["id"]: r for r in self.records()}
+        self.assertIn("worker process died", records[os.path.join("b", "bad.wav")]["error"])
+        self.assertEqual(records[os.path.join("b", "c.wav")]["status"], OK)
+        self.assertEqual(len(opened), 2)
+
+
+class ThroughputTests(unittest.TestCase):
+    def test_eta_from_media_seconds(self):
+        now = [0.0]
+        meter = Throughput(total_items=4, total_media_seconds=400.0, clock=lambda: now[0])
+        self.assertIsNone(meter.snapshot()["eta_seconds"])
+        now[0] = 50.0
+        meter.record({"status": OK, "media_seconds": 100.0})
+        snapshot = meter.snapshot()
+        self.assertEqual((snapshot["x_realtime"], snapshot["eta_seconds"]), (2.0, 150.0))
+        self.assertEqual(snapshot["items_per_minute"], 1.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from config_registry import ConfigRegistry
+from question_bank import QuestionBankStore
+
+DEFAULT = {"weights": {"structure": 1.0}, "thresholds": {"min_tokens": 80}, "issues": {}}
+
+
+class ConfigRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_path = Path(self.tmp.name) / "scoring_config.json"
+        self.bank_path = Path(self.tmp.name) / "question_bank.json"
+        self._write_config({"weights": {"structure": 0.5, "relevance": 0.5}, "mode_weights": {"technical": {"structure": 0.2}}})
+        self.bank_path.write_text(json.dumps([{"slug": "q1", "prompt": "Tell me about X.", "mode": "behavioral"}]))
+        self.store = QuestionBankStore(str(Path(self.tmp.name) / "questions.sqlite3"))
+        self.registry = ConfigRegistry(self.config_path, self.bank_path, DEFAULT, self.store, poll_seconds=0)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def _write_config(self, config):
+        self.config_path.write_text(json.dumps(config))
+        # Bump the mtime explicitly; filesystem timestamps can be coarser than the test.
+        stat = self.config_path.stat()
+        os.utime(self.config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_snapshot_precompiles_mode_weights(self):
+        snapshot = self.registry.current()
+        self.assertEqual(snapshot.weight("structure", "technical"), 0.2)
+        self.assertEqual(snapshot.weight("relevance", "technical"), 0.5)
+        self.assertEqual(snapshot.weight("structure", "behavioral"), 0.5)
+        self.assertEqual(snapshot.weight("unknown"), 0.0)
+        self.assertEqual(snapshot.question_bank.slug_for_prompt("Tell me about X."), "q1")
+
+    def test_snapshot_is_immutable(self):
+        snapshot = self.registry.current()
+        with self.assertRaises(TypeError):
+            snapshot.weights["structure"] = 1.0
+        with self.assertRaises(AttributeError):
+            snapshot.version = "other"
+
+    def test_reload_swaps_and_keeps_old_snapshot_intact(self):
+        before = self.registry.current()
+        self.assertFalse(self.registry.reload())
+        self._write_config({"weights": {"structure": 0.9, "relevance": 0.1}})
+        self.assertTrue(self.registry.reload())
+        after = self.registry.current()
+        self.assertNotEqual(before.version, after.version)
+        self.assertEqual(after.generation, before.generation + 1)
+        self.assertEqual(after.weight("structure"), 0.9)
+        # A request holding the old snapshot still sees the old rules.
+        self.assertEqual(before.weight("structure"), 0.5)
+
+    def test_invalid_config_is_rejected(self):
+        before = self.registry.current()
+        self._write_config({"weights": {"structure": "heavy"}})
+        self.assertFalse(self.registry.reload())
+        self.assertIs(self.registry.current(), before)
+        self.assertIn("weights.structure", self.registry.last_error)
+
+        self.config_path.write_text("{not json")
+        self.assertFalse(self.registry.reload(force=True))
+        self.assertIs(self.registry.current(), before)
+
+    def test_duplicate_question_slugs_are_rejected(self):
+        self.bank_path.write_text(json.dumps([{"slug": "q1", "prompt": "A"}, {"slug": "q1", "prompt": "B"}]))
+        self.assertFalse(self.registry.reload(force=True))
+        self.assertIn("duplicate", self.registry.last_error)
+        self.assertEqual(self.store.get("q1")["prompt"], "Tell me about X.")
+
+    def _write_bank(self, library):
+        self.bank_path.write_text(json.dumps(library))
+        stat = self.bank_path.stat()
+        os.utime(self.bank_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_old_snapshot_keeps_its_question_bank(self):
+        before = self.registry.current()
+        self._write_bank([{"slug": "q2", "prompt": "Tell me about Y."}])
+        self.assertTrue(self.registry.reload())
+        after = self.registry.current()
+        self.assertEqual(before.question_bank.get("q1")["prompt"], "Tell me about X.")
+        self.assertIsNone(before.question_bank.slug_for_prompt("Tell me about Y."))
+        self.assertIsNone(after.question_bank.get("q1"))
+        self.assertEqual(after.question_bank.slug_for_prompt("Tell me about Y."), "q2")
+        self.assertIsNone(self.store.get("q1"))
+
+    def test_failed_build_leaves_the_store_untouched(self):
+        def fail(library):
+            raise ValueError("cannot index")
+
+        before = self.registry.current()
+        self.registry.relevance_builder = fail
+        self._write_bank([{"slug": "q2", "prompt": "Tell me about Y."}])
+        self.assertFalse(self.registry.reload())
+        self.assertIs(self.registry.current(), before)
+        self.assertIsNotNone(self.store.get("q1"))
+        self.assertIsNone(self.store.get("q2"))
+
+    def test_live_inserts_are_visible_to_the_current_snapshot(self):
+        self.store.upsert({"slug": "company-1", "prompt": "Why do you want to join us?"})
+        bank = self.registry.current().question_bank
+        self.assertEqual(bank.slug_for_prompt("Why do you want to join us?"), "company-1")
+        self.store.upsert({"slug": "q1", "prompt": "Tell me about X, in detail."})
+        self.assertEqual(bank.get("q1")["prompt"], "Tell me about X, in detail.")
+
+
+class ScoreAnswerVersionTests(unittest.TestCase):
+    def test_response_is_stamped_with_config_version(self):
+        from scoring import REGISTRY, score_answer
+
+        result = score_answer("Tell me about a failure and what you learned.", "I failed. I learned a lot.", 40)
+        self.assertEqual(result["config_version"], REGISTRY.current().version)
+
+
+if __name__ == "__main__":
+    unittest.main()
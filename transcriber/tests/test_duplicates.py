@@ -0,0 +1,154 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import scoring
+from duplicates import AnswerIndex, MinHasher
+from scoring import score_answer, tokenize_words
+
+VOCAB = [f"w{i}" for i in range(3000)]
+
+SCRIPT = (
+    "At my last internship our checkout service kept timing out during the holiday sale. "
+    "My task was to restore performance before the next campaign without adding servers. "
+    "I profiled the slow queries, added a covering index and batched the inventory calls. "
+    "As a result p95 latency dropped by forty percent and the sale ran without a single outage. "
+    "I learned to measure before changing anything."
+)
+
+
+def shingle_jaccard(a, b):
+    sa = {tuple(a[i:i + 3]) for i in range(len(a) - 2)}
+    sb = {tuple(b[i:i + 3]) for i in range(len(b) - 2)}
+    return len(sa & sb) / len(sa | sb)
+
+
+class MinHasherTests(unittest.TestCase):
+    def test_signature_agreement_estimates_jaccard(self):
+        hasher = MinHasher()
+        rng = random.Random(7)
+        for step in (4, 10, 30):
+            base = [rng.choice(VOCAB) for _ in range(300)]
+            edited = list(base)
+            for i in range(0, len(edited), step):
+                edited[i] = rng.choice(VOCAB)
+            estimate = hasher.similarity(hasher.signature(base), hasher.signature(edited))
+            self.assertAlmostEqual(estimate, shingle_jaccard(base, edited), delta=0.15)
+
+    def test_signatures_are_stable_across_instances(self):
+        tokens = tokenize_words(SCRIPT)
+        self.assertEqual(MinHasher().signature(tokens).tolist(), MinHasher().signature(tokens).tolist())
+
+
+class AnswerIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = AnswerIndex(os.path.join(self.tmp.name, "answers.sqlite3"), per_user=5)
+        self.rng = random.Random(3)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def answer(self, words=120):
+        return [self.rng.choice(VOCAB) for _ in range(words)]
+
+    def test_rerecorded_answer_is_flagged(self):
+        first = tokenize_words(SCRIPT)
+        self.assertEqual(self.index.check("u1", first, "challenge-star")["candidates"], 0)
+        rerecorded = tokenize_words(SCRIPT.replace("forty percent", "about forty percent").replace("At my", "So at my"))
+        match = self.index.check("u1", rerecorded, "failure")
+        self.assertTrue(match["duplicate"])
+        self.assertGreater(match["similarity"], 0.7)
+        self.assertEqual(match["matched"]["question_id"], "challenge-star")
+        self.assertFalse(match["matched"]["same_question"])
+
+    def test_unrelated_answers_and_other_users_do_not_match(self):
+        self.index.check("u1", tokenize_words(SCRIPT))
+        self.assertFalse(self.index.check("u1", self.answer())["duplicate"])
+        self.assertEqual(self.index.check("u2", tokenize_words(SCRIPT))["candidates"], 0)
+
+    def test_retried_attempt_does_not_match_itself(self):
+        tokens = tokenize_words(SCRIPT)
+        self.index.check("u1", tokens, attempt_id="job-1")
+        self.assertEqual(self.index.check("u1", tokens, attempt_id="job-1")["similarity"], 0.0)
+        self.assertEqual(self.index.count("u1"), 1)
+
+    def test_short_answers_are_not_fingerprinted(self):
+        self.assertIsNone(self.index.check("u1", tokenize_words("I fixed a bug.")))
+        self.assertEqual(self.index.count(), 0)
+
+    def test_size_is_bounded_per_user(self):
+        old = self.answer()
+        self.index.check("u1", old)
+        for _ in range(6):
+            self.index.check("u1", self.answer())
+        self.assertEqual(self.index.count("u1"), 5)
+        # The oldest attempt was evicted along with its buckets.
+        self.assertEqual(self.index.check("u1", old, record=False)["candidates"], 0)
+        self.assertEqual(self.index.forget("u1"), 5)
+
+    def test_expired_answers_of_every_user_are_dropped(self):
+        # More rows than SQLite will bind in one statement.
+        with self.index._transaction() as conn:
+            for n in range(1500):
+                signature_id = conn.execute(
+                    "INSERT INTO answer_signatures (user_id, attempt_id, signature, created_at) VALUES (?, ?, x'00', 0)",
+                    (f"user-{n}", "old"),
+                ).lastrowid
+                conn.execute("INSERT INTO answer_bands VALUES (?, 0, 0, ?)", (f"user-{n}", signature_id))
+        self.index.check("u1", self.answer())
+        self.assertEqual(self.index.count(), 1)
+        self.assertEqual(self.index._conn.execute("SELECT COUNT(*) FROM answer_bands").fetchone()[0], self.index.hasher.bands)
+
+    def test_forget_deletes_in_chunks(self):
+        with mock.patch("duplicates.DELETE_CHUNK", 2):
+            for _ in range(5):
+                self.index.check("u1", self.answer())
+            self.assertEqual(self.index.forget("u1"), 5)
+        self.assertEqual(self.index._conn.execute("SELECT COUNT(*) FROM answer_bands").fetchone()[0], 0)
+
+    def test_persists_and_resets_on_new_hash_parameters(self):
+        self.index.check("u1", tokenize_words(SCRIPT))
+        path = self.index.db_path
+        self.index.close()
+        self.assertEqual(AnswerIndex(path).count(), 1)
+        self.index = AnswerIndex(path, hasher=MinHasher(permutations=64, bands=16))
+        self.assertEqual(self.index.count(), 0)
+
+
+class ScoringRepetitionTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(scoring, "ANSWER_INDEX", AnswerIndex(os.path.join(self.tmp.name, "a.sqlite3")))
+        self.index = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self.index.close)
+
+    def score(self, question_id, user_id="candidate-1"):
+        return score_answer("", SCRIPT, 120, question_id=question_id, user_id=user_id)
+
+    def test_same_script_for_another_question_is_an_issue(self):
+        self.assertFalse(self.score("challenge-star")["repetition"]["duplicate"])
+        retake = self.score("challenge-star")
+        self.assertTrue(retake["repetition"]["duplicate"])
+        self.assertFalse(any("same as your answer" in issue["evidenceSnippet"] for issue in retake["issues"]))
+        reused = self.score("failure")
+        self.assertTrue(any(issue["evidenceSnippet"].endswith("answer to challenge-star") for issue in reused["issues"]))
+
+    def test_anonymous_answers_are_not_indexed(self):
+        self.assertNotIn("repetition", self.score("challenge-star", user_id=None))
+        self.assertEqual(self.index.count(), 0)
+
+    def test_broken_index_still_scores(self):
+        self.index.close()
+        result = self.score("challenge-star")
+        self.assertIsNone(result["repetition"])
+        self.assertGreater(result["overallScore"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
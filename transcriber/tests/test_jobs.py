@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from jobs import (
+    FAILED,
+    RUNNING,
+    SCORE,
+    SUCCEEDED,
+    TRANSCRIBE,
+    FileJobQueue,
+    JobWorker,
+    SQLiteJobQueue,
+    open_queue,
+)
+
+
+class QueueContract:
+    """Behaviour every queue backend must share; mixed into one TestCase per backend."""
+
+    def make_queue(self, root, max_attempts=3):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = self.make_queue(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _media(self):
+        fd, path = tempfile.mkstemp(dir=self.tmp.name, suffix=".webm")
+        os.close(fd)
+        return path
+
+    def test_claims_in_fifo_order_once(self):
+        first = self.queue.enqueue(TRANSCRIBE, {"n": 1})
+        second = self.queue.enqueue(TRANSCRIBE, {"n": 2})
+        self.assertEqual(self.queue.claim("w1")["id"], first)
+        self.assertEqual(self.queue.claim("w2")["id"], second)
+        self.assertIsNone(self.queue.claim("w3"))
+
+    def test_claim_filters_by_kind(self):
+        self.queue.enqueue(TRANSCRIBE, {})
+        score_id = self.queue.enqueue(SCORE, {})
+        self.assertEqual(self.queue.claim("w1", kinds=[SCORE])["id"], score_id)
+        self.assertIsNone(self.queue.claim("w1", kinds=[SCORE]))
+
+    def test_expired_lease_is_retried_by_another_worker(self):
+        job_id = self.queue.enqueue(TRANSCRIBE, {})
+        stale = self.queue.claim("dead-worker", lease_seconds=0.01)
+        time.sleep(0.05)
+        fresh = self.queue.claim("live-worker")
+        self.assertEqual(fresh["id"], job_id)
+        self.assertEqual(fresh["attempts"], 2)
+        self.assertFalse(self.queue.heartbeat(job_id, stale["lease_token"]))
+        # The dead worker's late result must not overwrite the live one.
+        self.assertFalse(self.queue.complete(job_id, stale["lease_token"], {"from": "stale"}))
+        self.assertTrue(self.queue.complete(job_id, fresh["lease_token"], {"from": "fresh"}))
+        self.assertFalse(self.queue.complete(job_id, fresh["lease_token"], {"from": "again"}))
+        job = self.queue.get(job_id)
+        self.assertEqual(job["status"], SUCCEEDED)
+        self.assertEqual(job["result"], {"from": "fresh"})
+
+    def test_heartbeat_keeps_lease(self):
+        job_id = self.queue.enqueue(TRANSCRIBE, {})
+        job = self.queue.claim("w1", lease_seconds=0.2)
+        for _ in range(3):
+            time.sleep(0.1)
+            self.assertTrue(self.queue.heartbeat(job_id, job["lease_token"], lease_seconds=0.2))
+        self.assertIsNone(self.queue.claim("w2"))
+        self.assertEqual(self.queue.get(job_id)["status"], RUNNING)
+
+    def test_gives_up_after_max_attempts(self):
+        queue = self.make_queue(os.path.join(self.tmp.name, "limited"), max_attempts=2)
+        media = self._media()
+        job_id = queue.enqueue(TRANSCRIBE, {}, media_path=media)
+        for _ in range(2):
+            self.assertIsNotNone(queue.claim("w", lease_seconds=0.01))
+            time.sleep(0.03)
+        self.assertIsNone(queue.claim("w"))
+        job = queue.get(job_id)
+        self.assertEqual(job["status"], FAILED)
+        self.assertFalse(os.path.exists(media))
+
+    def test_worker_records_progress_result_and_cleans_media(self):
+        media = self._media()
+        job_id = self.queue.enqueue(TRANSCRIBE, {"question": "q"}, media_path=media)
+
+        def handler(job, progress):
+            progress("transcribe", 0.5)
+            progress("transcribe", 1.0)
+            return {"question": job["params"]["question"]}
+
+        worker = JobWorker(self.queue, {TRANSCRIBE: handler}, worker_id="w1")
+        self.assertTrue(worker.run_once())
+        job = self.queue.get(job_id)
+        self.assertEqual(job["status"], SUCCEEDED)
+        self.assertEqual(job["worker_id"], "w1")
+        self.assertEqual(job["progress"], {"transcribe": 1.0})
+        self.assertEqual(job["result"], {"question": "q"})
+        self.assertFalse(os.path.exists(media))
+        self.assertFalse(worker.run_once())
+
+    def test_worker_marks_handler_failures(self):
+        job_id = self.queue.enqueue(SCORE, {})
+
+        def handler(job, progress):
+            raise RuntimeError("decode failed")
+
+        JobWorker(self.queue, {SCORE: handler}).run_once()
+        job = self.queue.get(job_id)
+        self.assertEqual(job["status"], FAILED)
+        self.assertEqual(job["error"], "decode failed")
+
+
+class SQLiteJobQueueTests(QueueContract, unittest.TestCase):
+    def make_queue(self, root, max_attempts=3):
+        return SQLiteJobQueue(os.path.join(root, "jobs.sqlite3"), max_attempts=max_attempts)
+
+    def test_migrates_tables_without_lease_columns(self):
+        path = os.path.join(self.tmp.name, "old.sqlite3")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, media_path TEXT NOT NULL, "
+            "params TEXT NOT NULL, progress TEXT NOT NULL DEFAULT '{}', result TEXT, error TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("INSERT INTO jobs (id, status, media_path, params, created_at, updated_at) "
+                     "VALUES ('old', 'queued', '/tmp/x.webm', '{}', 1, 1)")
+        conn.commit()
+        conn.close()
+        job = SQLiteJobQueue(path).claim("w1")
+        self.assertEqual(job["id"], "old")
+        self.assertEqual(job["kind"], TRANSCRIBE)
+
+
+class FileJobQueueTests(QueueContract, unittest.TestCase):
+    def make_queue(self, root, max_attempts=3):
+        return FileJobQueue(os.path.join(root, "queue"), max_attempts=max_attempts)
+
+
+class OpenQueueTests(unittest.TestCase):
+    def test_selects_backend_from_url(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsInstance(open_queue(f"sqlite:///{tmp}/jobs.sqlite3"), SQLiteJobQueue)
+            self.assertIsInstance(open_queue(f"file://{tmp}/queue"), FileJobQueue)
+            with self.assertRaises(ValueError):
+                open_queue("redis://localhost")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from keyword_index import TokenIndex, stem
+from scoring import TranscriptIndex, count_matches, keyword_signal
+
+
+class StemTests(unittest.TestCase):
+    def test_inflections_share_a_stem(self):
+        for forms in (
+            ("scale", "scaled", "scaling", "scales"),
+            ("partition", "partitioning", "partitions", "partitioned"),
+            ("cache", "caching", "cached", "caches"),
+            ("retry", "retries", "retried", "retrying"),
+            ("plan", "planned", "planning"),
+            ("build", "built", "building"),
+            ("index", "indexes", "indices"),
+            ("need", "needed", "needs", "needing"),
+            ("use", "used", "using", "uses"),
+            ("agree", "agreed", "agreeing", "agrees"),
+            ("proceed", "proceeded", "proceeding"),
+            ("stop", "stopped", "stopping"),
+        ):
+            self.assertEqual({stem(f) for f in forms}, {stem(forms[0])}, forms)
+
+    def test_different_words_stay_apart(self):
+        self.assertNotEqual(stem("cost"), stem("costume"))
+        self.assertNotEqual(stem("scale"), stem("escalate"))
+        self.assertNotEqual(stem("hard"), stem("hardware"))
+        self.assertNotEqual(stem("news"), stem("new"))
+        self.assertNotEqual(stem("bias"), stem("bia"))
+
+    def test_auxiliaries_keep_their_tense(self):
+        self.assertNotEqual(stem("were"), stem("are"))
+        self.assertNotEqual(stem("had"), stem("have"))
+        self.assertFalse(TranscriptIndex("We are a small team.").contains_any(["we were"]))
+        self.assertFalse(TranscriptIndex("I have to admit it was fine.").contains("i had to"))
+        self.assertTrue(TranscriptIndex("Last year we were short on staff, so I had to step in.").contains("i had to"))
+
+
+class TokenIndexTests(unittest.TestCase):
+    def test_keywords_match_whole_words_only(self):
+        self.assertFalse(keyword_signal("The costume escalated quickly.", ["cost", "scale"]))
+        self.assertTrue(keyword_signal("We scaled reads by partitioning the table.", ["scale"]))
+        self.assertTrue(keyword_signal("We scaled reads by partitioning the table.", ["partition"]))
+
+    def test_phrases_join_across_spaces_and_hyphens_not_punctuation(self):
+        index = TokenIndex("we made a trade-off. so. i then\nfixed edge cases")
+        self.assertTrue(index.contains("trade off"))
+        self.assertFalse(index.contains("so i"))
+        self.assertTrue(index.contains("i then"))
+        self.assertTrue(index.contains("edge case"))
+        start, end = index.span(index.positions("edge case")[0], "edge case")
+        self.assertEqual(index.text[start:end], "edge cases")
+
+    def test_exact_counts_do_not_stem(self):
+        text = "Um, I liked it, like, um, I mean it was kind of like that."
+        self.assertEqual(
+            count_matches(text, ["um", "like", "i mean", "kind of", "liked"]),
+            [("um", 2), ("like", 2), ("i mean", 1), ("kind of", 1), ("liked", 1)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
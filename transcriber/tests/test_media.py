@@ -0,0 +1,154 @@
+import io
+import os
+import tempfile
+import unittest
+import wave
+
+import av
+import numpy as np
+
+from media import SAMPLE_RATE, decode_media, probe_media
+
+
+def write_wav(path, seconds=1.0, rate=44100):
+    t = np.arange(int(seconds * rate)) / rate
+    samples = (0.25 * np.sin(2 * np.pi * 440 * t) * 32767).astype("<i2")
+    with wave.open(path, "wb") as fh:
+        fh.setnchannels(1)
+        fh.setsampwidth(2)
+        fh.setframerate(rate)
+        fh.writeframes(samples.tobytes())
+
+
+class _Sink(io.RawIOBase):
+    """Write-only stream: without seeking, the muxer can't go back to record a duration."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += bytes(b)
+        return len(b)
+
+
+def write_streamed_webm(path, seconds=3.0, rate=48000):
+    sink = _Sink()
+    container = av.open(sink, "w", format="webm")
+    stream = container.add_stream("libopus", rate=rate)
+    for i in range(int(seconds * rate / 960)):
+        frame = av.AudioFrame.from_ndarray(np.zeros((1, 960), np.int16), format="s16", layout="mono")
+        frame.sample_rate, frame.pts = rate, i * 960
+        for packet in stream.encode(frame):
+            container.mux(packet)
+    for packet in stream.encode():
+        container.mux(packet)
+    container.close()
+    with open(path, "wb") as fh:
+        fh.write(sink.data)
+
+
+def write_video(path, seconds=1, fps=10, width=64, height=48):
+    container = av.open(path, "w")
+    stream = container.add_stream("mpeg4", rate=fps)
+    stream.width, stream.height, stream.pix_fmt = width, height, "yuv420p"
+    for i in range(seconds * fps):
+        frame = av.VideoFrame.from_ndarray(np.full((height, width, 3), i * 10, np.uint8), format="rgb24")
+        for packet in stream.encode(frame):
+            container.mux(packet)
+    for packet in stream.encode():
+        container.mux(packet)
+    container.close()
+
+
+class DecodeMediaTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_audio_is_resampled_to_16k_float32(self):
+        path = os.path.join(self.tmp.name, "clip.wav")
+        write_wav(path, seconds=1.5)
+        with decode_media(path) as media:
+            self.assertTrue(media.has_audio)
+            self.assertFalse(media.has_video)
+            self.assertEqual(media.audio.dtype, np.float32)
+            self.assertAlmostEqual(media.audio_duration, 1.5, delta=0.05)
+            self.assertLessEqual(float(np.abs(media.audio).max()), 1.0)
+            self.assertEqual(list(media.frames()), [])
+
+    def test_video_frames_are_decoded_lazily_from_the_file(self):
+        path = os.path.join(self.tmp.name, "clip.mp4")
+        write_video(path, seconds=2, fps=10)
+        with decode_media(path) as media:
+            self.assertTrue(media.has_video)
+            self.assertFalse(media.has_audio)
+            self.assertEqual((media.width, media.height), (64, 48))
+            self.assertAlmostEqual(media.fps, 10.0)
+            frames = list(media.frames())
+        self.assertEqual(len(frames), 20)
+        self.assertEqual(frames[0][1].shape, (48, 64, 3))
+        timestamps = [ts for ts, _ in frames]
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertEqual(len(media.audio), 0)
+        self.assertEqual(SAMPLE_RATE, 16000)
+
+    def test_frames_can_stop_early_and_be_read_again(self):
+        path = os.path.join(self.tmp.name, "clip.mp4")
+        write_video(path, seconds=2, fps=10)
+        with decode_media(path) as media:
+            first = list(media.frames(select=lambda i: True if i <= 3 else None))
+            self.assertEqual(len(first), 3)
+            self.assertEqual(len(list(media.frames(step=5))), 4)
+        self.assertEqual(list(media.frames()), [])
+
+
+class ProbeMediaTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_audio_only_probe(self):
+        path = os.path.join(self.tmp.name, "clip.wav")
+        write_wav(path, seconds=2.0, rate=16000)
+        probe = probe_media(path)
+        self.assertTrue(probe.has_audio)
+        self.assertFalse(probe.has_video)
+        self.assertEqual(probe.sample_rate, 16000)
+        self.assertAlmostEqual(probe.duration_seconds, 2.0, delta=0.05)
+        self.assertEqual(probe.size_bytes, os.path.getsize(path))
+
+    def test_video_probe(self):
+        path = os.path.join(self.tmp.name, "clip.mp4")
+        write_video(path, seconds=2, fps=10)
+        probe = probe_media(path)
+        self.assertFalse(probe.has_audio)
+        self.assertTrue(probe.has_video)
+        self.assertEqual((probe.width, probe.height, probe.fps), (64, 48, 10.0))
+        self.assertEqual(probe.as_dict()["video_codec"], "mpeg4")
+
+    def test_duration_missing_from_header_is_read_from_packets(self):
+        path = os.path.join(self.tmp.name, "recording.webm")
+        write_streamed_webm(path, seconds=3.0)
+        with av.open(path) as container:
+            self.assertIsNone(container.duration)
+        probe = probe_media(path)
+        self.assertTrue(probe.duration_estimated)
+        self.assertAlmostEqual(probe.duration_seconds, 3.0, delta=0.1)
+
+    def test_unreadable_file_raises_value_error(self):
+        path = os.path.join(self.tmp.name, "clip.webm")
+        with open(path, "wb") as fh:
+            fh.write(b"not a media file")
+        with self.assertRaises(ValueError):
+            probe_media(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
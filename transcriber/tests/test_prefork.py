@@ -0,0 +1,75 @@
+import os
+import signal
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import prefork
+from prefork import WORKER_SLOT_ENV, Supervisor, process_memory, worker_slot
+
+HAS_PROC = os.path.exists("/proc/self/smaps_rollup")
+
+
+class WorkerSlotTests(unittest.TestCase):
+    def test_slot_from_environment(self):
+        with mock.patch.dict(os.environ, {WORKER_SLOT_ENV: "2/4"}):
+            self.assertEqual(worker_slot(), (2, 4))
+        with mock.patch.dict(os.environ, {WORKER_SLOT_ENV: "junk"}):
+            self.assertEqual(worker_slot(), (0, 1))
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(worker_slot(), (0, 1))
+
+
+class RestartBackoffTests(unittest.TestCase):
+    def test_fast_failures_back_off_then_give_up(self):
+        supervisor = Supervisor(None, 2, fast_failure_seconds=10, max_fast_failures=4, backoff_seconds=1, backoff_max_seconds=3)
+        self.assertEqual([supervisor.restart_delay(0, 0.5) for _ in range(3)], [1, 2, 3])
+        # Other slots keep their own count, and a worker that ran a while resets it.
+        self.assertEqual(supervisor.restart_delay(1, 0.5), 1)
+        self.assertEqual(supervisor.restart_delay(1, 60), 0)
+        self.assertEqual(supervisor.restart_delay(1, 0.5), 1)
+        self.assertIsNone(supervisor.restart_delay(0, 0.5))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_crash_looping_worker_stops_the_server(self):
+        handlers = signal.getsignal(signal.SIGTERM), signal.getsignal(signal.SIGINT)
+        self.addCleanup(signal.signal, signal.SIGINT, handlers[1])
+        self.addCleanup(signal.signal, signal.SIGTERM, handlers[0])
+        supervisor = Supervisor(None, 1, max_fast_failures=2, backoff_seconds=0.01)
+        with mock.patch.object(prefork, "serve_worker", side_effect=RuntimeError("model failed to load")):
+            self.assertEqual(supervisor.run(), 1)
+        self.assertEqual(supervisor.children, {})
+
+
+@unittest.skipUnless(HAS_PROC and hasattr(os, "fork"), "needs /proc and fork")
+class ProcessMemoryTests(unittest.TestCase):
+    def test_reports_rss_pss_and_private(self):
+        memory = process_memory()
+        self.assertGreater(memory["rss"], 0)
+        self.assertLessEqual(memory["pss"], memory["rss"])
+        self.assertEqual(memory["rss"], memory["shared"] + memory["private"])
+        self.assertEqual(process_memory(2 ** 22 + 12345), {})
+
+    def test_forked_child_shares_parent_pages(self):
+        shared = np.ones(64 * 2 ** 20, dtype=np.uint8)
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                total = int(shared[:: 4096].sum())  # touch every page without writing
+                os.write(write_fd, str(process_memory()["private"]).encode())
+                code = 0 if total else 1
+            finally:
+                os._exit(code)
+        os.close(write_fd)
+        private = int(os.read(read_fd, 64))
+        os.close(read_fd)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(status, 0)
+        self.assertLess(private, shared.nbytes // 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
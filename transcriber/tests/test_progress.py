@@ -0,0 +1,73 @@
+import time
+import unittest
+
+import numpy as np
+
+from progress import analyze_progress, snapshot_matrix
+
+
+def history(totals, **columns):
+    """Newest-first snapshots, the way clients send them, from oldest-first lists."""
+    rows = [{"total": t, **{k: v[i] for k, v in columns.items()}} for i, t in enumerate(totals)]
+    return list(reversed(rows))
+
+
+class ProgressTests(unittest.TestCase):
+    def test_matrix_is_oldest_first_with_nan_gaps(self):
+        matrix = snapshot_matrix(history([50, 60, None]), metrics=("total", "wpm"))
+        self.assertEqual(matrix.shape, (3, 2))
+        self.assertEqual(matrix[:2, 0].tolist(), [50.0, 60.0])
+        self.assertTrue(np.isnan(matrix[2, 0]) and np.isnan(matrix[:, 1]).all())
+
+    def test_slopes_ewma_and_trend(self):
+        totals = [50, 52, 54, 56, 58, 60]
+        fillers = [6.0, 5.0, 4.0, 3.0, 2.0, 1.0]
+        out = analyze_progress(snapshot_matrix(history(totals, fillers_per_100w=fillers)))
+        total = out["metrics"]["total"]
+        self.assertEqual(total["slope"], 2.0)
+        self.assertEqual((total["latest"], total["best"], total["mean"]), (60.0, 60.0, 55.0))
+        self.assertTrue(55.0 < total["ewma"] < 60.0)
+        self.assertEqual(total["trend"], "improving")
+        # Fewer fillers is better: a falling rate is an improvement, and the best is the lowest.
+        self.assertEqual(out["metrics"]["fillers_per_100w"]["trend"], "improving")
+        self.assertEqual(out["metrics"]["fillers_per_100w"]["best"], 1.0)
+        self.assertEqual(sorted(out["improving"]), ["fillers_per_100w", "total"])
+        self.assertNotIn("wpm", out["metrics"])
+
+    def test_current_attempt_is_ranked_against_history(self):
+        matrix = snapshot_matrix(history([40, 50, 60, 70], hedges_per_100w=[1.0, 2.0, 3.0, 4.0]))
+        out = analyze_progress(matrix, {"total": 65, "hedges_per_100w": 0.5})
+        self.assertEqual(out["attempt_count"], 5)
+        self.assertEqual(out["metrics"]["total"]["percentile"], 75.0)
+        self.assertEqual(out["metrics"]["hedges_per_100w"]["percentile"], 100.0)
+        self.assertEqual(out["metrics"]["total"]["latest"], 65.0)
+
+    def test_plateau_after_early_gains(self):
+        totals = [40, 50, 60, 70, 71, 70, 71, 70, 71]
+        out = analyze_progress(snapshot_matrix(history(totals)))
+        self.assertTrue(out["metrics"]["total"]["plateau"])
+        self.assertEqual(out["metrics"]["total"]["trend"], "flat")
+        self.assertEqual(out["plateaued"], ["total"])
+        self.assertGreater(out["metrics"]["total"]["slope"], 0)
+
+        out = analyze_progress(snapshot_matrix(history(totals[:4])))
+        self.assertFalse(out["metrics"]["total"]["plateau"])
+
+    def test_empty_history(self):
+        out = analyze_progress(snapshot_matrix([]))
+        self.assertEqual(out, {"attempt_count": 0, "metrics": {}, "improving": [], "declining": [], "plateaued": []})
+        out = analyze_progress(snapshot_matrix([]), {"total": 70})
+        self.assertIsNone(out["metrics"]["total"]["percentile"])
+
+    def test_thousands_of_attempts_stay_fast(self):
+        rng = np.random.default_rng(0)
+        totals = (np.linspace(40, 80, 5000) + rng.normal(0, 5, 5000)).tolist()
+        snapshots = history(totals, wpm=rng.normal(140, 10, 5000).tolist())
+        started = time.perf_counter()
+        out = analyze_progress(snapshot_matrix(snapshots), {"total": 85, "wpm": 150})
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertAlmostEqual(out["metrics"]["total"]["slope"], 40 / 4999, places=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from question_bank import QuestionBankStore
+
+BANK = [
+    {"slug": "cache", "prompt": "How would you design a cache?", "mode": "system_design", "tags": ["caching"], "competencies": ["scaling"]},
+    {"slug": "conflict", "prompt": "Describe a conflict on your team.", "mode": "behavioral", "tags": ["teamwork"]},
+    {"slug": "lru", "prompt": "Implement an LRU cache.", "mode": "technical", "tags": ["caching"]},
+]
+
+
+class QuestionBankStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "questions.sqlite3")
+        self.store = QuestionBankStore(self.db_path)
+        self.store.sync_file(BANK, "v1")
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_lookups(self):
+        self.assertEqual(self.store.get("lru")["mode"], "technical")
+        self.assertIsNone(self.store.get("missing"))
+        self.assertEqual(self.store.slug_for_prompt("  how would you design a cache?"), "cache")
+        self.assertEqual(self.store.slug_for_prompt("Quick one: describe a conflict on your team. Go."), "conflict")
+        self.assertIsNone(self.store.slug_for_prompt("What is your favourite colour?"))
+        self.assertEqual(self.store.slugs_by_mode("behavioral"), ["conflict"])
+        self.assertEqual(self.store.slugs_by_tag("caching"), ["cache", "lru"])
+        self.assertEqual(self.store.slugs_by_tag("scaling"), ["cache"])
+        self.assertEqual(len(self.store.by_slug), 3)
+
+    def test_entries_are_read_only(self):
+        with self.assertRaises(TypeError):
+            self.store.get("cache")["mode"] = "technical"
+
+    def test_live_insert_visible_to_other_connections(self):
+        reader = QuestionBankStore(self.db_path)
+        try:
+            self.assertIsNone(reader.get("new"))
+            self.assertIsNone(reader.slug_for_prompt("Tell me about a new thing."))
+            self.store.upsert({"slug": "new", "prompt": "Tell me about a new thing.", "tags": ["fresh"]})
+            self.assertEqual(reader.get("new")["tags"], ("fresh",))
+            self.assertEqual(reader.slug_for_prompt("Tell me about a new thing."), "new")
+        finally:
+            reader.close()
+
+    def test_reopen_after_close(self):
+        self.store.get("lru")
+        self.store.close()
+        self.store.reopen()
+        self.assertEqual(self.store.get("lru")["mode"], "technical")
+
+    def test_sync_replaces_file_rows_but_keeps_live_rows(self):
+        self.store.upsert({"slug": "live", "prompt": "Added at runtime."})
+        self.assertFalse(self.store.sync_file(BANK, "v1"))
+        self.assertTrue(self.store.sync_file(BANK[:1], "v2"))
+        self.assertIsNone(self.store.get("lru"))
+        self.assertEqual(self.store.slugs_by_tag("caching"), ["cache"])
+        self.assertIsNotNone(self.store.get("live"))
+
+    def test_invalid_entries_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.store.upsert({"slug": "bad", "prompt": "x", "mode": "trivia"})
+        with self.assertRaises(ValueError):
+            self.store.sync_file([{"slug": "a"}, {"slug": "a"}], "v3")
+        self.assertEqual(self.store.count(), 3)
+
+
+class QuestionBankSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = QuestionBankStore(os.path.join(self.tmp.name, "questions.sqlite3"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_each_snapshot_reads_its_own_generation(self):
+        old = self.store.snapshot(BANK, "v1")
+        new = self.store.snapshot(BANK[:1], "v2")
+        self.assertIsNone(self.store.get("lru"))
+        self.assertEqual(old.get("lru")["mode"], "technical")
+        self.assertIsNone(new.get("lru"))
+        self.assertEqual(old.slug_for_prompt("Implement an LRU cache."), "lru")
+        self.assertIsNone(new.slug_for_prompt("Implement an LRU cache."))
+        self.assertTrue(new.sync())
+        self.assertEqual(list(self.store.slugs()), ["cache"])
+        self.assertEqual(old.get("conflict")["prompt"], "Describe a conflict on your team.")
+
+    def test_exact_prompt_wins_over_an_earlier_containing_one(self):
+        bank = self.store.snapshot([
+            {"slug": "short", "prompt": "Design a cache."},
+            {"slug": "long", "prompt": "How would you design a cache?"},
+        ], "v1")
+        self.assertEqual(bank.slug_for_prompt("How would you design a cache?"), "long")
+        self.assertEqual(bank.slug_for_prompt("So, how would you design a cache? Take your time."), "long")
+        self.assertEqual(bank.slug_for_prompt("Design a cache."), "short")
+        plan = " ".join(row[-1] for row in self.store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT slug FROM file_questions WHERE digest = ? AND normalized = ? ORDER BY seq LIMIT 1",
+            ("v1", "design a cache."),
+        ))
+        self.assertIn("file_questions_normalized", plan)
+
+    def test_old_generations_are_pruned_but_not_the_synced_one(self):
+        self.store.snapshot(BANK, "v1").sync()
+        with mock.patch("question_bank.QUESTION_BANK_FILE_GENERATIONS", 2):
+            for digest in ("v2", "v3", "v4"):
+                self.store.snapshot(BANK[:1], digest)
+        digests = {row[0] for row in self.store._conn.execute("SELECT digest FROM file_generations")}
+        self.assertEqual(digests, {"v1", "v3", "v4"})
+        self.assertEqual(self.store._conn.execute(
+            "SELECT COUNT(*) FROM file_questions WHERE digest = 'v2'"
+        ).fetchone()[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from relevance import RelevanceIndex, load_or_build, term_counts
+from scoring import REGISTRY, score_answer
+
+LIBRARY = [
+    {"slug": "conflict", "prompt": "Describe a time you had a conflict on a team.", "tags": ["collaboration"], "competencies": ["teamwork"]},
+    {"slug": "caching", "prompt": "Design a caching layer for our API.", "tags": ["cache", "latency"], "competencies": ["system_design"]},
+    {"slug": "migration", "prompt": "How would you plan a data migration with minimal downtime?", "tags": ["migration"]},
+]
+
+CACHE_ANSWER = (
+    "I would put a Redis cache in front of the API with a TTL per key, warm the hot keys, "
+    "and watch the hit rate so latency stays low when the cache misses."
+)
+
+
+class RelevanceIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = RelevanceIndex.build(LIBRARY)
+
+    def test_rows_are_unit_vectors(self):
+        for row in range(len(self.index)):
+            start, end = self.index.indptr[row], self.index.indptr[row + 1]
+            self.assertAlmostEqual(float(np.linalg.norm(self.index.data[start:end])), 1.0)
+
+    def test_on_topic_answer_ranks_its_question_first(self):
+        match = self.index.match(term_counts(CACHE_ANSWER), slug="caching")
+        self.assertEqual(match["rank"], 1)
+        self.assertGreater(match["similarity"], 0.3)
+        self.assertFalse(match["off_target"])
+        # "cached" and "caching" share a stem.
+        self.assertEqual(self.index.match(term_counts("we cached it"), slug="caching")["rank"], 1)
+
+    def test_answer_to_another_question_is_off_target(self):
+        match = self.index.match(term_counts(CACHE_ANSWER), slug="conflict")
+        self.assertEqual(match["similarity"], 0.0)
+        self.assertEqual(match["closest"]["slug"], "caching")
+        self.assertTrue(match["off_target"])
+
+    def test_unknown_question_is_vectorised_from_its_text(self):
+        match = self.index.match(
+            term_counts(CACHE_ANSWER), question_counts=term_counts("How would you reduce API latency with a cache?")
+        )
+        self.assertIsNone(match["rank"])
+        self.assertGreater(match["similarity"], 0.3)
+        self.assertEqual(match["closest"]["slug"], "caching")
+
+    def test_disk_cache_round_trip(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            built = load_or_build(LIBRARY, cache_dir=cache_dir)
+            (name,) = os.listdir(cache_dir)
+            loaded = load_or_build(LIBRARY, cache_dir=cache_dir)
+            self.assertEqual(loaded.slugs, built.slugs)
+            np.testing.assert_array_equal(loaded.similarities(term_counts(CACHE_ANSWER)), built.similarities(term_counts(CACHE_ANSWER)))
+            # A changed bank gets its own cache file.
+            load_or_build(LIBRARY[:2], cache_dir=cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+            self.assertIn(name, os.listdir(cache_dir))
+
+
+class ScoringRelevanceTests(unittest.TestCase):
+    def test_snapshot_indexes_the_question_bank(self):
+        relevance = REGISTRY.current().relevance
+        self.assertIn("technical-caching", relevance.slugs)
+
+    def test_answering_a_different_question_is_flagged(self):
+        transcript = (
+            "I would design the cache with Redis clusters, partition keys by tenant, and use write-through semantics. "
+            "For consistency I'd add background warmers and metrics on hit rate. "
+            "Failure handling would rely on multi-AZ replicas and a TTL on every cached key so stale data expires."
+        )
+        result = score_answer(
+            "Describe a time you had a conflict on a team. What did you do?",
+            transcript,
+            duration_seconds=60,
+            history=None,
+            question_id="conflict",
+        )
+        relevance = result["question_alignment"]["relevance"]
+        self.assertTrue(relevance["off_target"])
+        self.assertEqual(relevance["closest"]["slug"], "technical-caching")
+        self.assertTrue(any(issue["evidenceSnippet"].startswith("Closer to:") for issue in result["issues"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
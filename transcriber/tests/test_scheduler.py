@@ -0,0 +1,106 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pipeline
+from scheduler import FairScheduler, parse_weights
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def grant_order(scheduler, jobs, clock=None):
+    """Queue ``(name, tenant, cost[, at])`` jobs behind a held slot; returns the order they ran in.
+
+    With ``clock``, it is moved to ``at`` before that job queues.
+    """
+    order = []
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with scheduler.slot(0, "holder"):
+            held.set()
+            release.wait(5)
+
+    def job(name, tenant, cost):
+        with scheduler.slot(cost, tenant):
+            order.append(name)
+
+    threads = [threading.Thread(target=hold)]
+    threads[0].start()
+    held.wait(5)
+    for queued, (name, tenant, cost, *at) in enumerate(jobs, start=1):
+        if clock is not None and at:
+            clock.now = at[0]
+        thread = threading.Thread(target=job, args=(name, tenant, cost))
+        thread.start()
+        threads.append(thread)
+        while sum(scheduler.stats()["queued"].values()) < queued:
+            time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return order
+
+
+class FairSchedulerTests(unittest.TestCase):
+    def test_shortest_job_first_within_a_tenant(self):
+        order = grant_order(FairScheduler(slots=1, weights={}, clock=FakeClock()), [
+            ("long", "a", 600), ("short", "a", 30), ("medium", "a", 120),
+        ])
+        self.assertEqual(order, ["short", "medium", "long"])
+
+    def test_tenants_share_by_weight(self):
+        jobs = [(f"a{i}", "a", 10) for i in range(4)] + [(f"b{i}", "b", 10) for i in range(4)]
+        # A frozen clock keeps aging from breaking ties by how far apart jobs arrived.
+        order = grant_order(FairScheduler(slots=1, weights={}, clock=FakeClock()), jobs)
+        self.assertEqual([name[0] for name in order], list("abababab"))
+
+        order = grant_order(FairScheduler(slots=1, weights={"a": 2}, clock=FakeClock()), jobs)
+        self.assertEqual([name[0] for name in order[:6]], list("aabaab"))
+
+    def test_heavy_tenant_does_not_delay_a_light_one(self):
+        jobs = [(f"heavy{i}", "heavy", 600) for i in range(5)] + [("practice", "light", 30)]
+        order = grant_order(FairScheduler(slots=1, weights={}, clock=FakeClock()), jobs)
+        self.assertEqual(order[0], "practice")
+
+    def test_aging_lets_a_long_job_through(self):
+        jobs = [("long", "a", 600, 0.0), ("short", "a", 30, 100.0)]
+        clock = FakeClock()
+        order = grant_order(FairScheduler(slots=1, weights={}, aging_rate=0.5, clock=clock), jobs, clock)
+        self.assertEqual(order, ["short", "long"])
+
+        # After 700s of waiting the long job ranks as cheaper than a fresh short one.
+        jobs = [("long", "a", 600, 0.0), ("short", "a", 30, 700.0)]
+        clock = FakeClock()
+        order = grant_order(FairScheduler(slots=1, weights={}, aging_rate=1.0, clock=clock), jobs, clock)
+        self.assertEqual(order, ["long", "short"])
+
+    def test_parse_weights(self):
+        self.assertEqual(parse_weights("acme=2, trial=0.5,,bad"), {"acme": 2.0, "trial": 0.5})
+
+
+class PipelineSlotsTests(unittest.TestCase):
+    def build(self, inference_slots):
+        tuned = pipeline.resolve_threading(4, 2)
+        with mock.patch.object(pipeline, "WhisperModel"), mock.patch.object(pipeline, "VideoAnalyzer"), \
+                mock.patch.object(pipeline, "resolve_threading", return_value=tuned), \
+                mock.patch.object(pipeline, "INFERENCE_SLOTS", inference_slots):
+            return pipeline.TranscriptionPipeline()
+
+    def test_slots_follow_tuned_num_workers(self):
+        self.assertEqual(self.build(0).scheduler.slots, 2)
+
+    def test_inference_slots_overrides_num_workers(self):
+        self.assertEqual(self.build(3).scheduler.slots, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,12 @@
 import unittest
-from scoring import score_answer
+from scoring import TranscriptIndex, find_sentence_with_keyword, score_answer, split_sentences
 
 
 class ScoringEngineTests(unittest.TestCase):
     def test_star_story_scores_high(self):
         transcript = (
-            "At my internship our API latency spiked 60%. My task was to restore performance without extra hardware. "
+            # "hardware" used to satisfy the challenge keyword "hard"; the challenge is now named outright.
+            "At my internship our API latency spiked 60%, a tough problem. My task was to restore performance without extra hardware. "
             "I profiled the pipeline, found redundant serialization, and partnered with infra to batch responses. "
             "As a result P95 dropped by 42% in two days and the incident review commended the fast communication. "
             "I learned to instrument first before changing code."
@@ -121,6 +122,53 @@ class ScoringEngineTests(unittest.TestCase):
         )
         self.assertLess(result["subscores"]["technical"], 20)
 
+    def test_response_profiles_share_scores(self):
+        transcript = (
+            "Our checkout service kept timing out. My task was to fix it before launch. "
+            "I profiled the queries and added an index, so latency dropped by 30%. I learned to measure first."
+        )
+        history = [{"transcript": "I fixed a bug. It was fine.", "duration_seconds": 40}]
+        args = ("Tell me about a challenge you faced and how you handled it.", transcript, 90, history)
+        full = score_answer(*args, profile="full")
+        standard = score_answer(*args, profile="standard")
+        minimal = score_answer(*args, profile="minimal")
+
+        for result in (standard, minimal):
+            self.assertEqual(result["overallScore"], full["overallScore"])
+            self.assertEqual(result["subscores"], full["subscores"])
+            self.assertEqual(result["issues"], full["issues"])
+        self.assertIn("sentences", full["detected"])
+        self.assertIn("question_alignment", full["explanations"])
+        self.assertNotIn("scores", standard)
+        self.assertNotIn("sentences", standard["detected"])
+        self.assertNotIn("question_alignment", standard["explanations"])
+        self.assertEqual(standard["history_summary"], full["history_summary"])
+        progress = standard["history_summary"]["progress"]
+        self.assertEqual(progress["attempt_count"], 2)
+        self.assertEqual(progress["metrics"]["total"]["latest"], standard["overallScore"])
+        self.assertEqual(
+            set(minimal),
+            {"overallScore", "subscores", "issues", "suggestions", "strengths", "config_version"},
+        )
+        with self.assertRaises(ValueError):
+            score_answer(*args, profile="verbose")
+
+    def test_transcript_index_matches_sentence_scan(self):
+        transcript = (
+            "  We had an outage.  I was on call! As a\nresult of the fix, latency improved? "
+            "As a result we shipped. I learned a lot.\n"
+        )
+        index = TranscriptIndex(transcript)
+        self.assertEqual(index.sentences, split_sentences(transcript))
+        for phrase in ("outage", "on call", "as a result", "learned", "I LEARNED", "missing", "outage. i"):
+            self.assertEqual(
+                index.sentence_with(phrase),
+                find_sentence_with_keyword(split_sentences(transcript), phrase),
+                phrase,
+            )
+        self.assertEqual(index.first("outage"), transcript.strip().lower().find("outage"))
+        self.assertFalse(index.contains("missing"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import unittest
+
+from admission import AdmissionRejected
+from streaming import ProvisionalScorer, encode_event, stream_events
+
+SEGMENTS = [
+    {"index": 0, "start": 0.0, "end": 6.0, "text": " At my last internship our checkout service kept timing out."},
+    {"index": 1, "start": 6.0, "end": 12.0, "text": " I profiled the slow queries and added a covering index."},
+    {"index": 2, "start": 12.0, "end": 18.0, "text": " As a result p95 latency dropped by forty percent."},
+]
+
+
+def collect(fmt, run):
+    async def drain():
+        return [chunk async for chunk in stream_events(fmt, run)]
+    return asyncio.run(drain())
+
+
+class EncodingTests(unittest.TestCase):
+    def test_ndjson_and_sse(self):
+        self.assertEqual(json.loads(encode_event("ndjson", "segment", {"text": "hi"})), {"event": "segment", "data": {"text": "hi"}})
+        self.assertEqual(encode_event("sse", "result", {"a": 1}), b'event: result\ndata: {"a":1}\n\n')
+
+
+class ProvisionalScorerTests(unittest.TestCase):
+    def test_scores_every_interval_of_audio(self):
+        events = []
+        scorer = ProvisionalScorer(lambda event, data: events.append((event, data)), "Tell me about a challenge.", interval=10)
+        for segment in SEGMENTS:
+            scorer("segment", segment)
+        scorer("video", {"eye_contact_score": 0.8})
+        self.assertEqual([event for event, _ in events], ["segment", "segment", "provisional", "segment", "video"])
+        provisional = events[2][1]
+        self.assertEqual(provisional["audio_seconds"], 12.0)
+        self.assertEqual(provisional["words"], 20)
+        self.assertIn("structure", provisional["subscores"])
+
+
+class StreamEventsTests(unittest.TestCase):
+    def test_events_then_result_in_order(self):
+        def run(emit):
+            for segment in SEGMENTS:
+                emit("segment", segment)
+            return {"transcript": "done"}
+
+        lines = [json.loads(line) for line in collect("ndjson", run)]
+        self.assertEqual([line["event"] for line in lines], ["segment"] * 3 + ["result"])
+        self.assertEqual(lines[-1]["data"], {"transcript": "done"})
+
+    def test_failure_ends_the_stream_with_an_error_event(self):
+        def run(emit):
+            emit("segment", SEGMENTS[0])
+            raise AdmissionRejected("Server is at capacity", 503)
+
+        chunks = collect("sse", run)
+        self.assertTrue(chunks[0].startswith(b"event: segment\n"))
+        self.assertEqual(chunks[-1], b'event: error\ndata: {"error":"Server is at capacity","status":503}\n\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
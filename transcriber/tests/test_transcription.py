@@ -0,0 +1,73 @@
+import unittest
+
+from transcription import group_regions, stitch_segments
+
+
+class GroupRegionsTests(unittest.TestCase):
+    def test_merges_regions_up_to_the_chunk_limit(self):
+        regions = [
+            {"start": 0, "end": 40},
+            {"start": 50, "end": 90},
+            {"start": 110, "end": 150},
+            {"start": 160, "end": 170},
+        ]
+        self.assertEqual(group_regions(regions, 100), [(0, 90), (110, 170)])
+
+    def test_no_speech_means_no_chunks(self):
+        self.assertEqual(group_regions([], 100), [])
+
+
+class StitchSegmentsTests(unittest.TestCase):
+    def test_keeps_chunk_order(self):
+        chunks = [
+            [{"start": 0.0, "end": 2.0, "text": " First part."}],
+            [{"start": 60.0, "end": 62.0, "text": " Second part."}],
+        ]
+        self.assertEqual([s["text"] for s in stitch_segments(chunks)], [" First part.", " Second part."])
+
+    def test_trims_words_repeated_across_the_boundary(self):
+        chunks = [
+            [{"start": 0.0, "end": 5.0, "text": " We moved the cache to Redis clusters."}],
+            [{"start": 5.0, "end": 9.0, "text": " Redis clusters, and latency dropped by 40%."}],
+        ]
+        stitched = stitch_segments(chunks)
+        self.assertEqual(stitched[1]["text"], " and latency dropped by 40%.")
+        self.assertEqual(stitched[1]["start"], 5.0)
+
+    def test_trimming_drops_the_repeated_timed_words(self):
+        words = [
+            {"word": " Redis", "start": 5.0, "end": 5.4, "probability": 0.9},
+            {"word": " clusters,", "start": 5.4, "end": 6.0, "probability": 0.9},
+            {"word": " and", "start": 6.2, "end": 6.4, "probability": 0.9},
+            {"word": " latency", "start": 6.4, "end": 7.0, "probability": 0.9},
+        ]
+        chunks = [
+            [{"start": 0.0, "end": 5.0, "text": " We moved the cache to Redis clusters."}],
+            [{"start": 5.0, "end": 7.0, "text": " Redis clusters, and latency", "words": words}],
+        ]
+        self.assertEqual([w["word"] for w in stitch_segments(chunks)[1]["words"]], [" and", " latency"])
+
+    def test_drops_a_fully_repeated_boundary_segment(self):
+        chunks = [
+            [{"start": 0.0, "end": 5.0, "text": " I led the migration."}],
+            [{"start": 5.0, "end": 6.0, "text": " the migration."}, {"start": 6.0, "end": 8.0, "text": " It shipped."}],
+        ]
+        self.assertEqual([s["text"] for s in stitch_segments(chunks)], [" I led the migration.", " It shipped."])
+
+    def test_single_repeated_word_is_kept(self):
+        chunks = [
+            [{"start": 0.0, "end": 5.0, "text": " So I"}],
+            [{"start": 5.0, "end": 6.0, "text": " I rewrote the scripts."}],
+        ]
+        self.assertEqual(stitch_segments(chunks)[1]["text"], " I rewrote the scripts.")
+
+    def test_one_word_segment_matching_the_boundary_is_kept(self):
+        chunks = [
+            [{"start": 0.0, "end": 5.0, "text": " And they asked if it was fixed, yes."}],
+            [{"start": 5.5, "end": 6.0, "text": " Yes."}],
+        ]
+        self.assertEqual([seg["text"] for seg in stitch_segments(chunks)], [" And they asked if it was fixed, yes.", " Yes."])
+
+
+if __name__ == "__main__":
+    unittest.main()
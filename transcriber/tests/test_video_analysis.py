@@ -0,0 +1,219 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import cv2
+import numpy as np
+
+from video_analysis import FeatureTimeline, FrameBuffers, FrameSampler, VideoAnalyzer
+
+
+def bare_analyzer(**settings):
+    """A VideoAnalyzer without the MediaPipe model, for exercising the frame stages."""
+    analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+    analyzer.sample_every = settings.get("sample_every", 5)
+    analyzer.max_dimension = settings.get("max_dimension", 640)
+    analyzer.max_seconds = settings.get("max_seconds", 900)
+    return analyzer
+
+
+class FrameStageTests(unittest.TestCase):
+    def test_buffers_are_reused_for_same_shape(self):
+        buffers = FrameBuffers()
+        first = buffers.get("rgb", (4, 4, 3))
+        self.assertIs(buffers.get("rgb", (4, 4, 3)), first)
+        self.assertIsNot(buffers.get("rgb", (8, 8, 3)), first)
+        self.assertEqual(buffers.nbytes, 8 * 8 * 3)
+
+    def test_sample_keeps_every_nth_frame(self):
+        frames = [(i / 10, None) for i in range(1, 21)]
+        sampled = list(bare_analyzer(sample_every=5)._sample(frames))
+        self.assertEqual([ts for ts, _ in sampled], [0.5, 1.0, 1.5, 2.0])
+
+    def test_limit_stops_at_max_duration(self):
+        stats = {"truncated": False}
+        frames = [(float(t), None) for t in range(10)]
+        kept = list(bare_analyzer(max_seconds=4)._limit(frames, stats))
+        self.assertEqual(len(kept), 5)
+        self.assertTrue(stats["truncated"])
+
+    def test_resize_and_convert_write_into_shared_buffers(self):
+        analyzer = bare_analyzer(max_dimension=64)
+        buffers = FrameBuffers()
+        frames = [(0.1, np.full((90, 160, 3), (10, 20, 30), np.uint8)) for _ in range(3)]
+        converted = list(analyzer._convert(analyzer._resize(frames, buffers), buffers))
+        _, rgb = converted[-1]
+        self.assertEqual(rgb.shape, (36, 64, 3))
+        self.assertEqual(tuple(rgb[0, 0]), (30, 20, 10))
+        self.assertTrue(all(image is rgb for _, image in converted))
+
+    def test_small_frames_are_not_resized(self):
+        frame = np.zeros((48, 64, 3), np.uint8)
+        (_, out), = bare_analyzer(max_dimension=640)._resize([(0.0, frame)], FrameBuffers())
+        self.assertIs(out, frame)
+
+
+def run_sampler(sampler, flags):
+    """Feed per-frame flags through ``sampler``; returns the indices it analyzed."""
+    taken = []
+    for index, frame_flags in enumerate(flags, start=1):
+        take = sampler.take(index)
+        if take is None:
+            break
+        if take:
+            taken.append(index)
+            sampler.observe(frame_flags)
+    return taken
+
+
+FACE = {"face_presence_score": True, "eye_contact_score": True, "smile_score": False}
+AWAY = {"face_presence_score": True, "eye_contact_score": False, "smile_score": False}
+GONE = {"face_presence_score": False, "eye_contact_score": False, "smile_score": False}
+
+
+class FrameSamplerTests(unittest.TestCase):
+    def test_fixed_sampler_matches_plain_stride(self):
+        sampler = FrameSampler.fixed(5)
+        taken = run_sampler(sampler, [FACE] * 50 + [GONE] * 50)
+        self.assertEqual(taken, list(range(5, 101, 5)))
+        self.assertFalse(sampler.adaptive)
+        self.assertEqual(sampler.scores()["face_presence_score"], 0.5)
+
+    def test_steady_video_stops_early_with_narrow_intervals(self):
+        sampler = FrameSampler(5, 20, tolerance=0.05, min_samples=30, min_frames=600)
+        taken = run_sampler(sampler, [FACE] * 30 * 600)
+        self.assertTrue(sampler.done)
+        self.assertLess(len(taken), 100)
+        self.assertGreaterEqual(taken[-1], 600)
+        for lo, hi in sampler.intervals().values():
+            self.assertLessEqual(hi - lo, 0.1)
+        self.assertEqual(sampler.scores()["eye_contact_score"], 1.0)
+
+    def test_changes_densify_sampling(self):
+        sampler = FrameSampler(2, 16)
+        taken = run_sampler(sampler, [FACE] * 160 + [AWAY] * 160)
+        gaps = [b - a for a, b in zip(taken, taken[1:])]
+        after_change = [gap for index, gap in zip(taken[1:], gaps) if 160 < index <= 180]
+        self.assertEqual(max(gaps), 16)
+        self.assertIn(2, after_change)
+        self.assertFalse(sampler.done)
+
+    def test_weighted_scores_are_not_skewed_by_dense_bursts(self):
+        flags = ([FACE] * 40 + [GONE] * 40) * 20
+        sampler = FrameSampler(1, 16)
+        run_sampler(sampler, flags)
+        self.assertAlmostEqual(sampler.scores()["face_presence_score"], 0.5, delta=0.05)
+        lo, hi = sampler.intervals()["face_presence_score"]
+        self.assertLess(lo, 0.5)
+        self.assertGreater(hi, 0.5)
+
+
+class CountingCategory:
+    lookups = 0
+
+    def __init__(self, name, score):
+        self._name = name
+        self.score = score
+
+    @property
+    def category_name(self):
+        CountingCategory.lookups += 1
+        return self._name
+
+
+def fake_result(face=True, smile=0.0, blink=0.0):
+    if not face:
+        return SimpleNamespace(face_landmarks=[], face_blendshapes=[])
+    names = ["_neutral"] + [f"shape{i}" for i in range(40)] + ["eyeBlinkLeft", "eyeBlinkRight", "mouthSmileLeft", "mouthSmileRight"]
+    scores = {"eyeBlinkLeft": blink, "eyeBlinkRight": blink, "mouthSmileLeft": smile / 2, "mouthSmileRight": smile / 2}
+    return SimpleNamespace(
+        face_landmarks=[object()],
+        face_blendshapes=[[CountingCategory(name, scores.get(name, 0.0)) for name in names]],
+    )
+
+
+class FeatureTimelineTests(unittest.TestCase):
+    def test_columns_grow_past_capacity(self):
+        timeline = FeatureTimeline(capacity=2)
+        for i in range(5):
+            timeline.append(i * 0.5, 1, face=True, yaw=float(i))
+        self.assertEqual(len(timeline), 5)
+        self.assertEqual(timeline["yaw"].tolist(), [0.0, 1.0, 2.0, 3.0, 4.0])
+        self.assertTrue(np.isnan(timeline["pitch"]).all())
+
+    def test_metrics_cover_blinks_head_motion_and_gaze_away(self):
+        timeline = FeatureTimeline()
+        looking = [True] * 10 + [False] * 6 + [True] * 14
+        for i, on_camera in enumerate(looking):
+            timeline.append(
+                i * 2.0, 1, face=True, looking=on_camera,
+                yaw=1.0 if i % 2 else -1.0, pitch=0.0,
+                blink_left=0.9 if i in (3, 20, 21) else 0.1, blink_right=0.9 if i in (3, 20, 21) else 0.1,
+                smile=0.8 if i < 15 else 0.1,
+            )
+        metrics = timeline.metrics()
+        self.assertEqual(metrics["face_presence_score"], 1.0)
+        self.assertEqual(metrics["eye_contact_score"], 0.8)
+        self.assertEqual(metrics["smile_score"], 0.5)
+        self.assertEqual(metrics["blink_rate_per_min"], round(2 * 60 / 58, 1))
+        self.assertEqual(metrics["head_motion"], {"yaw_variance": 1.0, "pitch_variance": 0.0})
+        # Away from sample 10 (t=20s) until looking again at sample 16 (t=32s).
+        self.assertEqual(metrics["longest_gaze_away_seconds"], 12.0)
+
+    def test_downsample_bins_by_time_with_weights(self):
+        timeline = FeatureTimeline()
+        for i in range(100):
+            timeline.append(i * 0.1, 1, face=i < 50, looking=i < 25, yaw=5.0 if i < 50 else np.nan)
+        chart = timeline.downsample(4)
+        self.assertEqual(chart["t"], [0.0, 2.5, 5.0, 7.5])
+        self.assertEqual(chart["face"], [1.0, 1.0, 0.0, 0.0])
+        self.assertEqual(chart["eye_contact"], [1.0, 0.0, 0.0, 0.0])
+        self.assertEqual(chart["yaw"], [5.0, 5.0, None, None])
+        self.assertEqual(len(timeline.downsample(500)["t"]), 100)
+
+
+class AggregateTests(unittest.TestCase):
+    def test_aggregate_builds_timeline_and_resolves_blendshapes_once(self):
+        analyzer = bare_analyzer()
+        analyzer._head_pose = lambda landmarks, shape: (0.0, 0.01)
+        results = [(i / 10, fake_result(face=i % 4 != 0, smile=0.9 if i < 10 else 0.0), (360, 640, 3)) for i in range(20)]
+        CountingCategory.lookups = 0
+        sampler = FrameSampler.fixed(1)
+        metrics, timeline = analyzer._aggregate(results, sampler)
+        # One pass over the first face's 45 categories, none after that.
+        self.assertLessEqual(CountingCategory.lookups, 2 * 45)
+        self.assertEqual(len(timeline), 20)
+        self.assertEqual(metrics["face_presence_score"], 0.75)
+        self.assertEqual(metrics["eye_contact_score"], 0.75)
+        self.assertEqual(metrics["smile_score"], 0.35)
+        self.assertEqual(metrics["smile_score"], round(sampler.scores()["smile_score"], 2))
+        self.assertEqual(metrics["analyzed_frames"], 20)
+
+
+class HeadPoseTests(unittest.TestCase):
+    def pose(self, pitch_degrees, yaw_degrees):
+        """``_head_pose`` with solvePnP reporting a known head rotation."""
+        rotation = cv2.Rodrigues(np.radians([pitch_degrees, 0.0, 0.0]))[0] @ cv2.Rodrigues(
+            np.radians([0.0, yaw_degrees, 0.0])
+        )[0]
+        rot_vec = cv2.Rodrigues(rotation)[0]
+        landmarks = [SimpleNamespace(x=0.5, y=0.5, z=0.0)] * 300
+        with mock.patch("video_analysis.cv2.solvePnP", return_value=(True, rot_vec, np.zeros((3, 1)))):
+            return bare_analyzer()._head_pose(landmarks, (360, 640, 3))
+
+    def test_pose_is_in_degrees(self):
+        pitch, yaw = self.pose(0.0, 10.0)
+        self.assertAlmostEqual(pitch, 0.0, places=6)
+        self.assertAlmostEqual(yaw, 10.0, places=6)
+
+    def test_gaze_limit_on_known_poses(self):
+        analyzer = bare_analyzer()
+        self.assertAlmostEqual(VideoAnalyzer.GAZE_LIMIT_DEGREES, 12.0 / 360)
+        self.assertTrue(analyzer._is_looking_at_camera(*self.pose(0.03, -0.03)))
+        self.assertFalse(analyzer._is_looking_at_camera(*self.pose(0.0, 0.04)))
+        self.assertFalse(analyzer._is_looking_at_camera(*self.pose(-0.04, 0.0)))
+        self.assertFalse(analyzer._is_looking_at_camera(*self.pose(0.0, 10.0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
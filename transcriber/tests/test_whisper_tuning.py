@@ -0,0 +1,173 @@
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from test_media import write_wav
+from whisper_tuning import (
+    affinity_for,
+    benchmark,
+    candidates,
+    choose,
+    cpu_slices,
+    host_fingerprint,
+    parse_cpu_list,
+    pick_best,
+    resolve_threading,
+    select_compute_type,
+    word_error_rate,
+)
+
+
+class FakeModel:
+    def __init__(self, cpu_threads, num_workers):
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.calls = 0
+
+    def transcribe(self, audio, beam_size=5):
+        self.calls += 1
+        return iter([SimpleNamespace(text="hello")]), None
+
+
+class AffinityTests(unittest.TestCase):
+    def test_parse_cpu_list(self):
+        self.assertEqual(parse_cpu_list("0-3, 8,10-11"), [0, 1, 2, 3, 8, 10, 11])
+        self.assertEqual(parse_cpu_list(""), [])
+
+    def test_slices_are_contiguous_and_cover_every_cpu(self):
+        self.assertEqual(cpu_slices(list(range(10)), 3), [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]])
+        self.assertEqual(cpu_slices([0, 1], 4), [[0], [1]])
+
+    def test_affinity_for_slot(self):
+        self.assertIsNone(affinity_for(0, 2, ""))
+        self.assertEqual(affinity_for(1, 2, "0-7"), [4, 5, 6, 7])
+        self.assertEqual(affinity_for(3, 2, "0-7"), [4, 5, 6, 7])
+
+
+class SettingsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "tuning.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, host_id):
+        with open(self.path, "w") as fh:
+            json.dump({
+                "host": {"id": host_id},
+                "throughput": {"cpu_threads": 2, "num_workers": 4},
+                "latency": {"cpu_threads": 8, "num_workers": 1},
+            }, fh)
+
+    def test_environment_wins_then_tuning_file_then_defaults(self):
+        self.assertEqual(resolve_threading(0, 0, path=self.path).as_dict(), {"cpu_threads": 0, "num_workers": 1, "source": "default"})
+        self.write(host_fingerprint()["id"])
+        self.assertEqual(resolve_threading(0, 0, "latency", self.path).cpu_threads, 8)
+        tuned = resolve_threading(0, 0, "throughput", self.path)
+        self.assertEqual((tuned.cpu_threads, tuned.num_workers, tuned.source), (2, 4, self.path))
+        self.assertEqual(resolve_threading(6, 0, "throughput", self.path).cpu_threads, 6)
+        self.assertEqual(resolve_threading(6, 3, "throughput", self.path).source, "env")
+
+    def test_tuning_from_another_host_is_ignored(self):
+        self.write("someone-else")
+        self.assertEqual(resolve_threading(0, 0, path=self.path).source, "default")
+
+
+class AutotuneTests(unittest.TestCase):
+    def test_candidates_fit_the_host(self):
+        combos = candidates([1, 2, 4], [1, 2], cpus=4)
+        self.assertNotIn({"cpu_threads": 4, "num_workers": 2}, combos)
+        self.assertIn({"cpu_threads": 2, "num_workers": 2}, combos)
+        self.assertEqual(candidates([8], [2], cpus=4), [{"cpu_threads": 4, "num_workers": 1}])
+
+    def test_benchmark_and_pick(self):
+        models = []
+
+        def factory(threads, workers):
+            models.append(FakeModel(threads, workers))
+            return models[-1]
+
+        result = benchmark(factory, np.zeros(16000, np.float32), 2, 2, requests=4)
+        self.assertEqual(models[0].calls, 6)
+        self.assertEqual((result["cpu_threads"], result["num_workers"]), (2, 2))
+        best = pick_best([
+            {"cpu_threads": 1, "num_workers": 4, "latency_seconds": 3.0, "throughput_x_realtime": 9.0},
+            {"cpu_threads": 4, "num_workers": 1, "latency_seconds": 1.0, "throughput_x_realtime": 5.0},
+        ])
+        self.assertEqual(best["throughput"], {"cpu_threads": 1, "num_workers": 4})
+        self.assertEqual(best["latency"], {"cpu_threads": 4, "num_workers": 1})
+
+
+class ScriptedModel:
+    """Returns a fixed transcript for each compute type."""
+
+    TEXT = {"int8": "tell me about a time", "float32": "tell me about the time you"}
+
+    def __init__(self, model_size, compute_type, log):
+        self.compute_type = compute_type
+        log.append((model_size, compute_type))
+
+    def transcribe(self, audio, beam_size=5):
+        return iter([SimpleNamespace(text=self.TEXT[self.compute_type])]), None
+
+
+class ComputeSelectionTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clip = os.path.join(self.tmp.name, "clip.wav")
+        self.reference = os.path.join(self.tmp.name, "clip.txt")
+        self.cache = os.path.join(self.tmp.name, "cache.json")
+        write_wav(self.clip, seconds=0.5)
+        with open(self.reference, "w") as fh:
+            fh.write("Tell me about a time.")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def select(self, log, floor=0.9, **kwargs):
+        return select_compute_type(
+            "cpu", ["base"], ["int8", "int8_float16", "float32"], ("base", "int8"),
+            clip=self.clip, reference_path=self.reference, floor=floor, cache_path=self.cache,
+            model_factory=lambda size, ctype: ScriptedModel(size, ctype, log),
+            supported=["int8", "float32"], **kwargs,
+        )
+
+    def test_word_error_rate(self):
+        self.assertEqual(word_error_rate("Tell me about a time.", "tell me about a time"), 0.0)
+        self.assertEqual(word_error_rate("a b c d", "a x c"), 0.5)
+        self.assertEqual(word_error_rate("", ""), 0.0)
+
+    def test_choose_prefers_fastest_above_floor(self):
+        results = [
+            {"model_size": "base", "compute_type": "int8", "seconds": 1.0, "accuracy": 0.8},
+            {"model_size": "base", "compute_type": "float32", "seconds": 3.0, "accuracy": 0.95},
+            {"model_size": "small", "compute_type": "int8", "seconds": 2.0, "accuracy": 0.93},
+        ]
+        self.assertEqual(choose(results, 0.9)[0]["model_size"], "small")
+        self.assertEqual(choose(results, 0.99)[0]["compute_type"], "float32")
+
+    def test_selection_benchmarks_supported_types_once_per_host(self):
+        log = []
+        selection = self.select(log)
+        self.assertEqual(log, [("base", "int8"), ("base", "float32")])
+        self.assertEqual((selection.compute_type, selection.source), ("int8", "benchmark"))
+        self.assertEqual([r["accuracy"] for r in selection.results], [1.0, 0.6])
+        self.assertEqual(selection.host_id, host_fingerprint()["id"])
+
+        log.clear()
+        cached = self.select(log)
+        self.assertEqual(log, [])
+        self.assertEqual((cached.compute_type, cached.source), ("int8", "cache"))
+
+    def test_falls_back_without_a_reference(self):
+        selection = select_compute_type("cpu", ["base"], ["int8"], ("small", "float32"), clip="", reference_path="")
+        self.assertEqual((selection.model_size, selection.compute_type, selection.source), ("small", "float32", "config"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+import word_timing
+from word_timing import WordTimings, artifact_path, load_artifact, pacing_metrics, save_artifact
+
+
+def timed(spans, probability=0.9):
+    """WordTimings for ``(start, end)`` spans, one word each."""
+    segments = [{"words": [
+        {"word": f" w{i}", "start": start, "end": end, "probability": probability} for i, (start, end) in enumerate(spans)
+    ]}]
+    return WordTimings.from_segments(segments, "en")
+
+
+class WordTimingsTests(unittest.TestCase):
+    def test_from_whisper_segments(self):
+        Word = SimpleNamespace
+        segments = [
+            SimpleNamespace(words=[Word(word=" Hello", start=0.0, end=0.4, probability=0.99)]),
+            SimpleNamespace(words=[Word(word=" there.", start=0.5, end=0.9, probability=0.4)]),
+        ]
+        words = WordTimings.from_segments(segments, "en")
+        self.assertEqual(words.text, "Hello there.")
+        self.assertEqual(words.segment.tolist(), [0, 1])
+        self.assertIsNone(WordTimings.from_segments([SimpleNamespace(words=None)]))
+
+    def test_artifact_round_trip(self):
+        words = timed([(0.0, 0.3), (0.35, 0.8)])
+        with tempfile.TemporaryDirectory() as root:
+            path = save_artifact("attempt-1", words, root)
+            self.assertEqual(path, os.path.join(root, "attempt-1.npz"))
+            loaded = load_artifact("attempt-1", root)
+            self.assertEqual(loaded.words.tolist(), words.words.tolist())
+            np.testing.assert_array_equal(loaded.start, words.start)
+            self.assertEqual(loaded.language, "en")
+            self.assertIsNone(load_artifact("missing", root))
+        # Bulk ids are paths; they must not escape the artifact directory.
+        self.assertEqual(os.path.dirname(artifact_path("../b/c.wav", "/x")), "/x")
+
+
+class PacingTests(unittest.TestCase):
+    def test_rate_over_speech_time_and_pauses(self):
+        # 40 words at 0.25s each, no gaps, then a 2s pause, then 40 more.
+        first = [(i * 0.25, (i + 1) * 0.25) for i in range(40)]
+        second = [(12.0 + i * 0.25, 12.0 + (i + 1) * 0.25) for i in range(40)]
+        metrics = pacing_metrics(timed(first + second), window_seconds=5)
+        self.assertEqual(metrics["speech_seconds"], 20.0)
+        self.assertEqual(metrics["articulation_wpm"], 240.0)
+        self.assertEqual(metrics["wpm"], 218.2)
+        self.assertEqual(metrics["pauses"]["count"], 1)
+        self.assertEqual(metrics["pauses"]["max_seconds"], 2.0)
+        self.assertEqual(metrics["pauses"]["long"], 1)
+        # The window holding the pause slows down; the 2s tail is too short to count.
+        self.assertEqual(metrics["window_wpm"], [240.0, 240.0, 144.0, 240.0])
+        self.assertEqual(metrics["wpm_cv"], 0.192)
+
+    def test_short_gaps_are_not_pauses(self):
+        metrics = pacing_metrics(timed([(i * 0.5, i * 0.5 + 0.4) for i in range(10)]))
+        self.assertEqual(metrics["pauses"], {"count": 0})
+        self.assertIsNone(metrics["wpm_cv"])
+
+    def test_empty(self):
+        self.assertIsNone(pacing_metrics(timed([]))["articulation_wpm"])
+
+    def test_cli_recomputes_stored_attempts(self):
+        with tempfile.TemporaryDirectory() as root:
+            save_artifact("a1", timed([(0.0, 0.5), (0.5, 1.0)]), root)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                code = word_timing.main(["--dir", root])
+            self.assertEqual(code, 0)
+            self.assertEqual(json.loads(out.getvalue())["attempt_id"], "a1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,239 @@
+"""Long-form transcription: split decoded audio at pauses and transcribe the chunks in parallel.
+
+Enabled by setting ``LONGFORM_PROCESSES`` above 1. Recordings at least
+``LONGFORM_MIN_SECONDS`` long are cut at VAD-detected silences into chunks of at
+most ``LONGFORM_CHUNK_SECONDS``, transcribed concurrently by a process pool with
+one ``WhisperModel`` per process, and stitched back together in order.
+"""
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from media import SAMPLE_RATE
+from whisper_tuning import WHISPER_CPU_AFFINITY, WHISPER_CPU_THREADS, affinity_for, pin_cpus
+from word_timing import WORD_TIMESTAMPS
+
+LONGFORM_PROCESSES = int(os.environ.get("LONGFORM_PROCESSES", "0"))
+LONGFORM_MIN_SECONDS = float(os.environ.get("LONGFORM_MIN_SECONDS", "180"))
+LONGFORM_CHUNK_SECONDS = float(os.environ.get("LONGFORM_CHUNK_SECONDS", "60"))
+
+# Longest run of words repeated across a chunk boundary that is treated as a duplicate.
+MAX_BOUNDARY_OVERLAP_WORDS = 8
+
+_WORD_RE = re.compile(r"[\w']+")
+
+
+# ---------- Chunk planning ----------
+def group_regions(regions: List[Dict[str, int]], max_samples: int) -> List[Tuple[int, int]]:
+    """Merge consecutive speech regions into ``(start, end)`` sample ranges no longer than
+    ``max_samples``; every cut falls inside a pause between two regions."""
+    chunks: List[Tuple[int, int]] = []
+    start = end = None
+    for region in regions:
+        if start is None:
+            start, end = region["start"], region["end"]
+        elif region["end"] - start <= max_samples:
+            end = region["end"]
+        else:
+            chunks.append((start, end))
+            start, end = region["start"], region["end"]
+    if start is not None:
+        chunks.append((start, end))
+    return chunks
+
+
+def plan_chunks(audio: np.ndarray, max_chunk_seconds: float = LONGFORM_CHUNK_SECONDS) -> List[Tuple[int, int]]:
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    # Single utterances longer than a chunk are split by the VAD itself at its
+    # last short pause (or hard-cut as a last resort).
+    options = VadOptions(max_speech_duration_s=max_chunk_seconds, min_silence_duration_ms=300, speech_pad_ms=200)
+    regions = get_speech_timestamps(audio, options, sampling_rate=SAMPLE_RATE)
+    return group_regions(regions, int(max_chunk_seconds * SAMPLE_RATE))
+
+
+# ---------- Stitching ----------
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _trim_boundary(previous: Dict[str, Any], segment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Drop words at the start of ``segment`` that repeat the end of ``previous``."""
+    prev_words = _words(previous["text"])
+    seg_words = _words(segment["text"])
+    if not seg_words:
+        return None
+    # A single word is as likely a real reply ("Yes.") as a repeat, as in the prefix rule below.
+    if len(seg_words) >= 2 and seg_words == prev_words[-len(seg_words):]:
+        return None
+    limit = min(MAX_BOUNDARY_OVERLAP_WORDS, len(prev_words), len(seg_words))
+    for k in range(limit, 1, -1):
+        if prev_words[-k:] == seg_words[:k]:
+            # Cut the raw text after the k-th word so punctuation and casing survive.
+            matches = list(_WORD_RE.finditer(segment["text"]))
+            text = segment["text"][matches[k - 1].end():].lstrip(" ,.;:")
+            trimmed = {**segment, "text": " " + text if text else ""}
+            if segment.get("words") is not None:
+                trimmed["words"] = _drop_leading_words(segment["words"], k)
+            return trimmed
+    return segment
+
+
+def _drop_leading_words(words: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    """Timed words left after cutting the first ``count`` text words (Whisper words can hold several)."""
+    dropped = 0
+    for i, word in enumerate(words):
+        if dropped >= count:
+            return words[i:]
+        dropped += len(_words(word["word"]))
+    return []
+
+
+def stitch_segments(chunk_segments: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Concatenate per-chunk segments (already in absolute time) in chunk order,
+    de-duplicating text repeated across each chunk boundary."""
+    stitched: List[Dict[str, Any]] = []
+    for segments in chunk_segments:
+        for i, segment in enumerate(segments):
+            if i == 0 and stitched:
+                segment = _trim_boundary(stitched[-1], segment)
+                if segment is None or not segment["text"].strip():
+                    continue
+            stitched.append(segment)
+    return stitched
+
+
+# ---------- Worker processes ----------
+_worker_model = None
+
+
+def _init_worker(model_size: str, device: str, compute_type: str, cpu_threads: int, cpu_slots=None) -> None:
+    global _worker_model
+    from faster_whisper import WhisperModel
+    if cpu_slots is not None:
+        # Each process takes the next free slice of CPUs.
+        cpus = cpu_slots.get()
+        pin_cpus(cpus)
+        cpu_threads = cpu_threads or len(cpus)
+    _worker_model = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_chunk(
+    shm_name: str,
+    length: int,
+    start: int,
+    end: int,
+    beam_size: int,
+) -> Tuple[int, Optional[str], List[Dict[str, Any]]]:
+    # Spawned workers share the parent's resource tracker, so attaching here does
+    # not hand ownership of the block away from the parent, which unlinks it.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    audio = None
+    try:
+        audio = np.ndarray((length,), dtype=np.float32, buffer=shm.buf)[start:end]
+        segments, info = _worker_model.transcribe(audio, beam_size=beam_size, word_timestamps=WORD_TIMESTAMPS)
+        offset = start / SAMPLE_RATE
+        result = []
+        for seg in segments:
+            segment = {"start": round(seg.start + offset, 3), "end": round(seg.end + offset, 3), "text": seg.text}
+            if seg.words is not None:
+                segment["words"] = [
+                    {"word": w.word, "start": round(w.start + offset, 3), "end": round(w.end + offset, 3), "probability": w.probability}
+                    for w in seg.words
+                ]
+            result.append(segment)
+        return start, info.language, result
+    finally:
+        # Views into the block must be released before it can be closed.
+        audio = None
+        shm.close()
+
+
+class LongformTranscriber:
+    """Transcribes long recordings chunk-parallel across a pool of model processes."""
+
+    def __init__(
+        self,
+        model_size: str,
+        device: str,
+        compute_type: str,
+        processes: int = LONGFORM_PROCESSES,
+        max_chunk_seconds: float = LONGFORM_CHUNK_SECONDS,
+        min_seconds: float = LONGFORM_MIN_SECONDS,
+    ):
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.processes = max(1, processes)
+        self.max_chunk_seconds = max_chunk_seconds
+        self.min_seconds = min_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def applies_to(self, audio: np.ndarray) -> bool:
+        return len(audio) / SAMPLE_RATE >= self.min_seconds
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawn, not fork: the parent already runs CTranslate2 and MediaPipe threads.
+            context = multiprocessing.get_context("spawn")
+            cpu_slots = None
+            threads = WHISPER_CPU_THREADS or max(1, (os.cpu_count() or 1) // self.processes)
+            if WHISPER_CPU_AFFINITY:
+                cpu_slots = context.Queue()
+                for slot in range(self.processes):
+                    cpu_slots.put(affinity_for(slot, self.processes))
+                threads = WHISPER_CPU_THREADS
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.model_size, self.device, self.compute_type, threads, cpu_slots),
+            )
+        return self._executor
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        beam_size: int = 5,
+        progress: Optional[Callable[[float], None]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return ``(segments, language)``; segments carry absolute start/end seconds."""
+        chunks = plan_chunks(audio, self.max_chunk_seconds)
+        if not chunks:
+            return [], None
+
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, audio.nbytes))
+        try:
+            np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+            pool = self._pool()
+            futures = [
+                pool.submit(_transcribe_chunk, shm.name, len(audio), start, end, beam_size)
+                for start, end in chunks
+            ]
+            by_start: Dict[int, List[Dict[str, Any]]] = {}
+            languages: Dict[str, int] = {}
+            for done, future in enumerate(as_completed(futures), start=1):
+                start, language, segments = future.result()
+                by_start[start] = segments
+                if language:
+                    languages[language] = languages.get(language, 0) + 1
+                if progress:
+                    progress(done / len(futures))
+        finally:
+            shm.close()
+            shm.unlink()
+
+        ordered = [by_start[start] for start, _ in chunks]
+        language = max(languages, key=languages.get) if languages else None
+        return stitch_segments(ordered), language
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
@@ -1,12 +1,384 @@
 import cv2
+import math
 import mediapipe as mp
 import numpy as np
 import os
+import resource
+import sys
+import threading
 import urllib.request
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+# Every Nth decoded frame goes through the landmarker.
+VIDEO_SAMPLE_EVERY = int(os.environ.get("VIDEO_SAMPLE_EVERY", "5"))
+# Frames are downscaled so their longer side is at most this many pixels.
+VIDEO_MAX_DIMENSION = int(os.environ.get("VIDEO_MAX_DIMENSION", "640"))
+# Video past this point is not analyzed.
+VIDEO_MAX_SECONDS = float(os.environ.get("VIDEO_MAX_SECONDS", "900"))
+# Adaptive sampling: start at every VIDEO_MAX_SAMPLE_EVERY-th frame, drop to
+# VIDEO_SAMPLE_EVERY around changes, and stop once every score's 95% confidence
+# interval is within +/- VIDEO_CI_TOLERANCE (after at least VIDEO_MIN_SAMPLES
+# samples and VIDEO_MIN_ANALYZED_SECONDS of video). VIDEO_ADAPTIVE_SAMPLING=0
+# samples every VIDEO_SAMPLE_EVERY-th frame to the end.
+VIDEO_ADAPTIVE_SAMPLING = os.environ.get("VIDEO_ADAPTIVE_SAMPLING", "1") == "1"
+VIDEO_MAX_SAMPLE_EVERY = int(os.environ.get("VIDEO_MAX_SAMPLE_EVERY", "20"))
+VIDEO_CI_TOLERANCE = float(os.environ.get("VIDEO_CI_TOLERANCE", "0.05"))
+VIDEO_MIN_SAMPLES = int(os.environ.get("VIDEO_MIN_SAMPLES", "30"))
+VIDEO_MIN_ANALYZED_SECONDS = float(os.environ.get("VIDEO_MIN_ANALYZED_SECONDS", "60"))
+# Results carry the per-frame timeline downsampled to at most this many points
+# (0 leaves it out).
+VIDEO_TIMELINE_POINTS = int(os.environ.get("VIDEO_TIMELINE_POINTS", "120"))
+
+Frame = Tuple[float, np.ndarray]
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process right now (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class FrameBuffers:
+    """Destination arrays reused for every frame of a video, reallocated only when the shape changes."""
 
-class VideoAnalyzer:
     def __init__(self):
+        self._buffers: Dict[str, np.ndarray] = {}
+
+    def get(self, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=np.uint8)
+            self._buffers[name] = buf
+        return buf
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buf.nbytes for buf in self._buffers.values())
+
+
+class FrameSampler:
+    """Decides which decoded frames reach the landmarker and when to stop.
+
+    Each sampled frame stands in for the frames skipped since the previous one,
+    so scores are ratios weighted by that gap and dense bursts around changes
+    don't skew them. Confidence intervals are Wilson intervals over an effective
+    sample size that discounts both uneven weights and how often consecutive
+    samples agree (neighbouring frames are far from independent). A metric that
+    hasn't changed at all says nothing about that correlation, which is why
+    sampling never stops before ``min_frames``.
+    """
+
+    METRICS = ("face_presence_score", "eye_contact_score", "smile_score")
+    Z = 1.96
+    # A change keeps the sampler dense for this many samples before it backs off.
+    DENSE_SAMPLES = 4
+
+    def __init__(
+        self,
+        min_stride: int,
+        max_stride: int,
+        tolerance: float = 0.0,
+        min_samples: int = 0,
+        min_frames: int = 0,
+    ):
+        self.min_stride = max(1, min_stride)
+        self.max_stride = max(self.min_stride, max_stride)
+        self.tolerance = tolerance
+        self.min_samples = min_samples
+        self.min_frames = min_frames
+        self.stride = self.max_stride
+        self.samples = 0
+        self.done = False
+        self._next = self.stride
+        self._last_index = 0
+        self._weight = 0
+        self._calm = 0
+        self._previous: Optional[Tuple[bool, ...]] = None
+        self._weight_sum = 0.0
+        self._weight_sq_sum = 0.0
+        self._hits = {name: 0.0 for name in self.METRICS}
+        self._changes = {name: 0 for name in self.METRICS}
+
+    @classmethod
+    def fixed(cls, stride: int) -> "FrameSampler":
+        return cls(stride, stride)
+
+    @property
+    def adaptive(self) -> bool:
+        return self.max_stride > self.min_stride or self.tolerance > 0
+
+    def take(self, index: int) -> Optional[bool]:
+        """For decoded frame ``index`` (1-based): True to analyze it, None once sampling is done."""
+        if self.done:
+            return None
+        if index < self._next:
+            return False
+        self._weight = index - self._last_index
+        self._last_index = index
+        # observe() may still shorten or stretch this once the frame is analyzed.
+        self._next = index + self.stride
+        return True
+
+    @property
+    def weight(self) -> int:
+        """How many decoded frames the sample last taken stands in for."""
+        return self._weight or self.stride
+
+    def observe(self, flags: Dict[str, bool]) -> None:
+        """Record the landmarker's verdict for the frame last taken."""
+        weight = self.weight
+        self.samples += 1
+        self._weight_sum += weight
+        self._weight_sq_sum += weight * weight
+        for name in self.METRICS:
+            if flags.get(name):
+                self._hits[name] += weight
+
+        current = tuple(bool(flags.get(name)) for name in self.METRICS)
+        if self._previous is not None:
+            for name, now, before in zip(self.METRICS, current, self._previous):
+                self._changes[name] += now != before
+        if self._previous is not None and current != self._previous:
+            self.stride = self.min_stride
+            self._calm = 0
+        else:
+            self._calm += 1
+            if self._calm >= self.DENSE_SAMPLES:
+                self.stride = min(self.max_stride, self.stride * 2)
+                self._calm = 0
+        self._previous = current
+        self._next = self._last_index + self.stride
+
+        if self.tolerance > 0 and self.samples >= self.min_samples and self._last_index >= self.min_frames:
+            self.done = all(hi - lo <= 2 * self.tolerance for lo, hi in self.intervals(digits=None).values())
+
+    def scores(self) -> Dict[str, float]:
+        if not self._weight_sum:
+            return {name: 0.0 for name in self.METRICS}
+        return {name: self._hits[name] / self._weight_sum for name in self.METRICS}
+
+    def intervals(self, digits: Optional[int] = 3) -> Dict[str, List[float]]:
+        if not self._weight_sum:
+            return {name: [0.0, 1.0] for name in self.METRICS}
+        n_weights = self._weight_sum ** 2 / self._weight_sq_sum
+        z2 = self.Z * self.Z
+        out: Dict[str, List[float]] = {}
+        for name, p in self.scores().items():
+            n = n_weights * self._independence(name, p)
+            denom = 1 + z2 / n
+            center = (p + z2 / (2 * n)) / denom
+            half = self.Z * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / denom
+            lo, hi = max(0.0, center - half), min(1.0, center + half)
+            out[name] = [round(lo, digits), round(hi, digits)] if digits is not None else [lo, hi]
+        return out
+
+    def _independence(self, name: str, p: float) -> float:
+        """(1 - r) / (1 + r) for the lag-1 autocorrelation r of a metric's samples.
+
+        For a two-state Markov chain, consecutive samples differ with probability
+        2p(1-p)(1-r), which gives r from the observed number of changes.
+        """
+        pairs = self.samples - 1
+        spread = 2 * p * (1 - p)
+        if pairs < 1 or spread <= 0:
+            return 1.0
+        r = min(0.99, max(0.0, 1 - self._changes[name] / (pairs * spread)))
+        return (1 - r) / (1 + r)
+
+
+class FeatureTimeline:
+    """Per-analyzed-frame features kept as parallel NumPy columns.
+
+    Columns are preallocated and doubled as needed. Float features are NaN where
+    the landmarker gave nothing to measure (no face, no blendshapes, no pose);
+    ``weight`` is the number of decoded frames the sample stands in for.
+    """
+
+    COLUMNS = (
+        ("timestamp", np.float64),
+        ("weight", np.float32),
+        ("face", np.bool_),
+        ("looking", np.bool_),
+        ("yaw", np.float32),
+        ("pitch", np.float32),
+        ("smile", np.float32),
+        ("blink_left", np.float32),
+        ("blink_right", np.float32),
+    )
+    SMILE_THRESHOLD = 0.6  # mouthSmileLeft + mouthSmileRight, about 0.3 per side
+    BLINK_THRESHOLD = 0.5  # mean of eyeBlinkLeft and eyeBlinkRight
+
+    def __init__(self, capacity: int = 256):
+        self._size = 0
+        self._columns = {name: self._empty(dtype, max(1, capacity)) for name, dtype in self.COLUMNS}
+
+    @staticmethod
+    def _empty(dtype, capacity: int) -> np.ndarray:
+        if np.issubdtype(dtype, np.floating):
+            return np.full(capacity, np.nan, dtype=dtype)
+        return np.zeros(capacity, dtype=dtype)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._columns[name][:self._size]
+
+    def append(self, timestamp: float, weight: float, **features: Any) -> None:
+        capacity = len(self._columns["timestamp"])
+        if self._size == capacity:
+            for name, dtype in self.COLUMNS:
+                grown = self._empty(dtype, capacity * 2)
+                grown[:capacity] = self._columns[name]
+                self._columns[name] = grown
+        row = self._size
+        self._columns["timestamp"][row] = timestamp
+        self._columns["weight"][row] = weight
+        for name, value in features.items():
+            self._columns[name][row] = value
+        self._size += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Weighted scores plus blink rate, head-motion variance and the longest gaze-away stretch."""
+        ts = self["timestamp"]
+        weight = self["weight"].astype(np.float64)
+        face = self["face"]
+        looking = self["looking"]
+        total = weight.sum()
+        smiling = self["smile"] > self.SMILE_THRESHOLD  # NaN compares False
+
+        closed = face & ((self["blink_left"] + self["blink_right"]) / 2 > self.BLINK_THRESHOLD)
+        onsets = int(np.count_nonzero(closed[1:] & ~closed[:-1])) + int(closed[:1].sum())
+        span = float(ts[-1] - ts[0]) if len(ts) > 1 else 0.0
+
+        posed = np.isfinite(self["yaw"]) & np.isfinite(self["pitch"])
+        if posed.any():
+            w = weight[posed]
+            yaw, pitch = self["yaw"][posed].astype(np.float64), self["pitch"][posed].astype(np.float64)
+            yaw_var = float(np.average((yaw - np.average(yaw, weights=w)) ** 2, weights=w))
+            pitch_var = float(np.average((pitch - np.average(pitch, weights=w)) ** 2, weights=w))
+            head_motion = {"yaw_variance": round(yaw_var, 3), "pitch_variance": round(pitch_var, 3)}
+        else:
+            head_motion = None
+
+        return {
+            "face_presence_score": round(float(weight[face].sum() / total), 2) if total else 0.0,
+            "eye_contact_score": round(float(weight[looking].sum() / total), 2) if total else 0.0,
+            "smile_score": round(float(weight[smiling].sum() / total), 2) if total else 0.0,
+            # Sampled frames can miss short blinks, so this is a lower bound at wide strides.
+            "blink_rate_per_min": round(onsets * 60.0 / span, 1) if span > 0 else None,
+            "head_motion": head_motion,
+            "longest_gaze_away_seconds": round(self._longest_run(~looking), 2),
+        }
+
+    def _longest_run(self, mask: np.ndarray) -> float:
+        """Longest stretch, in seconds, from a run's first sample to the next sample outside it."""
+        if not mask.any():
+            return 0.0
+        ts = self["timestamp"]
+        edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)  # exclusive
+        stop = ts[np.minimum(ends, len(ts) - 1)]
+        return float(np.max(stop - ts[starts]))
+
+    def downsample(self, points: int) -> Dict[str, List[Any]]:
+        """Bin the timeline into at most ``points`` equal time slices for charting.
+
+        Each slice reports the weighted share of frames with a face, with eye
+        contact and smiling, and mean yaw/pitch in degrees (None where no pose was
+        measured). Empty slices are dropped.
+        """
+        n = len(self)
+        columns = ("t", "face", "eye_contact", "smile", "yaw", "pitch")
+        if n == 0 or points <= 0:
+            return {name: [] for name in columns}
+        ts = self["timestamp"]
+        span = ts[-1] - ts[0]
+        if n <= points or span <= 0:
+            bins = np.arange(n)
+            points = n
+        else:
+            bins = np.minimum(((ts - ts[0]) / span * points).astype(np.int64), points - 1)
+        weight = self["weight"].astype(np.float64)
+        total = np.bincount(bins, weights=weight, minlength=points)
+        keep = total > 0
+
+        def share(mask: np.ndarray) -> np.ndarray:
+            return np.bincount(bins, weights=weight * mask, minlength=points)[keep] / total[keep]
+
+        def mean(values: np.ndarray) -> List[Optional[float]]:
+            values = values.astype(np.float64)
+            finite = np.isfinite(values)
+            w = np.where(finite, weight, 0.0)
+            sums = np.bincount(bins, weights=np.where(finite, values, 0.0) * w, minlength=points)[keep]
+            counts = np.bincount(bins, weights=w, minlength=points)[keep]
+            return [round(float(s / c), 1) if c else None for s, c in zip(sums, counts)]
+
+        starts = np.full(points, np.inf)
+        np.minimum.at(starts, bins, ts)
+        return {
+            "t": np.round(starts[keep], 2).tolist(),
+            "face": np.round(share(self["face"]), 2).tolist(),
+            "eye_contact": np.round(share(self["looking"]), 2).tolist(),
+            "smile": np.round(share(self["smile"] > self.SMILE_THRESHOLD), 2).tolist(),
+            "yaw": mean(self["yaw"]),
+            "pitch": mean(self["pitch"]),
+        }
+
+
+def resolve_blendshapes(categories, names: Iterable[str]) -> Dict[str, int]:
+    """Positions of the named blendshapes in a landmarker result's category list."""
+    wanted = set(names)
+    slots = {}
+    for i, category in enumerate(categories):
+        name = category.category_name
+        if name in wanted:
+            slots[name] = i
+    return slots
+
+
+class VideoAnalyzer:
+    """Face presence, eye contact and smile ratios computed by a streaming frame pipeline:
+
+        decode -> sample -> limit -> resize -> convert -> infer -> aggregate
+
+    Each stage is a generator, so at most one sampled frame is in flight, and the
+    resize/convert stages write into preallocated buffers. Aggregation records a
+    ``FeatureTimeline`` row per analyzed frame and derives every metric from it.
+    """
+
+    BLENDSHAPES = ("mouthSmileLeft", "mouthSmileRight", "eyeBlinkLeft", "eyeBlinkRight")
+    # Degrees of pitch and yaw, like every pose value here. ``_head_pose`` fits the
+    # landmarks against their own geometry rather than a head model, so its angles
+    # stay small; the check was tuned as "12" on degrees scaled by 360.
+    GAZE_LIMIT_DEGREES = 12.0 / 360
+
+    def __init__(
+        self,
+        sample_every: int = VIDEO_SAMPLE_EVERY,
+        max_dimension: int = VIDEO_MAX_DIMENSION,
+        max_seconds: float = VIDEO_MAX_SECONDS,
+        adaptive: bool = VIDEO_ADAPTIVE_SAMPLING,
+        max_sample_every: int = VIDEO_MAX_SAMPLE_EVERY,
+        ci_tolerance: float = VIDEO_CI_TOLERANCE,
+        min_samples: int = VIDEO_MIN_SAMPLES,
+        min_analyzed_seconds: float = VIDEO_MIN_ANALYZED_SECONDS,
+        timeline_points: int = VIDEO_TIMELINE_POINTS,
+    ):
+        self.sample_every = max(1, sample_every)
+        self.max_dimension = max_dimension
+        self.max_seconds = max_seconds
+        self.adaptive = adaptive
+        self.max_sample_every = max_sample_every
+        self.ci_tolerance = ci_tolerance
+        self.min_samples = min_samples
+        self.min_analyzed_seconds = min_analyzed_seconds
+        self.timeline_points = timeline_points
         self.model_path = os.path.join(os.path.dirname(__file__), "face_landmarker.task")
         self._ensure_model_exists()
         
@@ -22,6 +394,10 @@ class VideoAnalyzer:
             num_faces=1
         )
         self.landmarker = FaceLandmarker.create_from_options(self.options)
+        # The landmarker is stateful: calls must not overlap and VIDEO-mode
+        # timestamps have to keep increasing across every video it sees.
+        self._lock = threading.Lock()
+        self._last_timestamp_ms = 0
 
     def _ensure_model_exists(self):
         if not os.path.exists(self.model_path):
@@ -30,78 +406,178 @@ class VideoAnalyzer:
             urllib.request.urlretrieve(url, self.model_path)
             print("Download complete.")
 
+    def new_sampler(self, fps: float = 30.0) -> FrameSampler:
+        if not self.adaptive:
+            return FrameSampler.fixed(self.sample_every)
+        return FrameSampler(
+            self.sample_every,
+            self.max_sample_every,
+            self.ci_tolerance,
+            self.min_samples,
+            min_frames=int(self.min_analyzed_seconds * (fps or 30.0)),
+        )
+
+    # ---------- Entry points ----------
     def analyze(self, video_path: str) -> Dict[str, Any]:
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             return {"error": "Could not open video file"}
-
         fps = cap.get(cv2.CAP_PROP_FPS) or 30
-        frame_count = 0
-        face_detected_count = 0
-        looking_at_camera_count = 0
-        smiling_count = 0
-        
-        # Sampling rate: process every 5th frame to speed up
-        skip_frames = 5
-        
+        sampler = self.new_sampler(fps)
+        return self._run(self._capture_frames(cap, fps, sampler), sampler)
+
+    def analyze_media(self, media) -> Dict[str, Any]:
+        """Analyze a ``media.DecodedMedia``; only sampled frames are converted out of the
+        decoder, and decoding stops as soon as the sampler is done."""
+        sampler = self.new_sampler(media.fps)
+        return self._run(media.frames(select=sampler.take), sampler)
+
+    def analyze_frames(self, frames: Iterable[Frame]) -> Dict[str, Any]:
+        """Analyze every ``(timestamp_seconds, bgr_frame)`` pair, sampling them here."""
+        sampler = self.new_sampler()
+        return self._run(self._sample(frames, sampler), sampler)
+
+    # ---------- Stages ----------
+    def _capture_frames(self, cap, fps: float, sampler: FrameSampler) -> Iterator[Frame]:
+        """Decode + sample with OpenCV: skipped frames are grabbed but never retrieved."""
+        buffers = FrameBuffers()
+        index = 0
         try:
-            while cap.isOpened():
-                success, image = cap.read()
-                if not success:
+            while cap.grab():
+                index += 1
+                take = sampler.take(index)
+                if take is None:
                     break
-                
-                frame_count += 1
-                if frame_count % skip_frames != 0:
+                if not take:
                     continue
-
-                # Convert the BGR image to RGB.
-                image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb)
-                
-                # Timestamp in milliseconds
-                frame_timestamp_ms = int((frame_count / fps) * 1000)
-                
-                result = self.landmarker.detect_for_video(mp_image, frame_timestamp_ms)
-
-                if result.face_landmarks:
-                    face_detected_count += 1
-                    # result.face_landmarks is a list of lists of NormalizedLandmark
-                    face_landmarks = result.face_landmarks[0]
-                    
-                    if self._is_looking_at_camera(face_landmarks, image.shape):
-                        looking_at_camera_count += 1
-                    
-                    if result.face_blendshapes:
-                        # Blendshape 44 and 45 are usually smile related (mouthSmileLeft, mouthSmileRight)
-                        # We can also check 25 (mouthStretchLeft) etc.
-                        # Index 44: mouthSmileLeft, Index 45: mouthSmileRight
-                        blendshapes = result.face_blendshapes[0]
-                        smile_score = 0
-                        for b in blendshapes:
-                            if b.category_name in ['mouthSmileLeft', 'mouthSmileRight']:
-                                smile_score += b.score
-                        if smile_score > 0.6: # Average of 0.3 per side
-                            smiling_count += 1
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                success, image = cap.retrieve(buffers.get("decoded", (height, width, 3)))
+                if not success:
+                    break
+                yield index / fps, image
         finally:
             cap.release()
-        
-        analyzed_frames = frame_count // skip_frames
-        if analyzed_frames == 0:
+
+    def _sample(self, frames: Iterable[Frame], sampler: Optional[FrameSampler] = None) -> Iterator[Frame]:
+        sampler = sampler or FrameSampler.fixed(self.sample_every)
+        for index, frame in enumerate(frames, start=1):
+            take = sampler.take(index)
+            if take is None:
+                return
+            if take:
+                yield frame
+
+    def _limit(self, frames: Iterable[Frame], stats: Dict[str, Any]) -> Iterator[Frame]:
+        for timestamp, image in frames:
+            if timestamp > self.max_seconds:
+                stats["truncated"] = True
+                return
+            yield timestamp, image
+
+    def _resize(self, frames: Iterable[Frame], buffers: FrameBuffers) -> Iterator[Frame]:
+        for timestamp, image in frames:
+            h, w = image.shape[:2]
+            longest = max(h, w)
+            if self.max_dimension and longest > self.max_dimension:
+                scale = self.max_dimension / longest
+                size = (max(1, int(w * scale)), max(1, int(h * scale)))
+                dst = buffers.get("resized", (size[1], size[0], 3))
+                image = cv2.resize(image, size, dst=dst, interpolation=cv2.INTER_AREA)
+            yield timestamp, image
+
+    def _convert(self, frames: Iterable[Frame], buffers: FrameBuffers) -> Iterator[Frame]:
+        for timestamp, image in frames:
+            rgb = buffers.get("rgb", image.shape)
+            yield timestamp, cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=rgb)
+
+    def _infer(self, frames: Iterable[Frame], stats: Dict[str, Any]) -> Iterator[Tuple[float, Any, Tuple[int, ...]]]:
+        base_timestamp_ms = self._last_timestamp_ms + 1
+        for timestamp, image_rgb in frames:
+            # mp.Image copies the pixels, so the RGB buffer can be reused right away.
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb)
+
+            # Timestamp in milliseconds, offset so it keeps increasing across videos
+            frame_timestamp_ms = max(base_timestamp_ms + int(timestamp * 1000), self._last_timestamp_ms + 1)
+            self._last_timestamp_ms = frame_timestamp_ms
+
+            result = self.landmarker.detect_for_video(mp_image, frame_timestamp_ms)
+            stats["peak_rss"] = max(stats["peak_rss"], current_rss_bytes())
+            stats["frame_size"] = [image_rgb.shape[1], image_rgb.shape[0]]
+            stats["last_timestamp"] = timestamp
+            yield timestamp, result, image_rgb.shape
+
+    def _aggregate(self, results: Iterable[Tuple[float, Any, Tuple[int, ...]]], sampler: FrameSampler) -> Tuple[Dict[str, Any], FeatureTimeline]:
+        timeline = FeatureTimeline()
+        slots: Optional[Dict[str, int]] = None
+
+        for timestamp, result, shape in results:
+            features: Dict[str, Any] = {}
+            if result.face_landmarks:
+                features["face"] = True
+                # result.face_landmarks is a list of lists of NormalizedLandmark
+                pose = self._head_pose(result.face_landmarks[0], shape)
+                if pose is not None:
+                    pitch, yaw = pose
+                    features["pitch"], features["yaw"] = pitch, yaw
+                    features["looking"] = self._is_looking_at_camera(pitch, yaw)
+
+                if result.face_blendshapes:
+                    blendshapes = result.face_blendshapes[0]
+                    if slots is None:
+                        # Category order is fixed by the model, so look the names up once per video.
+                        slots = resolve_blendshapes(blendshapes, self.BLENDSHAPES)
+                    score = {name: blendshapes[i].score for name, i in slots.items()}
+                    features["smile"] = score.get("mouthSmileLeft", np.nan) + score.get("mouthSmileRight", np.nan)
+                    features["blink_left"] = score.get("eyeBlinkLeft", np.nan)
+                    features["blink_right"] = score.get("eyeBlinkRight", np.nan)
+
+            sampler.observe({
+                "face_presence_score": features.get("face", False),
+                "eye_contact_score": features.get("looking", False),
+                "smile_score": features.get("smile", 0.0) > FeatureTimeline.SMILE_THRESHOLD,
+            })
+            timeline.append(timestamp, sampler.weight, **features)
+
+        if len(timeline) == 0:
             return {
                 "face_presence_score": 0.0,
                 "eye_contact_score": 0.0,
                 "smile_score": 0.0,
                 "analyzed_frames": 0
-            }
+            }, timeline
 
-        return {
-            "face_presence_score": round(face_detected_count / analyzed_frames, 2),
-            "eye_contact_score": round(looking_at_camera_count / analyzed_frames, 2),
-            "smile_score": round(smiling_count / analyzed_frames, 2),
-            "analyzed_frames": analyzed_frames
+        metrics = timeline.metrics()
+        metrics["analyzed_frames"] = len(timeline)
+        metrics["confidence_intervals"] = sampler.intervals()
+        return metrics, timeline
+
+    def _run(self, sampled: Iterable[Frame], sampler: FrameSampler) -> Dict[str, Any]:
+        buffers = FrameBuffers()
+        stats: Dict[str, Any] = {"truncated": False, "peak_rss": current_rss_bytes(), "frame_size": None, "last_timestamp": None}
+        with self._lock:
+            frames = self._limit(sampled, stats)
+            frames = self._resize(frames, buffers)
+            frames = self._convert(frames, buffers)
+            metrics, timeline = self._aggregate(self._infer(frames, stats), sampler)
+        metrics["sampling"] = {
+            "adaptive": sampler.adaptive,
+            "stopped_early": sampler.done,
+            "analyzed_until_seconds": round(stats["last_timestamp"], 2) if stats["last_timestamp"] is not None else None,
         }
+        metrics["frame_size"] = stats["frame_size"]
+        metrics["truncated"] = stats["truncated"]
+        metrics["buffer_bytes"] = buffers.nbytes
+        metrics["peak_rss_mb"] = round(stats["peak_rss"] / (1024 * 1024), 1)
+        if self.timeline_points > 0:
+            metrics["timeline"] = timeline.downsample(self.timeline_points)
+        return metrics
+
+    def _is_looking_at_camera(self, pitch: float, yaw: float) -> bool:
+        return abs(pitch) <= self.GAZE_LIMIT_DEGREES and abs(yaw) <= self.GAZE_LIMIT_DEGREES
 
-    def _is_looking_at_camera(self, landmarks, image_shape):
+    def _head_pose(self, landmarks, image_shape) -> Optional[Tuple[float, float]]:
+        """(pitch, yaw) in degrees (as cv2.RQDecomp3x3 returns them), or None when solvePnP fails."""
         h, w, _ = image_shape
         face_3d = []
         face_2d = []
@@ -132,16 +608,8 @@ class VideoAnalyzer:
         success, rot_vec, trans_vec = cv2.solvePnP(face_3d, face_2d, cam_matrix, dist_matrix)
 
         if not success:
-            return False
+            return None
 
         rmat, _ = cv2.Rodrigues(rot_vec)
-        angles, _, _, _, _, _, _ = cv2.RQDecomp3x3(rmat)
-
-        x = angles[0] * 360
-        y = angles[1] * 360
-        
-        # Thresholds for "looking at camera"
-        if y < -12 or y > 12: return False
-        if x < -12 or x > 12: return False
-        
-        return True
+        angles = cv2.RQDecomp3x3(rmat)[0]
+        return float(angles[0]), float(angles[1])
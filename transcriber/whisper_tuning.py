@@ -0,0 +1,440 @@
+"""CPU thread layout for Whisper, and an auto-tuner that measures it on this host.
+
+    python whisper_tuning.py --clip answer.webm --threads 1,2,4,8 --workers 1,2,4
+
+runs the clip through every ``cpu_threads`` x ``num_workers`` combination that
+fits the host's CPUs. It writes the best settings for throughput and for latency
+to WHISPER_TUNING_PATH. At startup, any setting not given in the environment is
+taken from that file (the WHISPER_TUNING_GOAL entry), as long as it was written
+on a host with the same fingerprint.
+
+WHISPER_CPU_AFFINITY pins Whisper worker processes to CPUs. It can be "auto",
+which splits this process's CPUs evenly, or a CPU list such as "0-7,16-23",
+which is split the same way. Long-form pool processes each get their own slice.
+Several ``worker.py`` processes on one node take ``--cpu-slot i --cpu-slots n``.
+
+WHISPER_AUTOSELECT=1 picks the model size and compute type at startup. It times
+every WHISPER_AUTOSELECT_MODELS x WHISPER_AUTOSELECT_COMPUTE_TYPES pair the
+device supports on WHISPER_REFERENCE_CLIP. The pick is the fastest pair whose
+word accuracy against WHISPER_REFERENCE_TEXT is at least WHISPER_ACCURACY_FLOOR.
+The decision is cached per host fingerprint, clip and candidate set in
+WHISPER_AUTOSELECT_CACHE, so only the first start on a new kind of host pays
+for it.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from media import SAMPLE_RATE
+
+# 0 leaves the choice to the tuning file, then to CTranslate2 (threads) or 1 (workers).
+WHISPER_CPU_THREADS = int(os.environ.get("WHISPER_CPU_THREADS", "0"))
+WHISPER_NUM_WORKERS = int(os.environ.get("WHISPER_NUM_WORKERS", "0"))
+WHISPER_CPU_AFFINITY = os.environ.get("WHISPER_CPU_AFFINITY", "").strip()
+WHISPER_TUNING_PATH = os.environ.get(
+    "WHISPER_TUNING_PATH", os.path.join(tempfile.gettempdir(), "interview-transcriber-whisper-tuning.json")
+)
+# "throughput" or "latency".
+WHISPER_TUNING_GOAL = os.environ.get("WHISPER_TUNING_GOAL", "throughput")
+
+WHISPER_AUTOSELECT = os.environ.get("WHISPER_AUTOSELECT", "0") == "1"
+# Empty: only the configured WHISPER_MODEL.
+WHISPER_AUTOSELECT_MODELS = [m.strip() for m in os.environ.get("WHISPER_AUTOSELECT_MODELS", "").split(",") if m.strip()]
+WHISPER_AUTOSELECT_COMPUTE_TYPES = [
+    c.strip()
+    for c in os.environ.get("WHISPER_AUTOSELECT_COMPUTE_TYPES", "int8,int8_float32,int8_float16,int8_bfloat16,float32").split(",")
+    if c.strip()
+]
+WHISPER_REFERENCE_CLIP = os.environ.get("WHISPER_REFERENCE_CLIP", "")
+# A text file holding the clip's correct transcript.
+WHISPER_REFERENCE_TEXT = os.environ.get("WHISPER_REFERENCE_TEXT", "")
+# Minimum word accuracy (1 - WER) against the reference transcript.
+WHISPER_ACCURACY_FLOOR = float(os.environ.get("WHISPER_ACCURACY_FLOOR", "0.9"))
+WHISPER_AUTOSELECT_CACHE = os.environ.get(
+    "WHISPER_AUTOSELECT_CACHE", os.path.join(tempfile.gettempdir(), "interview-transcriber-whisper-autoselect.json")
+)
+
+_WORD_RE = re.compile(r"[\w']+")
+
+
+# ---------- Host ----------
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as fh:
+            lines = fh.read().splitlines()
+    except OSError:
+        return platform.processor()
+    fields = {}
+    for line in lines:
+        key, _, value = line.partition(":")
+        fields.setdefault(key.strip(), value.strip())
+    # The flags decide which kernels CTranslate2 can use, so they are part of the identity.
+    flags = fields.get("flags") or fields.get("Features") or ""
+    return f"{fields.get('model name') or fields.get('CPU part', '')} [{hashlib.sha256(flags.encode()).hexdigest()[:8]}]"
+
+
+def host_fingerprint() -> Dict[str, Any]:
+    host = {
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpu": _cpu_model(),
+        "cpus": len(available_cpus()),
+    }
+    host["id"] = hashlib.sha256(json.dumps(host, sort_keys=True).encode()).hexdigest()[:12]
+    return host
+
+
+# ---------- Affinity ----------
+def parse_cpu_list(spec: str) -> List[int]:
+    """``"0-3,8"`` -> ``[0, 1, 2, 3, 8]``."""
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return sorted(cpus)
+
+
+def available_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpu_slices(cpus: List[int], count: int) -> List[List[int]]:
+    """Split ``cpus`` into ``count`` contiguous, near-equal groups (none empty)."""
+    count = max(1, min(count, len(cpus)))
+    size, extra = divmod(len(cpus), count)
+    slices, start = [], 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        slices.append(cpus[start:end])
+        start = end
+    return slices
+
+
+def affinity_for(slot: int = 0, slots: int = 1, setting: str = WHISPER_CPU_AFFINITY) -> Optional[List[int]]:
+    """The CPUs worker ``slot`` of ``slots`` should run on, or None when pinning is off."""
+    if not setting:
+        return None
+    cpus = available_cpus() if setting == "auto" else parse_cpu_list(setting)
+    if not cpus:
+        return None
+    slices = cpu_slices(cpus, slots)
+    return slices[slot % len(slices)]
+
+
+def pin_cpus(cpus: Optional[List[int]]) -> bool:
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        os.sched_setaffinity(0, cpus)
+    except OSError as e:
+        print(f"Could not pin to CPUs {cpus}: {e}")
+        return False
+    return True
+
+
+def apply_affinity(slot: int = 0, slots: int = 1, setting: str = WHISPER_CPU_AFFINITY) -> Optional[List[int]]:
+    cpus = affinity_for(slot, slots, setting)
+    if pin_cpus(cpus):
+        print(f"Pinned process {os.getpid()} to CPUs {cpus}")
+        return cpus
+    return None
+
+
+# ---------- Settings ----------
+@dataclass
+class WhisperThreading:
+    cpu_threads: int = 0
+    num_workers: int = 1
+    source: str = "default"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def load_tuning(path: str = WHISPER_TUNING_PATH) -> Optional[Dict[str, Any]]:
+    """The tuning file, if it exists and was written on this kind of host."""
+    try:
+        with open(path) as fh:
+            tuning = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if tuning.get("host", {}).get("id") != host_fingerprint()["id"]:
+        print(f"Ignoring {path}: it was tuned on a different host.")
+        return None
+    return tuning
+
+
+def resolve_threading(
+    cpu_threads: int = WHISPER_CPU_THREADS,
+    num_workers: int = WHISPER_NUM_WORKERS,
+    goal: str = WHISPER_TUNING_GOAL,
+    path: str = WHISPER_TUNING_PATH,
+) -> WhisperThreading:
+    """Environment first, then the tuning file, then defaults."""
+    settings = WhisperThreading(cpu_threads, num_workers or 1, "env")
+    if cpu_threads and num_workers:
+        return settings
+    tuned = (load_tuning(path) or {}).get(goal)
+    if tuned:
+        settings.cpu_threads = cpu_threads or int(tuned["cpu_threads"])
+        settings.num_workers = num_workers or int(tuned["num_workers"])
+        settings.source = path
+    elif not (cpu_threads or num_workers):
+        settings.source = "default"
+    return settings
+
+
+# ---------- Auto-tuning ----------
+def _transcribe(model, audio, beam_size: int) -> str:
+    segments, _ = model.transcribe(audio, beam_size=beam_size)
+    # Segments are generated lazily; joining them runs the decode.
+    return " ".join(seg.text for seg in segments)
+
+
+def benchmark(
+    model_factory: Callable[[int, int], Any],
+    audio,
+    cpu_threads: int,
+    num_workers: int,
+    requests: int,
+    beam_size: int = 5,
+) -> Dict[str, Any]:
+    """Latency of one request on an idle model, and throughput of ``requests`` concurrent ones."""
+    model = model_factory(cpu_threads, num_workers)
+    _transcribe(model, audio, beam_size)  # warm-up
+    started = time.perf_counter()
+    _transcribe(model, audio, beam_size)
+    latency = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        list(pool.map(lambda _: _transcribe(model, audio, beam_size), range(requests)))
+    wall = time.perf_counter() - started
+    clip_seconds = len(audio) / SAMPLE_RATE
+    return {
+        "cpu_threads": cpu_threads,
+        "num_workers": num_workers,
+        "latency_seconds": round(latency, 3),
+        "throughput_x_realtime": round(requests * clip_seconds / wall, 3) if wall else None,
+    }
+
+
+def candidates(threads: List[int], workers: List[int], cpus: int) -> List[Dict[str, int]]:
+    combos = [(t, w) for t in threads for w in workers if t * w <= cpus]
+    return [{"cpu_threads": t, "num_workers": w} for t, w in combos] or [{"cpu_threads": cpus, "num_workers": 1}]
+
+
+def pick_best(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    keys = ("cpu_threads", "num_workers")
+    fastest = max(results, key=lambda r: r["throughput_x_realtime"] or 0)
+    quickest = min(results, key=lambda r: r["latency_seconds"])
+    return {
+        "throughput": {k: fastest[k] for k in keys},
+        "latency": {k: quickest[k] for k in keys},
+    }
+
+
+# ---------- Compute type selection ----------
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance over the reference length (case and punctuation ignored)."""
+    ref = _WORD_RE.findall(reference.lower())
+    hyp = _WORD_RE.findall(hypothesis.lower())
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, other in enumerate(hyp, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+@dataclass
+class WhisperSelection:
+    model_size: str
+    compute_type: str
+    source: str
+    reason: str = ""
+    host_id: str = ""
+    results: Optional[List[Dict[str, Any]]] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def supported_compute_types(device: str) -> List[str]:
+    import ctranslate2
+    return sorted(ctranslate2.get_supported_compute_types(device))
+
+
+def choose(results: List[Dict[str, Any]], floor: float) -> Tuple[Dict[str, Any], str]:
+    """Fastest candidate meeting the accuracy floor, else the most accurate one."""
+    passing = [r for r in results if r["accuracy"] >= floor]
+    if passing:
+        return min(passing, key=lambda r: r["seconds"]), f"fastest with accuracy >= {floor}"
+    return max(results, key=lambda r: (r["accuracy"], -r["seconds"])), f"none reached accuracy {floor}; most accurate"
+
+
+def select_compute_type(
+    device: str,
+    model_sizes: List[str],
+    compute_types: List[str],
+    fallback: Tuple[str, str],
+    clip: str = WHISPER_REFERENCE_CLIP,
+    reference_path: str = WHISPER_REFERENCE_TEXT,
+    floor: float = WHISPER_ACCURACY_FLOOR,
+    cache_path: str = WHISPER_AUTOSELECT_CACHE,
+    model_factory: Optional[Callable[[str, str], Any]] = None,
+    supported: Optional[List[str]] = None,
+) -> WhisperSelection:
+    """Time each (model size, compute type) on ``clip`` and pick one; falls back to ``fallback`` when it can't."""
+    host = host_fingerprint()
+    if not clip or not reference_path:
+        return WhisperSelection(*fallback, source="config", reason="WHISPER_REFERENCE_CLIP/TEXT not set", host_id=host["id"])
+    try:
+        with open(clip, "rb") as fh:
+            clip_digest = hashlib.sha256(fh.read()).hexdigest()
+        with open(reference_path) as fh:
+            reference = fh.read()
+    except OSError as e:
+        return WhisperSelection(*fallback, source="config", reason=f"reference unavailable: {e}", host_id=host["id"])
+
+    supported = supported if supported is not None else supported_compute_types(device)
+    types = [c for c in compute_types if c in supported]
+    if not types:
+        return WhisperSelection(*fallback, source="config", reason=f"none of {compute_types} supported on {device}", host_id=host["id"])
+
+    key = hashlib.sha256(json.dumps(
+        [host["id"], device, sorted(model_sizes), sorted(types), clip_digest, reference, floor]
+    ).encode()).hexdigest()[:16]
+    try:
+        with open(cache_path) as fh:
+            cache = json.load(fh)
+    except (OSError, ValueError):
+        cache = {}
+    if key in cache:
+        return WhisperSelection(**{**cache[key], "source": "cache"})
+
+    from media import decode_media
+
+    with decode_media(clip, with_video=False) as media:
+        audio = media.audio
+    if model_factory is None:
+        from faster_whisper import WhisperModel
+
+        def model_factory(model_size: str, compute_type: str):
+            return WhisperModel(model_size, device=device, compute_type=compute_type)
+
+    results = []
+    for model_size in model_sizes:
+        for compute_type in types:
+            try:
+                model = model_factory(model_size, compute_type)
+                _transcribe(model, audio, 5)  # warm-up
+                started = time.perf_counter()
+                text = _transcribe(model, audio, 5)
+                seconds = time.perf_counter() - started
+            except Exception as e:
+                print(f"Skipping {model_size}/{compute_type}: {e}")
+                continue
+            accuracy = max(0.0, 1.0 - word_error_rate(reference, text))
+            results.append({
+                "model_size": model_size,
+                "compute_type": compute_type,
+                "seconds": round(seconds, 3),
+                "accuracy": round(accuracy, 4),
+            })
+            print(f"Whisper {model_size}/{compute_type}: {seconds:.2f}s, accuracy {accuracy:.3f}")
+            del model
+    if not results:
+        return WhisperSelection(*fallback, source="config", reason="every candidate failed to load", host_id=host["id"])
+
+    best, reason = choose(results, floor)
+    selection = WhisperSelection(best["model_size"], best["compute_type"], "benchmark", reason, host["id"], results)
+    cache[key] = selection.as_dict()
+    try:
+        with open(cache_path, "w") as fh:
+            json.dump(cache, fh, indent=2)
+    except OSError as e:
+        print(f"Could not cache the Whisper selection in {cache_path}: {e}")
+    return selection
+
+
+def _int_list(raw: str) -> List[int]:
+    return [int(v) for v in raw.split(",") if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from media import decode_media
+    from pipeline import COMPUTE_TYPE, DEVICE, MODEL_SIZE
+
+    cpus = len(available_cpus())
+    powers = [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= cpus]
+    parser = argparse.ArgumentParser(description="Benchmark Whisper thread layouts on this host.")
+    parser.add_argument("--clip", required=True, help="a representative recording (any format FFmpeg reads)")
+    parser.add_argument("--threads", default=",".join(map(str, powers)), help="cpu_threads values to try")
+    parser.add_argument("--workers", default="1,2,4", help="num_workers values to try")
+    parser.add_argument("--requests", type=int, default=8, help="concurrent requests per throughput run")
+    parser.add_argument("--model", default=MODEL_SIZE)
+    parser.add_argument("--device", default=DEVICE)
+    parser.add_argument("--compute-type", default=COMPUTE_TYPE)
+    parser.add_argument("--output", default=WHISPER_TUNING_PATH)
+    args = parser.parse_args(argv)
+
+    from faster_whisper import WhisperModel
+
+    with decode_media(args.clip, with_video=False) as media:
+        audio = media.audio
+    if not len(audio):
+        print(f"{args.clip} has no audio.")
+        return 1
+
+    def factory(cpu_threads: int, num_workers: int):
+        return WhisperModel(
+            args.model, device=args.device, compute_type=args.compute_type,
+            cpu_threads=cpu_threads, num_workers=num_workers,
+        )
+
+    results = []
+    for combo in candidates(_int_list(args.threads), _int_list(args.workers), cpus):
+        result = benchmark(factory, audio, combo["cpu_threads"], combo["num_workers"], args.requests)
+        print(
+            f"cpu_threads={result['cpu_threads']:<3} num_workers={result['num_workers']:<3} "
+            f"latency={result['latency_seconds']:.2f}s throughput={result['throughput_x_realtime']:.2f}x realtime"
+        )
+        results.append(result)
+
+    tuning = {
+        "host": host_fingerprint(),
+        "model": args.model,
+        "device": args.device,
+        "compute_type": args.compute_type,
+        "clip": os.path.abspath(args.clip),
+        "clip_seconds": round(len(audio) / SAMPLE_RATE, 2),
+        "created_at": time.time(),
+        "results": results,
+        **pick_best(results),
+    }
+    with open(args.output, "w") as fh:
+        json.dump(tuning, fh, indent=2)
+    print(f"Best throughput: {tuning['throughput']}; best latency: {tuning['latency']}. Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""Word-level timing artifacts and the pacing metrics computed from them.
+
+With ``WORD_TIMESTAMPS`` on, Whisper reports every word's start, end and
+probability. The pipeline keeps them as one compressed ``.npz`` of columns per
+attempt under ``WORD_TIMINGS_DIR`` (a few KB for a three-minute answer), so
+delivery metrics can be recomputed or re-tuned later without decoding the
+media or running ASR again:
+
+    python word_timing.py                    # pacing for every stored attempt, as JSONL
+    python word_timing.py 3f2a... 9bc1...    # just these attempts
+
+Pacing here is measured on speech, not on the recording: speaking rate over
+the time actually spent talking, the distribution of pauses between words, and
+how much the rate moves between ``PACING_WINDOW_SECONDS`` windows.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+WORD_TIMESTAMPS = os.environ.get("WORD_TIMESTAMPS", "1") != "0"
+# Empty disables storing artifacts (timings are still used for the response).
+WORD_TIMINGS_DIR = os.environ.get(
+    "WORD_TIMINGS_DIR", os.path.join(tempfile.gettempdir(), "interview-transcriber-word-timings")
+)
+# Gaps between words shorter than this are part of fluent speech, not pauses.
+PAUSE_MIN_SECONDS = float(os.environ.get("PAUSE_MIN_SECONDS", "0.3"))
+LONG_PAUSE_SECONDS = float(os.environ.get("LONG_PAUSE_SECONDS", "1.5"))
+PACING_WINDOW_SECONDS = float(os.environ.get("PACING_WINDOW_SECONDS", "10"))
+LOW_CONFIDENCE_PROBABILITY = 0.5
+
+# Stored in each artifact so a later reader can tell formats apart.
+ARTIFACT_VERSION = 1
+
+_SAFE_ID = re.compile(r"[A-Za-z0-9_-]{1,128}")
+
+
+@dataclass
+class WordTimings:
+    """Columns of one transcript's words: text, start/end seconds, probability and segment."""
+
+    words: np.ndarray  # str
+    start: np.ndarray  # float32 seconds
+    end: np.ndarray  # float32 seconds
+    probability: np.ndarray  # float32
+    segment: np.ndarray  # int32 index of the Whisper segment each word came from
+    language: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def text(self) -> str:
+        # Whisper words carry their own leading space.
+        return "".join(self.words.tolist()).strip()
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Any], language: Optional[str] = None) -> Optional["WordTimings"]:
+        """From faster-whisper segments (``.words``) or segment dicts (``"words"``); None without word timing."""
+        words: List[str] = []
+        start: List[float] = []
+        end: List[float] = []
+        probability: List[float] = []
+        segment: List[int] = []
+        for i, seg in enumerate(segments):
+            seg_words = seg.get("words") if isinstance(seg, dict) else getattr(seg, "words", None)
+            if seg_words is None:
+                return None
+            for word in seg_words:
+                if isinstance(word, dict):
+                    words.append(word["word"])
+                    start.append(word["start"])
+                    end.append(word["end"])
+                    probability.append(word["probability"])
+                else:
+                    words.append(word.word)
+                    start.append(word.start)
+                    end.append(word.end)
+                    probability.append(word.probability)
+                segment.append(i)
+        return cls(
+            words=np.array(words, dtype=str),
+            start=np.array(start, dtype=np.float32),
+            end=np.array(end, dtype=np.float32),
+            probability=np.array(probability, dtype=np.float32),
+            segment=np.array(segment, dtype=np.int32),
+            language=language,
+        )
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp,
+            version=np.int32(ARTIFACT_VERSION),
+            words=self.words,
+            start=self.start,
+            end=self.end,
+            probability=self.probability,
+            segment=self.segment,
+            language=np.array(self.language or ""),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "WordTimings":
+        with np.load(path) as npz:
+            return cls(
+                words=npz["words"],
+                start=npz["start"],
+                end=npz["end"],
+                probability=npz["probability"],
+                segment=npz["segment"],
+                language=str(npz["language"]) or None,
+            )
+
+
+# ---------- Artifacts by attempt ----------
+def artifact_path(attempt_id: str, root: str = WORD_TIMINGS_DIR) -> str:
+    # Ids that aren't safe file names (bulk ids are relative paths) are hashed.
+    name = attempt_id if _SAFE_ID.fullmatch(attempt_id) else hashlib.sha256(attempt_id.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(root, f"{name}.npz")
+
+
+def save_artifact(attempt_id: str, timings: WordTimings, root: str = WORD_TIMINGS_DIR) -> Optional[str]:
+    if not root:
+        return None
+    path = artifact_path(attempt_id, root)
+    timings.save(path)
+    return path
+
+
+def load_artifact(attempt_id: str, root: str = WORD_TIMINGS_DIR) -> Optional[WordTimings]:
+    path = artifact_path(attempt_id, root) if root else ""
+    if not path or not os.path.exists(path):
+        return None
+    return WordTimings.load(path)
+
+
+# ---------- Pacing ----------
+def _wpm(words: float, seconds: float) -> Optional[float]:
+    return round(words * 60.0 / seconds, 1) if seconds > 0 else None
+
+
+def pacing_metrics(timings: WordTimings, window_seconds: float = PACING_WINDOW_SECONDS) -> Dict[str, Any]:
+    """Speech-time rate, pauses and rate variation of one answer, from its word timings."""
+    n = len(timings)
+    if n == 0:
+        return {"words": 0, "speech_seconds": 0.0, "articulation_wpm": None, "wpm": None, "pauses": {"count": 0}}
+    start = timings.start.astype(np.float64)
+    end = np.maximum(timings.end.astype(np.float64), start)
+    span = float(end[-1] - start[0])
+
+    gaps = np.maximum(start[1:] - end[:-1], 0.0)
+    pauses = gaps[gaps >= PAUSE_MIN_SECONDS]
+    pause_seconds = float(pauses.sum())
+    # Talking time: first word to last, minus the pauses (short gaps stay in).
+    speech_seconds = max(span - pause_seconds, 0.0)
+
+    pause_stats: Dict[str, Any] = {"count": int(len(pauses))}
+    if len(pauses):
+        p50, p90 = np.percentile(pauses, [50, 90])
+        pause_stats.update(
+            per_minute=round(len(pauses) * 60.0 / span, 2) if span > 0 else None,
+            mean_seconds=round(float(pauses.mean()), 3),
+            median_seconds=round(float(p50), 3),
+            p90_seconds=round(float(p90), 3),
+            max_seconds=round(float(pauses.max()), 3),
+            long=int((pauses >= LONG_PAUSE_SECONDS).sum()),
+            time_ratio=round(pause_seconds / span, 3) if span > 0 else None,
+        )
+
+    # Words per minute in consecutive windows, by each word's midpoint. A final
+    # window shorter than half the width is too noisy to count.
+    windows: List[float] = []
+    if window_seconds > 0 and span >= window_seconds:
+        mid = (start + end) / 2 - start[0]
+        edges = np.arange(0.0, span + window_seconds, window_seconds)
+        counts, _ = np.histogram(mid, bins=edges)
+        widths = np.minimum(edges[1:], span) - edges[:-1]
+        keep = widths >= window_seconds / 2
+        windows = (counts[keep] * 60.0 / widths[keep]).tolist()
+    rates = np.array(windows)
+
+    return {
+        "words": n,
+        "speech_seconds": round(speech_seconds, 2),
+        "articulation_wpm": _wpm(n, speech_seconds),
+        "wpm": _wpm(n, span),
+        "pauses": pause_stats,
+        "window_seconds": window_seconds,
+        "window_wpm": [round(r, 1) for r in windows],
+        "wpm_std": round(float(rates.std()), 1) if len(rates) > 1 else None,
+        "wpm_cv": round(float(rates.std() / rates.mean()), 3) if len(rates) > 1 and rates.mean() > 0 else None,
+        "mean_probability": round(float(timings.probability.mean()), 3),
+        "low_confidence_words": int((timings.probability < LOW_CONFIDENCE_PROBABILITY).sum()),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Recompute pacing metrics from stored word-timing artifacts.")
+    parser.add_argument("attempts", nargs="*", help="attempt ids (default: every artifact in --dir)")
+    parser.add_argument("--dir", default=WORD_TIMINGS_DIR)
+    parser.add_argument("--window-seconds", type=float, default=PACING_WINDOW_SECONDS)
+    args = parser.parse_args(argv)
+
+    if args.attempts:
+        paths = [(attempt, artifact_path(attempt, args.dir)) for attempt in args.attempts]
+    else:
+        names = sorted(name for name in os.listdir(args.dir) if name.endswith(".npz")) if os.path.isdir(args.dir) else []
+        paths = [(name[:-4], os.path.join(args.dir, name)) for name in names]
+    missing = 0
+    for attempt, path in paths:
+        if not os.path.exists(path):
+            print(json.dumps({"attempt_id": attempt, "error": "no word timings stored"}))
+            missing += 1
+            continue
+        metrics = pacing_metrics(WordTimings.load(path), args.window_seconds)
+        print(json.dumps({"attempt_id": attempt, **metrics}))
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Standalone job worker.
+
+Run one per transcriber box against the same queue to share work between nodes:
+
+    python worker.py --queue sqlite:///shared/jobs.sqlite3 --concurrency 2
+    python worker.py --queue file:///shared/jobs --kinds score
+    WHISPER_CPU_AFFINITY=auto python worker.py --cpu-slot 0 --cpu-slots 2
+
+Uploaded media referenced by queued jobs must live on storage every worker can
+read (``JOBS_DIR``).
+"""
+import argparse
+import signal
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+from jobs import (
+    JOB_LEASE_SECONDS,
+    JOB_POLL_SECONDS,
+    JOB_WORKERS,
+    JOBS_QUEUE_URL,
+    SCORE,
+    TRANSCRIBE,
+    JobHandler,
+    JobWorker,
+    open_queue,
+)
+from media import MediaProbe
+from pipeline import parse_history
+from scoring import REGISTRY as scoring_registry, RESPONSE_PROFILE, score_answer
+from whisper_tuning import apply_affinity
+
+
+def transcribe_handler(pipeline) -> JobHandler:
+    def handle(job: Dict[str, Any], progress: Callable[[str, float], None]) -> Dict[str, Any]:
+        params = job["params"]
+        probe = MediaProbe(**params["probe"]) if params.get("probe") else None
+        return pipeline.run(
+            job["media_path"],
+            params["duration_seconds"],
+            params["question"],
+            question_id=params.get("question_id"),
+            history=parse_history(params.get("history")),
+            progress=progress,
+            profile=params.get("profile", RESPONSE_PROFILE),
+            probe=probe,
+            tenant=params.get("tenant"),
+            user_id=params.get("user_id"),
+            # A retried job must not be matched against its own first attempt.
+            attempt_id=job["id"],
+        )
+    return handle
+
+
+def score_job(job: Dict[str, Any], progress: Callable[[str, float], None]) -> Dict[str, Any]:
+    params = job["params"]
+    progress("score", 0.0)
+    scoring = score_answer(
+        params["question"],
+        params["transcript"],
+        params["duration_seconds"],
+        parse_history(params.get("history")),
+        question_id=params.get("question_id"),
+        video_metrics=params.get("video_metrics"),
+        profile=params.get("profile", RESPONSE_PROFILE),
+        user_id=params.get("user_id"),
+        attempt_id=job["id"],
+    )
+    progress("score", 1.0)
+    return {
+        "transcript": params["transcript"],
+        "duration_seconds": params["duration_seconds"],
+        **scoring
+    }
+
+
+def build_handlers(kinds: List[str], pipeline=None) -> Dict[str, JobHandler]:
+    handlers: Dict[str, JobHandler] = {}
+    if SCORE in kinds:
+        handlers[SCORE] = score_job
+    if TRANSCRIBE in kinds:
+        if pipeline is None:
+            # Only nodes that transcribe pay for loading Whisper and MediaPipe.
+            from pipeline import TranscriptionPipeline
+            pipeline = TranscriptionPipeline()
+        handlers[TRANSCRIBE] = transcribe_handler(pipeline)
+    return handlers
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pull transcription and scoring jobs from a shared queue.")
+    parser.add_argument("--queue", default=JOBS_QUEUE_URL, help="sqlite:///path or file:///dir")
+    parser.add_argument("--kinds", default=f"{TRANSCRIBE},{SCORE}", help="comma-separated job kinds to accept")
+    parser.add_argument("--concurrency", type=int, default=max(1, JOB_WORKERS))
+    parser.add_argument("--lease-seconds", type=float, default=JOB_LEASE_SECONDS)
+    parser.add_argument("--poll-seconds", type=float, default=JOB_POLL_SECONDS)
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument("--cpu-slot", type=int, default=0, help="with WHISPER_CPU_AFFINITY, which CPU slice to pin to")
+    parser.add_argument("--cpu-slots", type=int, default=1, help="how many slices the CPUs are split into")
+    args = parser.parse_args(argv)
+    apply_affinity(args.cpu_slot, args.cpu_slots)
+
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()]
+    worker = JobWorker(
+        open_queue(args.queue),
+        build_handlers(kinds),
+        worker_id=args.worker_id,
+        concurrency=args.concurrency,
+        poll_seconds=args.poll_seconds,
+        lease_seconds=args.lease_seconds,
+    )
+
+    def shutdown(signum, frame):
+        print(f"Worker {worker.worker_id} stopping after current jobs...")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    print(f"Worker {worker.worker_id} serving {', '.join(kinds)} from {args.queue}")
+    scoring_registry.start_watching()
+    worker.start()
+    worker.wait()
+    scoring_registry.stop_watching()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())